@@ -0,0 +1,22 @@
+"""Gunicorn settings: preload the app in the master, connect per worker.
+
+The master imports the app and loads shared read-only data once; workers
+inherit it copy-on-write, open their own database connections, and elect
+a single scheduler process through the scheduler lock file.
+"""
+import os
+
+# Read by the app config, which is imported after this file
+os.environ.setdefault('PRELOAD_APP', 'true')
+
+preload_app = os.environ['PRELOAD_APP'].lower() == 'true'
+
+def when_ready(server):
+    if preload_app:
+        from src.application import ApplicationFactory
+        ApplicationFactory.preload_shared_state(server.app.wsgi())
+
+def post_fork(server, worker):
+    if preload_app:
+        from src.application import ApplicationFactory
+        ApplicationFactory.post_fork(worker.app.wsgi())
@@ -0,0 +1,83 @@
+"""Benchmark partitioned combination search across worker counts.
+
+Runs the same synthetic search with 1, 2, 4 ... workers, checks every run
+returns the identical merged result, and reports wall time, speedup and
+parallel efficiency against the single-worker run.
+
+    python scripts/benchmark_optimizer.py --items 400 --max-results 100
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services.combination_search import PriceArrays  # noqa: E402
+from src.services.optimization_runner import OptimizationRunner  # noqa: E402
+
+def synthetic_prices(count: int, seed: int) -> PriceArrays:
+    """Log-normal base prices with buy prices 0.6x-1.6x of base."""
+    rng = np.random.default_rng(seed)
+    base = rng.lognormal(10.5, 1.0, count).round()
+    return PriceArrays(
+        item_ids=[f"item-{i}" for i in range(count)],
+        base_prices=base,
+        buy_prices=(base * rng.uniform(0.6, 1.6, count)).round()
+    )
+
+def worker_counts(limit: int):
+    count = 1
+    while count < limit:
+        yield count
+        count *= 2
+    yield limit
+
+def run(prices: PriceArrays, workers: int, args) -> tuple:
+    runner = OptimizationRunner(max_workers=workers)
+    try:
+        # Start the pool first so process spawn time is not measured
+        list(runner.executor.map(abs, range(workers)))
+        started = time.perf_counter()
+        job = runner.submit(
+            prices,
+            max_items=args.max_items,
+            min_total_value=args.min_total_value,
+            max_results=args.max_results
+        )
+        results = job.result()
+        return time.perf_counter() - started, results
+    finally:
+        runner.shutdown()
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=400)
+    parser.add_argument('--max-items', type=int, default=5)
+    parser.add_argument('--min-total-value', type=float, default=400000)
+    parser.add_argument('--max-results', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    prices = synthetic_prices(args.items, args.seed)
+    print(f"{args.items} items, up to {args.max_items} per combination, top {args.max_results}")
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8} {'efficiency':>11}")
+
+    baseline = expected = None
+    for workers in worker_counts(args.workers):
+        elapsed, results = run(prices, workers, args)
+        if expected is None:
+            baseline, expected = elapsed, results
+        elif results != expected:
+            print(f"{workers} workers returned a different result", file=sys.stderr)
+            return 1
+        speedup = baseline / elapsed
+        print(f"{workers:>8} {elapsed:>10.3f} {speedup:>8.2f} {speedup / workers:>10.0%}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
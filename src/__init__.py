@@ -62,18 +62,6 @@ def create_app(config_object=None):
     @sockets.route('/ws/market')
     def market_socket(ws):
         from src.core.websocket import manager
-        client_id = str(uuid.uuid4())
-        manager.connect(client_id, ws)
-        try:
-            while not ws.closed:
-                message = ws.receive()
-                if message:
-                    data = json.loads(message)
-                    if data.get('type') == 'subscribe':
-                        manager.subscribe(client_id, data.get('item_id'))
-                    elif data.get('type') == 'unsubscribe':
-                        manager.unsubscribe(client_id, data.get('item_id'))
-        finally:
-            manager.disconnect(client_id)
+        manager.handle_connection(ws)
     
     return app
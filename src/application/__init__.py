@@ -1,5 +1,10 @@
 """Application factory module."""
-from flask import Flask
+import asyncio
+import atexit
+import logging
+from threading import Thread
+
+from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_login import LoginManager
 from flask_sockets import Sockets
@@ -11,7 +16,10 @@ from src.database import init_db
 from src.blueprints import register_blueprints
 from src.core.scheduler import SchedulerManager
 from src.core.tasks import TaskManager
-from src.core.websocket import ConnectionManager
+from src.core.websocket import manager as websocket_manager
+from src.database.warmup import warmup_registry
+
+logger = logging.getLogger(__name__)
 
 class ApplicationFactory:
     """Factory for creating and configuring Flask applications."""
@@ -41,26 +49,61 @@ class ApplicationFactory:
         )
         app.config['task_manager'] = task_manager
         
-        # Initialize and start scheduler
+        # Initialize the scheduler; a preloaded app starts it after forking
         scheduler = SchedulerManager(app.config)
-        scheduler.start()
+        if not app.config.get('PRELOAD_APP'):
+            scheduler.start()
         app.config['scheduler'] = scheduler
+        atexit.register(scheduler.stop)
         
-        # Initialize WebSocket manager
-        websocket_manager = ConnectionManager()
+        # Warm query plans in the background; readiness waits for it
+        if not app.config.get('PRELOAD_APP'):
+            ApplicationFactory.start_warmup(app)
+            ApplicationFactory.start_snapshot_relay(app)
+        
+        # Share the WebSocket manager the ingest path publishes to
         app.config['websocket_manager'] = websocket_manager
         
         # Register blueprints
         register_blueprints(app)
         
+        # Register GraphQL endpoint
+        ApplicationFactory._register_graphql_routes(app)
+        
         # Register WebSocket routes
         ApplicationFactory._register_websocket_routes(app, sockets)
         
+        # Register liveness and readiness checks
+        ApplicationFactory._register_health_routes(app)
+        
         # Register cleanup
         ApplicationFactory._register_cleanup_handlers(app)
         
         return app
 
+    @staticmethod
+    def _register_graphql_routes(app: Flask) -> None:
+        """Register the GraphQL endpoint.
+
+        strawberry and the schema are imported by the first GraphQL
+        request rather than at worker boot.
+        """
+        views = []
+
+        def graphql_view(*args, **kwargs):
+            if not views:
+                from src.graphql.schema import schema
+                from src.graphql.views import GraphQLView
+                views.append(GraphQLView.as_view('graphql_view', schema=schema))
+            return views[0](*args, **kwargs)
+
+        app.add_url_rule(
+            '/graphql',
+            endpoint='graphql_view',
+            view_func=graphql_view,
+            methods=['GET', 'POST']
+        )
+
     @staticmethod
     def _register_websocket_routes(app: Flask, sockets: Sockets) -> None:
         """Register WebSocket routes."""
@@ -69,16 +112,106 @@ class ApplicationFactory:
             websocket_manager = app.config['websocket_manager']
             websocket_manager.handle_connection(ws)
 
+    @staticmethod
+    def _register_health_routes(app: Flask) -> None:
+        """Register liveness and readiness checks.
+
+        ``/health`` answers as soon as the worker serves requests;
+        ``/health/ready`` returns 503 until the plan warmup has finished,
+        so load balancers hold traffic back from a cold worker.
+        """
+        @app.route('/health')
+        def health():
+            return jsonify({'status': 'ok', 'ready': warmup_registry.ready})
+
+        @app.route('/health/ready')
+        def readiness():
+            if not warmup_registry.ready:
+                return jsonify({'ready': False}), 503
+            return jsonify({'ready': True, 'warmup': warmup_registry.results})
+
+    @staticmethod
+    def start_warmup(app: Flask) -> None:
+        """Replay the warmup statements in a background thread.
+
+        Run once per worker after forking; with warmup disabled the
+        worker is ready straight away.
+        """
+        if not app.config.get('WARMUP_ENABLED', True):
+            warmup_registry.mark_ready()
+            return
+        Thread(target=warmup_registry.run, name='warmup', daemon=True).start()
+
+    @staticmethod
+    def start_snapshot_relay(app: Flask) -> None:
+        """Follow ingests finished in the scheduler worker from this one.
+
+        Run once per worker after forking.
+        """
+        from src.services.snapshot_relay import snapshot_relay
+        snapshot_relay.start(app.config.get('SNAPSHOT_RELAY_INTERVAL', 15))
+        atexit.register(snapshot_relay.stop)
+
     @staticmethod
     def _register_cleanup_handlers(app: Flask) -> None:
         """Register cleanup handlers for application shutdown."""
+        # The scheduler is stopped at exit, not when each app context ends
         @app.teardown_appcontext
         def cleanup(exception=None):
-            # Stop scheduler
-            scheduler = app.config.get('scheduler')
-            if scheduler:
-                scheduler.stop()
-            
             # Close database connections
             from src.database import Database
             Database.close()
+
+    @staticmethod
+    def preload_shared_state(app: Flask) -> None:
+        """Load read-only data in the gunicorn master before it forks.
+
+        Compiled templates and the optimiser's candidate prices are then
+        shared copy-on-write by every worker. Database connections opened
+        here are closed again, since sockets must not cross the fork.
+        """
+        for name in app.jinja_env.list_templates():
+            try:
+                app.jinja_env.get_template(name)
+            except Exception as e:
+                logger.warning(f"Template {name} failed to compile: {str(e)}")
+
+        try:
+            with app.app_context():
+                asyncio.run(ApplicationFactory._load_price_snapshot())
+        except Exception as e:
+            logger.warning(f"Price snapshot not preloaded: {str(e)}")
+
+        from src.database import Database
+        from src.database.neo4j import db
+        Database.close()
+        db.close()
+
+    @staticmethod
+    async def _load_price_snapshot() -> None:
+        from src.core.snapshot import price_snapshot
+        from src.services.combination_search import PriceArrays
+        from src.services.item_service import ItemService
+        from src.services.price_adjustments import price_adjustments
+
+        service = ItemService()
+        stamp = await service.get_adjustment_version()
+        price_adjustments.load(await service.get_price_adjustments(), stamp)
+        records = await service.get_optimization_candidates()
+        price_adjustments.rebase(price_snapshot.value, PriceArrays.from_records(records))
+        logger.info(f"Preloaded prices for {len(records)} items")
+
+    @staticmethod
+    def post_fork(app: Flask) -> None:
+        """Per-worker start-up for a preloaded app.
+
+        Connections are opened lazily by the worker itself; the scheduler
+        starts in whichever worker wins the lock-file election, every
+        worker relays that worker's ingests to its own WebSocket clients,
+        and every worker warms its plans before reporting ready.
+        """
+        scheduler = app.config.get('scheduler')
+        if scheduler is not None:
+            scheduler.start()
+        ApplicationFactory.start_snapshot_relay(app)
+        ApplicationFactory.start_warmup(app)
@@ -10,6 +10,7 @@ from .optimizer import optimizer_bp
 from .api import api_bp
 from .errors import errors_bp
 from .market import bp as market_bp
+from .history import history_bp
 
 __all__ = ['register_blueprints']
 
@@ -22,6 +23,7 @@ def register_blueprints(app: Flask) -> None:
         (items_bp, '/items'),
         (optimizer_bp, '/optimize'),
         (market_bp, '/market'),
+        (history_bp, '/history'),
         (api_bp, f"{app.config['API_PREFIX']}/{app.config['API_VERSION']}")
     ]
 
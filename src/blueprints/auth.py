@@ -1,4 +1,5 @@
 # Standard library imports
+import inspect
 import logging
 from functools import wraps
 from datetime import datetime, timedelta
@@ -10,6 +11,7 @@ from werkzeug.security import check_password_hash
 import jwt
 
 # Local imports
+from src.core.auth import is_admin_request
 from src.core.limiter import rate_limit
 from src.forms.auth import ChangePasswordForm, LoginForm, RegisterForm  # type: ignore
 from src.services.auth_service import AuthService
@@ -19,19 +21,25 @@ from src.models import User
 auth_bp = Blueprint('auth', __name__)
 auth_service = AuthService()
 
+def _admin_denied():
+    """401 response for a request without a valid admin token, else None."""
+    if not request.cookies.get('admin_token'):
+        return jsonify({'message': 'Admin token is missing'}), 401
+    if not is_admin_request(request):
+        return jsonify({'message': 'Invalid admin token'}), 401
+    return None
+
 def admin_required(f):
+    # Async views need an async wrapper, or Flask receives an unawaited coroutine
+    if inspect.iscoroutinefunction(f):
+        @wraps(f)
+        async def decorated_async(*args, **kwargs):
+            return _admin_denied() or await f(*args, **kwargs)
+        return decorated_async
+
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.cookies.get('admin_token')
-        
-        if not token:
-            return jsonify({'message': 'Admin token is missing'}), 401
-
-        try:
-            jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
-            return f(*args, **kwargs)
-        except:
-            return jsonify({'message': 'Invalid admin token'}), 401
+        return _admin_denied() or f(*args, **kwargs)
 
     return decorated
 
@@ -1,9 +1,11 @@
 from flask import Blueprint, jsonify, render_template, request
-from src.services.data_service import DataService
 from src.blueprints.auth import admin_required
+from src.core.providers import ServiceProvider
 
 history_bp = Blueprint('history', __name__)
-data_service = DataService()
+data_service = ServiceProvider('src.services.data_service:DataService')
+
+MAX_COMBINATIONS_PER_SAVE = 5000
 
 @history_bp.route('/')
 def index():
@@ -27,6 +29,29 @@ def get_combinations():
             'error': str(e)
         }), 400
 
+@history_bp.route('/combinations', methods=['POST'])
+@admin_required
+def save_combinations():
+    """Save a batch of combinations; identical ones are stored once (admin only)"""
+    try:
+        data = request.get_json() or {}
+        combinations = [
+            {'items': list(c['items']), 'total_price': float(c['total_price'])}
+            for c in data.get('combinations', [])
+        ]
+        if len(combinations) > MAX_COMBINATIONS_PER_SAVE:
+            raise ValueError(f'At most {MAX_COMBINATIONS_PER_SAVE} combinations per request')
+        ids = data_service.save_combinations(combinations, data.get('compact', True))
+        return jsonify({
+            'success': True,
+            'ids': ids
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 @history_bp.route('/combinations/<combination_id>', methods=['DELETE'])
 @admin_required
 def delete_combination(combination_id):
@@ -1,4 +1,4 @@
-from typing import Tuple, Dict, Any, Optional, cast
+from typing import TYPE_CHECKING, Tuple, Dict, Any, cast
 import logging
 from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, url_for
 from flask_login import login_required
@@ -8,23 +8,23 @@ from src.core.cache import cached
 from src.core.limiter import rate_limit
 from src.core.decorators import db_transaction, validate_form_data
 from src.services.exceptions import DatabaseError, ItemNotFoundError, ValidationError
-from src.services.item_service import ItemService
+from src.core.providers import ServiceProvider
 from src.types.responses import (
     ResponseType, PaginatedResponse, ItemResponse, 
     ErrorResponse, SuccessResponse
 )
 
+if TYPE_CHECKING:
+    from src.services.item_service import ItemService
+
 bp = Blueprint('items', __name__)
 logger = logging.getLogger(__name__)
 
-# Use singleton pattern for service
-_item_service: Optional[ItemService] = None
+# Built on first use, so importing the blueprint does not load the service
+_item_service = ServiceProvider('src.services.item_service:ItemService')
 
-def get_item_service() -> ItemService:
-    global _item_service
-    if _item_service is None:
-        _item_service = ItemService()
-    return _item_service
+def get_item_service() -> 'ItemService':
+    return _item_service.get()
 
 @bp.route('/')
 @cached(timeout_seconds=lambda: current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300))
@@ -4,19 +4,24 @@ from typing import Dict, Any, List
 
 from flask import Blueprint, current_app, jsonify, render_template, request
 from flask_login import login_required
+from pydantic import ValidationError
 
-from src.core.neo4j import Neo4jClient
-from src.services.item_service import ItemService
-from src.services.market_service import MarketService
+from src.core.providers import ServiceProvider
 from src.services.exceptions import OptimizationError
-from src.models.item import Item
+from src.models.item import Item, ItemAdjustment
 from src.blueprints.auth import admin_required
+from src.core.snapshot import price_snapshot
 
+# numpy and the optimiser modules are imported by the handlers that use
+# them, so registering the blueprint stays cheap at worker boot
 optimizer_bp = Blueprint('optimizer', __name__)
-item_service = ItemService()
-market_service = MarketService()
+item_service = ServiceProvider('src.services.item_service:ItemService')
+market_service = ServiceProvider('src.services.market_service:MarketService')
 logger = logging.getLogger(__name__)
 
+# One UNWIND statement per request keeps large batches in a single transaction
+MAX_ADJUSTMENTS_PER_REQUEST = 5000
+
 @optimizer_bp.route('/')
 def index():
     """Main optimization interface"""
@@ -25,25 +30,25 @@ def index():
 @optimizer_bp.route('/optimize', methods=['POST'])
 async def optimize():
     """Find optimal item combinations"""
+    from src.services.trader_availability import PlayerProfile
+
     try:
         data = request.get_json()
         budget = data.get('budget', 0)
-        trader_levels = data.get('trader_levels', {})
         include_barter = data.get('include_barter', True)
         include_craft = data.get('include_craft', True)
 
-        # Get arbitrage opportunities
+        # Get arbitrage opportunities the player can actually buy
         opportunities = await market_service.find_arbitrage_opportunities(
             min_profit=10000,  # Configurable minimum profit
-            min_profit_percent=10  # Configurable minimum profit percentage
+            min_profit_percent=10,  # Configurable minimum profit percentage
+            profile=PlayerProfile.from_request(data)
         )
 
-        # Filter by trader levels and budget
+        # Filter by budget
         filtered_opportunities = [
             opp for opp in opportunities
-            if opp['buy_price'] <= budget and
-            all(level >= trader_levels.get(vendor, 0) 
-                for vendor, level in trader_levels.items())
+            if opp['buy_price'] <= budget
         ]
 
         # Include barter trades if requested
@@ -61,9 +66,11 @@ async def optimize():
                     opp['craft_options'] = craft_reqs
 
         # Calculate market trends
+        trends = await market_service.analyze_market_trends_bulk(
+            [opp['item_id'] for opp in filtered_opportunities]
+        )
         for opp in filtered_opportunities:
-            market_data = await market_service.analyze_market_trends(opp['item_id'])
-            opp['market_trends'] = market_data.model_dump()
+            opp['market_trends'] = trends[opp['item_id']].model_dump()
 
         return jsonify({
             'success': True,
@@ -77,6 +84,168 @@ async def optimize():
             'error': str(e)
         }), 500
 
+async def _candidates(data: Dict[str, Any]):
+    """Effective candidate prices for the player profile in ``data``
+
+    Returns the prices with overrides applied and the locked mask, which
+    candidates the player can buy, and the profile itself.
+    """
+    from src.services.combination_search import PriceArrays
+    from src.services.price_adjustments import price_adjustments
+    from src.services.trader_availability import PlayerProfile
+
+    # Another worker may have changed adjustments since this one loaded them
+    stamp = await item_service.get_adjustment_version()
+    version = price_snapshot.value
+    stale = price_adjustments.is_stale(version)
+    if stale or price_adjustments.needs_reload(stamp):
+        price_adjustments.load(await item_service.get_price_adjustments(), stamp)
+    if stale:
+        records = await item_service.get_optimization_candidates()
+        price_adjustments.rebase(version, PriceArrays.from_records(records))
+    effective = price_adjustments.view()
+    available = ~effective.blacklisted
+    profile = PlayerProfile.from_request(data)
+    if not profile.restricts:
+        return effective.prices, effective.locked, available, profile
+    index = await market_service.get_trader_availability()
+    prices, can_buy = index.apply(effective.prices, profile)
+    # Admin overrides win over the profile's offer prices
+    prices = price_adjustments.apply(prices).prices
+    return prices, effective.locked, available & can_buy, profile
+
+@optimizer_bp.route('/combinations', methods=['POST'])
+async def start_combination_search():
+    """Start a combination search in the worker pool and return its task id
+
+    Searches already answered for the current price snapshot are returned
+    directly, without a task.
+    """
+    import numpy as np
+    from src.services.optimization_cache import optimization_cache
+    from src.services.optimization_runner import optimization_runner
+    from src.services.price_adjustments import price_adjustments
+
+    try:
+        data = request.get_json() or {}
+        max_items = data.get('max_items', 5)
+        min_total_value = data.get('min_total_value', 400000)
+        max_results = data.get('max_results', 10)
+
+        version = price_snapshot.value
+        prices, locked, available, profile = await _candidates(data)
+        locked_ids = [prices.item_ids[i] for i in np.flatnonzero(locked)]
+        key = optimization_cache.key(
+            'combinations',
+            optimization_cache.selection_hash(prices.item_ids, locked_ids),
+            max_items=max_items,
+            min_total_value=min_total_value,
+            profile=profile.key(),
+            adjustments=price_adjustments.generation
+        )
+        cached = optimization_cache.get(key, max_results)
+        if cached is not None:
+            return jsonify({'success': True, 'cached': True, 'result': cached})
+
+        job = optimization_runner.submit(
+            prices,
+            max_items=max_items,
+            min_total_value=min_total_value,
+            max_results=max_results,
+            locked_ids=locked_ids,
+            blacklisted_ids=[prices.item_ids[i] for i in np.flatnonzero(~available & ~locked)]
+        )
+        job.future.add_done_callback(
+            lambda future: _cache_search(future, job, key, max_results, version)
+        )
+        task_id = current_app.config['task_manager'].submit_job('combination_search', job)
+        return jsonify({'success': True, 'task_id': task_id}), 202
+    except Exception as e:
+        logger.error(f"Combination search error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@optimizer_bp.route('/pareto', methods=['POST'])
+async def combination_front():
+    """Cost/value/item-count Pareto front of item combinations"""
+    import numpy as np
+    from src.services.combination_search import pareto_front
+    from src.services.optimization_cache import optimization_cache
+    from src.services.price_adjustments import price_adjustments
+
+    try:
+        data = request.get_json() or {}
+        max_items = data.get('max_items', 5)
+        min_total_value = data.get('min_total_value', 400000)
+        include_flea_only = data.get('include_flea_only', True)
+
+        version = price_snapshot.value
+        prices, locked, available, profile = await _candidates(data)
+        locked_ids = [prices.item_ids[i] for i in np.flatnonzero(locked)]
+        key = optimization_cache.key(
+            'pareto',
+            optimization_cache.selection_hash(prices.item_ids, locked_ids),
+            max_items=max_items,
+            min_total_value=min_total_value,
+            include_flea_only=include_flea_only,
+            profile=profile.key(),
+            adjustments=price_adjustments.generation
+        )
+        front = optimization_cache.get(key)
+        if front is None:
+            front = pareto_front(
+                prices.base_prices,
+                prices.buy_prices,
+                eligible=np.flatnonzero(
+                    available & ~locked & (include_flea_only | ~prices.flea_only)
+                ).tolist(),
+                locked=np.flatnonzero(locked).tolist(),
+                max_items=max_items,
+                min_total_value=min_total_value,
+                flea_only=prices.flea_only
+            )
+            for point in front:
+                point['item_ids'] = [prices.item_ids[i] for i in point.pop('indices')]
+            optimization_cache.set(key, front, version=version)
+        return jsonify({'success': True, 'front': front})
+    except Exception as e:
+        logger.error(f"Pareto front error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _cache_search(future, job, key, max_results: int, version: int) -> None:
+    """Memoise a finished combination search for its price snapshot"""
+    from src.services.optimization_cache import optimization_cache
+
+    if future.cancelled() or future.exception() is not None or future.result() is None:
+        return
+    optimization_cache.set(key, job.result(), max_results, version)
+
+@optimizer_bp.route('/tasks/<task_id>', methods=['GET'])
+def task_status(task_id: str):
+    """Poll a background optimisation task"""
+    info = current_app.config['task_manager'].get_task_info(task_id)
+    if info is None:
+        return jsonify({'success': False, 'error': 'Task not found'}), 404
+    return jsonify({
+        'success': True,
+        'task_id': info.task_id,
+        'status': info.status,
+        'progress': info.progress,
+        'result': info.result,
+        'error': info.error
+    })
+
+@optimizer_bp.route('/tasks/<task_id>', methods=['DELETE'])
+def cancel_task(task_id: str):
+    """Cancel a running optimisation task"""
+    cancelled = current_app.config['task_manager'].cancel_task(task_id)
+    return jsonify({'success': cancelled})
+
 @optimizer_bp.route('/price-override', methods=['POST'])
 @admin_required
 async def set_price_override():
@@ -87,7 +256,7 @@ async def set_price_override():
         new_price = data['price']
         
         # Create price override
-        await item_service.create_price_override(item_id, new_price)
+        await item_service.create_price_override(item_id, new_price, data.get('duration'))
         
         return jsonify({'success': True})
     except Exception as e:
@@ -153,7 +322,7 @@ async def manage_blacklist():
         action = data['action']  # 'add' or 'remove'
         
         if action == 'add':
-            await item_service.blacklist_item(item_id)
+            await item_service.blacklist_item(item_id, data.get('duration'))
         else:
             await item_service.remove_from_blacklist(item_id)
             
@@ -165,32 +334,42 @@ async def manage_blacklist():
             'error': str(e)
         }), 500
 
+@optimizer_bp.route('/adjustments', methods=['POST'])
+@admin_required
+async def bulk_adjustments():
+    """Apply many price override, blacklist and lock changes at once (admin only)"""
+    try:
+        changes = (request.get_json() or {}).get('changes') or []
+        if len(changes) > MAX_ADJUSTMENTS_PER_REQUEST:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_ADJUSTMENTS_PER_REQUEST} changes per request'
+            }), 400
+        try:
+            adjustments = [ItemAdjustment.model_validate(change) for change in changes]
+        except ValidationError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        updated = await item_service.apply_adjustments(adjustments)
+        return jsonify({
+            'success': True,
+            'updated': updated,
+            'missing': sorted({a.item_id for a in adjustments} - set(updated))
+        })
+    except Exception as e:
+        logger.error(f"Bulk adjustment error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @optimizer_bp.route('/craft-analysis', methods=['GET'])
 async def analyze_crafts():
     """Analyze craft profitability"""
     try:
-        # Get all items with crafts
-        query = """
-        MATCH (i:Item)<-[:PRODUCES]-(c:Trade {type: 'craft'})
-        MATCH (c)-[r:REQUIRES]->(req:Item)
-        WITH i, c, collect({item: req, count: toInteger(r.count)}) as requirements
-        MATCH (i)-[:CAN_SELL_TO]->(st:Trade)
-        WHERE st.priceRUB = max(st.priceRUB)
-        WITH i, c, requirements, st.priceRUB as sell_price
-        RETURN i.name as item_name,
-               i.uid as item_id,
-               c.station as station,
-               requirements,
-               sell_price,
-               sell_price - reduce(
-                   cost = 0,
-                   r IN requirements |
-                   cost + r.item.last_low_price * r.count
-               ) as profit
-        ORDER BY profit DESC
-        """
-        
-        crafts = await item_service._execute_query(query)
+        # Every craft unless a minimum profit is asked for
+        min_profit = request.args.get('min_profit', type=float)
+        crafts = await item_service.find_profitable_crafts(min_profit)
         
         return jsonify({
             'success': True,
@@ -1,5 +1,6 @@
 """Application configuration module."""
 import os
+import tempfile
 from typing import Dict, Any
 from pathlib import Path
 from dotenv import load_dotenv
@@ -40,6 +41,26 @@ class BaseConfig:
     LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '10'))
     LOG_JSON_INDENT = None if os.getenv('ENVIRONMENT') == 'production' else 2
 
+    # Worker and scheduler settings
+    PRELOAD_APP = os.getenv('PRELOAD_APP', 'False').lower() == 'true'
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'True').lower() == 'true'
+    SCHEDULER_LOCK_FILE = os.getenv(
+        'SCHEDULER_LOCK_FILE', os.path.join(tempfile.gettempdir(), 'tarkov-scheduler.lock')
+    )
+    SCHEDULER_ELECTION_INTERVAL = int(os.getenv('SCHEDULER_ELECTION_INTERVAL', '60'))
+    SCHEDULER_JITTER = int(os.getenv('SCHEDULER_JITTER', '30'))
+    SCHEDULER_MISFIRE_GRACE_TIME = int(os.getenv('SCHEDULER_MISFIRE_GRACE_TIME', '300'))
+    SCHEDULER_JOB_TIMEOUT = int(os.getenv('SCHEDULER_JOB_TIMEOUT', '1800'))
+    SNAPSHOT_RELAY_INTERVAL = int(os.getenv('SNAPSHOT_RELAY_INTERVAL', '15'))
+
+    # Database maintenance settings
+    PRICE_HISTORY_RETENTION_DAYS = int(os.getenv('PRICE_HISTORY_RETENTION_DAYS', '90'))
+    COMBINATION_RETENTION_DAYS = int(os.getenv('COMBINATION_RETENTION_DAYS', '180'))
+    MAINTENANCE_BATCH_SIZE = int(os.getenv('MAINTENANCE_BATCH_SIZE', '10000'))
+    PLAN_WARMUP_QUERIES = int(os.getenv('PLAN_WARMUP_QUERIES', '50'))
+    # Replay representative statements before a worker reports ready
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'True').lower() == 'true'
+
     # Security settings
     SESSION_COOKIE_SECURE = False
     REMEMBER_COOKIE_SECURE = False
@@ -59,6 +80,7 @@ class TestingConfig(BaseConfig):
     DEBUG = True
     RATE_LIMIT_ENABLED = False
     LOG_LEVEL = 'DEBUG'
+    WARMUP_ENABLED = False
 
 class ProductionConfig(BaseConfig):
     """Production configuration."""
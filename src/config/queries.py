@@ -1,7 +1,9 @@
 """GraphQL queries for Tarkov.dev API"""
+from dataclasses import dataclass, field
+from typing import Any, Dict
 
 ITEMS_QUERY = """
-query GetItems($lang: String = "en", $ids: [ID!], $skipPrices: Boolean = false, $includeCategory: Boolean = true, $includeProperties: Boolean = true, $includeTrading: Boolean = true, $includeContainment: Boolean = false, $includeTasks: Boolean = false, $includeBarters: Boolean = false, $includeCrafts: Boolean = false) {
+query GetItems($lang: String = "en", $ids: [ID!], $skipPrices: Boolean = false, $includeCategory: Boolean = true, $includeProperties: Boolean = true, $includeSlots: Boolean = true, $includeTrading: Boolean = true, $includeContainment: Boolean = false, $includeTasks: Boolean = false, $includeBarters: Boolean = false, $includeCrafts: Boolean = false) {
   items(lang: $lang, ids: $ids) {
     id
     name
@@ -26,7 +28,7 @@ query GetItems($lang: String = "en", $ids: [ID!], $skipPrices: Boolean = false,
       name
     }
     properties @include(if: $includeProperties) {
-      slots {
+      slots @include(if: $includeSlots) {
         filters {
           id
           name
@@ -140,7 +142,7 @@ query GetItems($lang: String = "en", $ids: [ID!], $skipPrices: Boolean = false,
 """
 
 ITEM_BY_ID_QUERY = """
-query GetItemById($id: ID!, $lang: String = "en", $skipPrices: Boolean = false, $includeCategory: Boolean = true, $includeProperties: Boolean = true, $includeTrading: Boolean = true, $includeContainment: Boolean = false, $includeTasks: Boolean = false, $includeBarters: Boolean = false, $includeCrafts: Boolean = false) {
+query GetItemById($id: ID!, $lang: String = "en", $skipPrices: Boolean = false, $includeCategory: Boolean = true, $includeProperties: Boolean = true, $includeSlots: Boolean = true, $includeTrading: Boolean = true, $includeContainment: Boolean = false, $includeTasks: Boolean = false, $includeBarters: Boolean = false, $includeCrafts: Boolean = false) {
   item(id: $id, lang: $lang) {
     ... ItemFields
   }
@@ -170,7 +172,7 @@ fragment ItemFields on Item {
     name
   }
   properties @include(if: $includeProperties) {
-    slots {
+    slots @include(if: $includeSlots) {
       filters {
         id
         name
@@ -280,16 +282,101 @@ fragment ItemFields on Item {
     }
   }
 }
+"""
 
 # Default query variables
 DEFAULT_QUERY_VARIABLES = {
     "skipPrices": False,
     "includeCategory": True,
     "includeProperties": True,
+    "includeSlots": True,
     "includeTrading": True,
     "includeContainment": False,
     "includeTasks": False,
     "includeBarters": False,
     "includeCrafts": False
 }
+
+# Trimmed documents for the scheduled refreshes. Each one fetches only what
+# its merge step writes, so the frequent price refresh never pays for
+# properties, slot filters or trader offers.
+PRICES_QUERY = """
+query GetItemPrices($lang: String = "en", $ids: [ID!]) {
+  items(lang: $lang, ids: $ids) {
+    id
+    basePrice
+    lastLowPrice
+    avg24hPrice
+    low24h
+    high24h
+    changeLast48h
+    updated
+  }
+}
 """
+
+TRADING_QUERY = """
+query GetItemTrading($lang: String = "en", $ids: [ID!]) {
+  items(lang: $lang, ids: $ids) {
+    id
+    buyFor {
+      source
+      price
+      currency
+      priceRUB
+      vendor {
+        name
+        normalizedName
+        ... on TraderOffer {
+          minTraderLevel
+          taskUnlock {
+            id
+          }
+        }
+      }
+    }
+    sellFor {
+      source
+      price
+      currency
+      priceRUB
+      vendor {
+        name
+        normalizedName
+      }
+    }
+  }
+}
+"""
+
+@dataclass(frozen=True)
+class QueryProfile:
+    """A named upstream query variant and how often it is refreshed."""
+    name: str
+    query: str
+    variables: Dict[str, Any] = field(default_factory=dict)
+    refresh: Dict[str, Any] = field(default_factory=dict)
+
+QUERY_PROFILES: Dict[str, QueryProfile] = {
+    'prices': QueryProfile(
+        name='prices',
+        query=PRICES_QUERY,
+        refresh={'trigger': 'interval', 'minutes': 5}
+    ),
+    'trading': QueryProfile(
+        name='trading',
+        query=TRADING_QUERY,
+        refresh={'trigger': 'interval', 'hours': 1}
+    ),
+    'full-static': QueryProfile(
+        name='full-static',
+        query=ITEMS_QUERY,
+        variables={
+            **DEFAULT_QUERY_VARIABLES,
+            "skipPrices": True,
+            "includeSlots": False,
+            "includeTrading": False
+        },
+        refresh={'trigger': 'cron', 'hour': 4}
+    )
+}
@@ -12,10 +12,10 @@ from .errors import register_error_handlers
 from .limiter import rate_limit
 from .tasks import task_manager, background_task
 from .scheduler import SchedulerManager
-from .websocket import ConnectionManager, MarketUpdate
+from .websocket import MarketUpdate, manager
 
 # Initialize core components
-websocket_manager = ConnectionManager()
+websocket_manager = manager
 
 __all__ = [
     'cache',
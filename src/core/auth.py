@@ -1,8 +1,22 @@
 import os
 from functools import wraps
+from typing import Any
+
+import jwt
 from flask import request, jsonify, current_app
 from flask_jwt_extended import verify_jwt_in_request, get_jwt
 
+def is_admin_request(req: Any) -> bool:
+    """Whether ``req`` carries a valid ``admin_token`` cookie."""
+    token = req.cookies.get('admin_token')
+    if not token:
+        return False
+    try:
+        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+    except jwt.PyJWTError:
+        return False
+    return bool(payload.get('admin'))
+
 def auth_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -0,0 +1,57 @@
+"""Run scheduled jobs under a watchdog and record how long they take."""
+import logging
+import time
+from threading import Timer
+from typing import Any, Callable, Optional
+
+from src.core.metrics import MetricsCollector, metrics_collector
+
+logger = logging.getLogger(__name__)
+
+class JobRunner:
+    """Wrap each scheduled run with a watchdog and duration metrics.
+
+    The watchdog fires once a run passes its ``deadline`` (for an interval
+    job, its interval) and logs and counts the overrun; it cannot stop a
+    thread, but with ``max_instances=1`` the scheduler skips the runs that
+    would otherwise pile up behind it. Failures are logged and recorded
+    rather than raised so one bad run never kills the scheduler thread.
+    A job returning a dict with ``stages`` durations has those recorded
+    too, which is how the ingest pipeline reports fetch and merge times.
+    """
+
+    def __init__(
+        self,
+        metrics: MetricsCollector = metrics_collector,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.metrics = metrics
+        self._clock = clock
+
+    def run(self, name: str, func: Callable[..., Any], *args: Any, deadline: Optional[float] = None) -> Any:
+        """Call ``func(*args)`` as job ``name``; returns its result or None on failure."""
+        started = self._clock()
+        watchdog = None
+        if deadline:
+            watchdog = Timer(deadline, self._overrun, args=[name, deadline])
+            watchdog.daemon = True
+            watchdog.start()
+        result, ok = None, False
+        try:
+            result = func(*args)
+            ok = True
+        except Exception as e:
+            logger.error(f"Job {name} failed: {str(e)}")
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+            duration = self._clock() - started
+            stages = result.get('stages') if isinstance(result, dict) else None
+            self.metrics.record_job(name, duration, ok, stages)
+        if deadline and duration > deadline:
+            logger.warning(f"Job {name} took {duration:.1f}s, over its {deadline:.0f}s deadline")
+        return result
+
+    def _overrun(self, name: str, deadline: float) -> None:
+        self.metrics.record_job_overrun(name)
+        logger.warning(f"Job {name} still running after {deadline:.0f}s; later runs are skipped until it ends")
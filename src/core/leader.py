@@ -0,0 +1,62 @@
+"""Elect a single process among workers with an exclusive file lock."""
+import logging
+import os
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows development servers run a single process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class FileLock:
+    """Non-blocking exclusive lock on ``path``, held until released.
+
+    Uses POSIX record locks: the kernel drops them when the holder exits
+    and they are not inherited by forked children, so a crashed leader
+    (or one whose process pool outlives it) frees the lock for the next
+    process that asks.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[IO[str]] = None
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self) -> bool:
+        """Take the lock if no other process holds it."""
+        if self._file is not None:
+            return True
+        if fcntl is None:
+            logger.warning("File locks unavailable, assuming a single process")
+            self._file = open(os.devnull, 'w')
+            return True
+
+        handle = open(self.path, 'a+')
+        try:
+            fcntl.lockf(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        # Record the holder for operators; the lock itself is what counts
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        return True
+
+    def release(self) -> None:
+        if self._file is None:
+            return
+        if fcntl is not None:
+            try:
+                fcntl.lockf(self._file, fcntl.LOCK_UN)
+            except OSError:
+                pass
+        self._file.close()
+        self._file = None
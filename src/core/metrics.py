@@ -1,7 +1,7 @@
 """Basic application metrics collection."""
 from datetime import datetime, timedelta
 import threading
-from typing import Dict
+from typing import Dict, Optional
 from collections import defaultdict
 
 class MetricsCollector:
@@ -11,6 +11,7 @@ class MetricsCollector:
         self.lock = threading.Lock()
         self.request_counts = defaultdict(int)
         self.errors = defaultdict(int)
+        self.jobs: Dict[str, Dict] = {}
         self.last_reset = datetime.utcnow()
     
     def record_request(self, method: str, endpoint: str, status: int) -> None:
@@ -27,6 +28,44 @@ class MetricsCollector:
                 self.errors.clear()
                 self.last_reset = now
     
+    def _job(self, name: str) -> Dict:
+        return self.jobs.setdefault(name, {
+            "runs": 0, "failures": 0, "overruns": 0,
+            "total_duration": 0.0, "max_duration": 0.0,
+            "last_duration": None, "last_success": None, "stages": {}
+        })
+
+    def record_job(
+        self, name: str, duration: float, ok: bool, stages: Optional[Dict[str, float]] = None
+    ) -> None:
+        """Record one scheduled job run; job stats are kept across resets."""
+        with self.lock:
+            job = self._job(name)
+            job["runs"] += 1
+            job["total_duration"] += duration
+            job["max_duration"] = max(job["max_duration"], duration)
+            job["last_duration"] = duration
+            if ok:
+                job["last_success"] = datetime.utcnow()
+            else:
+                job["failures"] += 1
+            for stage, seconds in (stages or {}).items():
+                job["stages"][stage] = seconds
+
+    def record_job_overrun(self, name: str) -> None:
+        """Count a job run that outlived its deadline."""
+        with self.lock:
+            self._job(name)["overruns"] += 1
+
+    def get_job_stats(self) -> Dict:
+        """Get per-job run counts and durations."""
+        with self.lock:
+            return {
+                name: dict(job, stages=dict(job["stages"]),
+                           mean_duration=job["total_duration"] / job["runs"] if job["runs"] else None)
+                for name, job in self.jobs.items()
+            }
+
     def get_stats(self) -> Dict:
         """Get current metrics."""
         with self.lock:
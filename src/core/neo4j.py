@@ -1,4 +1,6 @@
-from typing import Optional, Dict, Any, List
+import logging
+import hashlib
+from typing import Optional, Dict, Any, List, Sequence
 from datetime import datetime, timedelta
 from flask import current_app
 from neo4j import GraphDatabase, BasicAuth, Transaction, Session
@@ -7,10 +9,81 @@ from types import TracebackType
 from uuid import uuid4
 from src.config.settings import Settings
 from src.database.protocols import DatabaseSession, DatabaseTransaction
+from src.database.warmup import warmup_registry
 from src.services.exceptions import DatabaseError
 
 logger = logging.getLogger(__name__)
 
+OPTIMAL_COMBINATIONS_QUERY = """
+MATCH (i:Item)
+WHERE NOT i.id IN $blacklisted
+WITH i, coalesce($overrides[i.id], i.basePrice) as effectivePrice
+WITH collect({
+    item: i,
+    price: effectivePrice
+}) as items
+CALL {
+    WITH items
+    UNWIND range(1, $max_items) as len
+    WITH items, len
+    CALL apoc.coll.combinations(items, len) YIELD value
+    WITH value, 
+         reduce(total = 0, x IN value | total + x.price) as totalPrice
+    WHERE totalPrice >= $min_total
+    RETURN value, totalPrice
+    ORDER BY totalPrice ASC
+    LIMIT 10
+}
+RETURN [x IN value | x.item {.*, effectivePrice: x.price}] as items,
+       totalPrice
+"""
+
+COMBINATION_HISTORY_QUERY = """
+MATCH (c:Combination)
+WITH c
+ORDER BY c.created DESC
+SKIP $skip
+LIMIT $limit
+WITH c, CASE WHEN c.itemIds IS NULL
+             THEN [(c)-[:INCLUDES]->(legacy:Item) | legacy.id]
+             ELSE c.itemIds END as item_ids
+CALL {
+    WITH item_ids
+    MATCH (i:Item)
+    WHERE i.id IN item_ids
+    RETURN collect({
+        id: i.id,
+        name: i.name,
+        basePrice: i.basePrice,
+        priceOverride: i.priceOverride
+    }) as items
+}
+RETURN {
+    id: c.id,
+    created: c.created,
+    totalPrice: c.totalPrice,
+    items: items
+} as combination
+"""
+
+COMBINATION_COUNT_QUERY = """
+MATCH (c:Combination)
+RETURN count(c) as total
+"""
+
+ADJUSTMENT_VERSION_QUERY = """
+OPTIONAL MATCH (s:PriceSnapshot {key: 'adjustments'})
+RETURN coalesce(s.version, 0) as version
+"""
+
+# Appended to every adjustment write so other workers see it and reload
+ADJUSTMENT_VERSION_BUMP = """
+WITH count(*) as changed
+MERGE (s:PriceSnapshot {key: 'adjustments'})
+SET s.version = coalesce(s.version, 0) + 1
+RETURN s.version as version
+"""
+
 class Neo4jTransaction(DatabaseTransaction):
     def __init__(self, transaction: Transaction) -> None:
         self._transaction = transaction
@@ -130,99 +203,127 @@ class Neo4jClient:
     def close(self):
         self.driver.close()
 
-    def find_optimal_combinations(self, min_total: float = 400000, max_items: int = 5) -> List[Dict[str, Any]]:
-        """Find optimal item combinations based on criteria."""
+    def find_optimal_combinations(
+        self,
+        min_total: float = 400000,
+        max_items: int = 5,
+        overrides: Optional[Dict[str, float]] = None,
+        blacklisted: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Find optimal item combinations based on criteria.
+
+        Live ``overrides`` and ``blacklisted`` ids come from the in-memory
+        adjustment layer, so expiry is not re-evaluated per item here.
+        """
         with self.driver.session() as session:
-            query = """
-            MATCH (i:Item)
-            WHERE (i.blacklisted IS NULL OR i.blacklisted = false OR 
-                   i.blacklistExpires < datetime())
-            WITH i, 
-                 CASE 
-                    WHEN i.priceOverride IS NOT NULL 
-                         AND (i.priceOverrideExpires IS NULL OR i.priceOverrideExpires > datetime())
-                    THEN i.priceOverride 
-                    ELSE i.basePrice 
-                 END as effectivePrice
-            WITH collect({
-                item: i,
-                price: effectivePrice
-            }) as items
-            CALL {
-                WITH items
-                UNWIND range(1, $max_items) as len
-                WITH items, len
-                CALL apoc.coll.combinations(items, len) YIELD value
-                WITH value, 
-                     reduce(total = 0, x IN value | total + x.price) as totalPrice
-                WHERE totalPrice >= $min_total
-                RETURN value, totalPrice
-                ORDER BY totalPrice ASC
-                LIMIT 10
-            }
-            RETURN [x IN value | x.item {.*, effectivePrice: x.price}] as items,
-                   totalPrice
-            """
-            
             result = session.run(
-                query,
+                OPTIMAL_COMBINATIONS_QUERY,
                 min_total=min_total,
-                max_items=max_items
+                max_items=max_items,
+                overrides=overrides or {},
+                blacklisted=blacklisted or []
             )
             return [record.data() for record in result]
 
-    def save_combination(self, items: List[str], total_price: float) -> str:
-        """Save a combination with UUID for future reference."""
-        combination_id = str(uuid4())
+    def get_price_adjustments(self) -> List[Dict[str, Any]]:
+        """Every item with a price override, blacklist or lock, and their expiries."""
         with self.driver.session() as session:
             query = """
-            CREATE (c:Combination {
-                id: $id,
-                created: datetime(),
-                totalPrice: $total_price
-            })
-            WITH c
-            UNWIND $items as item_id
-            MATCH (i:Item {id: item_id})
-            CREATE (c)-[:INCLUDES]->(i)
-            RETURN c.id
+            MATCH (i:Item)
+            WHERE i.priceOverride IS NOT NULL
+               OR coalesce(i.blacklisted, false)
+               OR coalesce(i.locked, false)
+            RETURN i.id as item_id,
+                   i.priceOverride as price_override,
+                   i.priceOverrideExpires as override_expires,
+                   coalesce(i.blacklisted, false) as blacklisted,
+                   i.blacklistExpires as blacklist_expires,
+                   coalesce(i.locked, false) as locked,
+                   i.lockExpires as lock_expires
             """
-            session.run(query, id=combination_id, items=items, total_price=total_price)
-            return combination_id
+            return [record.data() for record in session.run(query)]
+
+    @staticmethod
+    def combination_hash(items: Sequence[str]) -> str:
+        """Content hash of a combination; item order does not matter."""
+        return hashlib.sha256('\x1f'.join(sorted(items)).encode('utf-8')).hexdigest()
+
+    def save_combination(self, items: List[str], total_price: float) -> str:
+        """Save a combination with UUID for future reference."""
+        return self.save_combinations(
+            [{'items': items, 'total_price': total_price}],
+            compact=False
+        )[0]
+
+    def save_combinations(self, combinations: Sequence[Dict[str, Any]], compact: bool = True) -> List[str]:
+        """Save ``items``/``total_price`` combinations in one transaction.
+
+        Item ids are stored as a sorted array next to a content hash, and
+        identical combinations share one node, so the returned id of a
+        combination saved before is the existing one. Saving it again moves
+        ``created`` to now and updates its total, so it returns to the top
+        of history and restarts its retention period. ``compact=False``
+        also links the items with INCLUDES relationships.
+        """
+        rows = [
+            {
+                'id': str(uuid4()),
+                'hash': self.combination_hash(combination['items']),
+                'item_ids': sorted(combination['items']),
+                'total_price': combination['total_price']
+            }
+            for combination in combinations
+        ]
+        if not rows:
+            return []
+
+        with self.driver.session() as session:
+            tx = session.begin_transaction()
+            try:
+                result = tx.run(
+                    """
+                    UNWIND $rows AS row
+                    MERGE (c:Combination {hash: row.hash})
+                    ON CREATE SET c.id = row.id,
+                                  c.created = datetime(),
+                                  c.totalPrice = row.total_price,
+                                  c.itemIds = row.item_ids
+                    ON MATCH SET c.created = datetime(),
+                                 c.totalPrice = row.total_price
+                    RETURN row.hash as hash, c.id as id
+                    """,
+                    rows=rows
+                )
+                saved = {record['hash']: record['id'] for record in result}
+                ids = [saved[row['hash']] for row in rows]
+                if not compact:
+                    tx.run(
+                        """
+                        UNWIND $rows AS row
+                        MATCH (c:Combination {hash: row.hash})
+                        UNWIND row.item_ids AS item_id
+                        MATCH (i:Item {id: item_id})
+                        MERGE (c)-[:INCLUDES]->(i)
+                        """,
+                        rows=rows
+                    )
+                tx.commit()
+            except Exception:
+                tx.rollback()
+                raise
+            return ids
 
     def get_combination_history(self, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
-        """Get paginated combination history with items."""
+        """Get paginated combination history with items.
+
+        Items come from the stored ``itemIds`` array; combinations saved
+        before it existed fall back to their INCLUDES relationships.
+        """
         with self.driver.session() as session:
-            query = """
-            MATCH (c:Combination)
-            WITH c
-            ORDER BY c.created DESC
-            SKIP $skip
-            LIMIT $limit
-            MATCH (c)-[:INCLUDES]->(i:Item)
-            WITH c, collect({
-                id: i.id,
-                name: i.name,
-                basePrice: i.basePrice,
-                priceOverride: i.priceOverride
-            }) as items
-            RETURN {
-                id: c.id,
-                created: c.created,
-                totalPrice: c.totalPrice,
-                items: items
-            } as combination
-            """
-            
-            count_query = """
-            MATCH (c:Combination)
-            RETURN count(c) as total
-            """
-            
-            results = session.run(query, skip=(page-1)*per_page, limit=per_page)
+            results = session.run(COMBINATION_HISTORY_QUERY, skip=(page-1)*per_page, limit=per_page)
             combinations = [record['combination'] for record in results]
             
-            count_result = session.run(count_query)
+            count_result = session.run(COMBINATION_COUNT_QUERY)
             total = count_result.single()['total']
             
             return {
@@ -244,41 +345,51 @@ class Neo4jClient:
             """
             session.run(query, id=combination_id)
 
-    def set_price_override(self, item_id: str, price: float, duration: Optional[int] = None) -> None:
-        """Set a price override for an item."""
+    def get_adjustment_version(self) -> int:
+        """Version stamp the adjustment setters bump; read it before the adjustments."""
+        with self.driver.session() as session:
+            return session.run(ADJUSTMENT_VERSION_QUERY).single()['version']
+
+    def set_price_override(self, item_id: str, price: float, duration: Optional[int] = None) -> int:
+        """Set a price override for an item; returns the new adjustment version."""
         expires = None if duration is None else datetime.now(datetime.timezone.utc) + timedelta(minutes=duration)
         
         with self.driver.session() as session:
             query = """
-            MATCH (i:Item {id: $item_id})
-            SET i.priceOverride = $price,
-                i.priceOverrideExpires = $expires
-            """
-            session.run(query, item_id=item_id, price=price, expires=expires)
-
-    def set_blacklist(self, item_id: str, blacklisted: bool, duration: Optional[int] = None) -> None:
-        """Blacklist or unblacklist an item."""
+            OPTIONAL MATCH (i:Item {id: $item_id})
+            FOREACH (_ IN CASE WHEN i IS NULL THEN [] ELSE [1] END |
+                SET i.priceOverride = $price,
+                    i.priceOverrideExpires = $expires)
+            """ + ADJUSTMENT_VERSION_BUMP
+            return session.run(query, item_id=item_id, price=price, expires=expires).single()['version']
+
+    def set_blacklist(self, item_id: str, blacklisted: bool, duration: Optional[int] = None) -> int:
+        """Blacklist or unblacklist an item; returns the new adjustment version."""
         expires = None if duration is None else datetime.utcnow() + timedelta(minutes=duration)
         
         with self.driver.session() as session:
             query = """
-            MATCH (i:Item {id: $item_id})
-            SET i.blacklisted = $blacklisted,
-                i.blacklistExpires = $expires
-            """
-            session.run(query, item_id=item_id, blacklisted=blacklisted, expires=expires)
-
-    def set_lock(self, item_id: str, locked: bool, duration: Optional[int] = None) -> None:
-        """Lock or unlock an item."""
+            OPTIONAL MATCH (i:Item {id: $item_id})
+            FOREACH (_ IN CASE WHEN i IS NULL THEN [] ELSE [1] END |
+                SET i.blacklisted = $blacklisted,
+                    i.blacklistExpires = $expires)
+            """ + ADJUSTMENT_VERSION_BUMP
+            return session.run(
+                query, item_id=item_id, blacklisted=blacklisted, expires=expires
+            ).single()['version']
+
+    def set_lock(self, item_id: str, locked: bool, duration: Optional[int] = None) -> int:
+        """Lock or unlock an item; returns the new adjustment version."""
         expires = None if duration is None else datetime.utcnow() + timedelta(minutes=duration)
         
         with self.driver.session() as session:
             query = """
-            MATCH (i:Item {id: $item_id})
-            SET i.locked = $locked,
-                i.lockExpires = $expires
-            """
-            session.run(query, item_id=item_id, locked=locked, expires=expires)
+            OPTIONAL MATCH (i:Item {id: $item_id})
+            FOREACH (_ IN CASE WHEN i IS NULL THEN [] ELSE [1] END |
+                SET i.locked = $locked,
+                    i.lockExpires = $expires)
+            """ + ADJUSTMENT_VERSION_BUMP
+            return session.run(query, item_id=item_id, locked=locked, expires=expires).single()['version']
 
     def upsert_item(self, item_data: Dict[str, Any]) -> None:
         """Create or update an item in the database."""
@@ -300,3 +411,12 @@ class Neo4jClient:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
+
+# Statements behind the combination history and optimiser pages
+warmup_registry.register('combinations.history', COMBINATION_HISTORY_QUERY, {'skip': 0, 'limit': 20})
+warmup_registry.register('combinations.count', COMBINATION_COUNT_QUERY)
+warmup_registry.register(
+    'combinations.optimal', OPTIMAL_COMBINATIONS_QUERY,
+    {'min_total': 400000.0, 'max_items': 5, 'overrides': {}, 'blacklisted': []},
+    execute=False
+)
@@ -0,0 +1,59 @@
+"""Lazily built service instances, one per Flask application."""
+from importlib import import_module
+from threading import Lock
+from typing import Any, Callable, Dict, Union
+
+from flask import current_app, has_app_context
+
+class ServiceProvider:
+    """Stand-in for a module-level service that builds it on first use.
+
+    ``factory`` is a callable or a ``'package.module:Name'`` path; a path
+    defers importing the module, and everything it pulls in, until the
+    service is first needed. Inside an application context each app gets
+    its own instance in ``app.extensions['services']``; outside one a
+    single process-wide instance is used. Attribute access is forwarded,
+    so ``item_service.get_item(...)`` keeps working on the provider.
+    """
+
+    def __init__(self, factory: Union[str, Callable[[], Any]], name: str = None):
+        self._factory = factory
+        self._name = name or (factory if isinstance(factory, str) else factory.__qualname__)
+        self._instance = None
+        self._lock = Lock()
+
+    def _build(self) -> Any:
+        factory = self._factory
+        if isinstance(factory, str):
+            module, _, attribute = factory.partition(':')
+            factory = getattr(import_module(module), attribute)
+        return factory()
+
+    def get(self) -> Any:
+        """The service for the current app, built on first call."""
+        if has_app_context():
+            services: Dict[str, Any] = current_app.extensions.setdefault('services', {})
+            if self._name not in services:
+                with self._lock:
+                    if self._name not in services:
+                        services[self._name] = self._build()
+            return services[self._name]
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._build()
+        return self._instance
+
+    def reset(self) -> None:
+        """Drop the instance so the next use builds a fresh one."""
+        self._instance = None
+        if has_app_context():
+            current_app.extensions.get('services', {}).pop(self._name, None)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('__') or name in ('_factory', '_name', '_instance', '_lock'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        return f"<ServiceProvider {self._name}>"
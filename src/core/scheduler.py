@@ -4,82 +4,120 @@ import logging
 from typing import Any, Callable, Dict, List, Optional
 import uuid
 import asyncio
+import os
+import tempfile
+from threading import Timer
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 
+from src.config.queries import QUERY_PROFILES
 from src.core.config import Settings
 from src.core.cache import cache
 from src.core.exceptions import AppException
-from src.core.database import DatabaseManager
+from src.core.jobs import JobRunner
+from src.core.leader import FileLock
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_LOCK_FILE = os.path.join(tempfile.gettempdir(), 'tarkov-scheduler.lock')
+# Deadline for jobs without an interval to measure against, in seconds
+DEFAULT_JOB_TIMEOUT = 30 * 60
+
 class SchedulerManager:
-    """Manager for scheduled tasks."""
+    """Manager for scheduled tasks.
+
+    Every worker builds one, but jobs only run in the process holding the
+    scheduler lock file; the others stand by and retry the election, so
+    N gunicorn workers still run each refresh once. A job never overlaps
+    itself: a run still going when the next is due makes the scheduler
+    skip that one, and runs missed while busy collapse into one.
+    """
     
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.scheduler = BackgroundScheduler()
+        self.scheduler = BackgroundScheduler(job_defaults={
+            'max_instances': 1,
+            'coalesce': True,
+            'misfire_grace_time': settings.get('SCHEDULER_MISFIRE_GRACE_TIME', 300)
+        })
+        self.runner = JobRunner()
+        self._jitter = settings.get('SCHEDULER_JITTER', 30)
+        self._job_timeout = settings.get('SCHEDULER_JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT)
+        self._lock = FileLock(settings.get('SCHEDULER_LOCK_FILE') or DEFAULT_LOCK_FILE)
+        self._election_interval = settings.get('SCHEDULER_ELECTION_INTERVAL', 60)
+        self._standby: Optional[Timer] = None
+        self._stopped = False
         self._setup_jobs()
 
     def _setup_jobs(self) -> None:
         """Setup scheduled jobs."""
         # Database maintenance - daily at 3 AM
         self.scheduler.add_job(
-            self._database_maintenance,
-            CronTrigger(hour=3),
+            self._run,
+            CronTrigger(hour=3, jitter=self._jitter),
+            args=['database_maintenance', self._database_maintenance, self._job_timeout],
             id='database_maintenance',
             replace_existing=True
         )
         
-        # Market data update - every 5 minutes
-        self.scheduler.add_job(
-            self._update_market_data,
-            IntervalTrigger(minutes=5),
-            id='market_data_update',
-            replace_existing=True
-        )
+        # Upstream refresh - one job per query profile at its own cadence
+        for profile in QUERY_PROFILES.values():
+            refresh = dict(profile.refresh)
+            trigger = refresh.pop('trigger')
+            job_options = {}
+            if profile.name == 'full-static':
+                # Static data seeds the items the price refresh updates
+                job_options['next_run_time'] = datetime.now()
+            if trigger == 'interval':
+                trigger = IntervalTrigger(jitter=self._jitter, **refresh)
+                # A refresh still running when the next is due has overrun
+                deadline = trigger.interval.total_seconds()
+            else:
+                trigger = CronTrigger(jitter=self._jitter, **refresh)
+                deadline = self._job_timeout
+            self.scheduler.add_job(
+                self._run,
+                trigger,
+                args=[f'sync_{profile.name}', self._sync_profile, deadline, profile.name],
+                id=f'sync_{profile.name}',
+                replace_existing=True,
+                **job_options
+            )
         
         # Cache cleanup - every hour
         self.scheduler.add_job(
-            self._cleanup_cache,
-            IntervalTrigger(hours=1),
+            self._run,
+            IntervalTrigger(hours=1, jitter=self._jitter),
+            args=['cache_cleanup', self._cleanup_cache, 3600],
             id='cache_cleanup',
             replace_existing=True
         )
 
-    def _database_maintenance(self) -> None:
-        """Run database maintenance tasks."""
-        try:
-            with DatabaseManager.get_session() as session:
-                # Run Neo4j maintenance queries
-                session.run("CALL db.stats()")
-                session.run("CALL db.indexes()")
-                session.run("CALL db.constraints()")
-                session.run("CALL db.clearQueryCaches()")
-            logger.info("Database maintenance completed")
-        except Exception as e:
-            logger.error(f"Database maintenance failed: {str(e)}")
+    def _run(self, name: str, func: Callable, deadline: float, *args: Any) -> Any:
+        """Run a job through the watchdog and metrics pipeline."""
+        return self.runner.run(name, func, *args, deadline=deadline)
 
-    def _update_market_data(self) -> None:
-        """Update market data from external sources."""
-        try:
-            from src.services.market_service import MarketService
-            service = MarketService()
-            service.update_market_data()
-            logger.info("Market data updated successfully")
-        except Exception as e:
-            logger.error(f"Market data update failed: {str(e)}")
+    def _database_maintenance(self) -> Dict[str, Any]:
+        """Check indexes, resample statistics, prune history and warm plans."""
+        from src.database.maintenance import DatabaseMaintenance
+        return DatabaseMaintenance(
+            price_history_days=self.settings.get('PRICE_HISTORY_RETENTION_DAYS', 90),
+            combination_days=self.settings.get('COMBINATION_RETENTION_DAYS', 180),
+            batch_size=self.settings.get('MAINTENANCE_BATCH_SIZE', 10000),
+            warmup_queries=self.settings.get('PLAN_WARMUP_QUERIES', 50)
+        ).run()
+
+    def _sync_profile(self, profile_name: str) -> Dict[str, Any]:
+        """Refresh upstream data for one query profile."""
+        from src.services.market_sync import MarketSyncService
+        return MarketSyncService().sync_blocking(profile_name)
 
     def _cleanup_cache(self) -> None:
         """Clean up expired cache entries."""
-        try:
-            cache._cleanup()
-            logger.info("Cache cleanup completed")
-        except Exception as e:
-            logger.error(f"Cache cleanup failed: {str(e)}")
+        cache._cleanup()
+        logger.info("Cache cleanup completed")
 
     def add_job(
         self,
@@ -92,21 +130,20 @@ class SchedulerManager:
         
         try:
             if trigger == 'interval':
-                self.scheduler.add_job(
-                    func,
-                    IntervalTrigger(**trigger_args),
-                    id=job_id,
-                    replace_existing=True
-                )
+                job_trigger = IntervalTrigger(**trigger_args)
+                deadline = job_trigger.interval.total_seconds()
             elif trigger == 'cron':
-                self.scheduler.add_job(
-                    func,
-                    CronTrigger(**trigger_args),
-                    id=job_id,
-                    replace_existing=True
-                )
+                job_trigger = CronTrigger(**trigger_args)
+                deadline = self._job_timeout
             else:
                 raise ValueError(f"Unsupported trigger type: {trigger}")
+            self.scheduler.add_job(
+                self._run,
+                job_trigger,
+                args=[job_id, func, deadline],
+                id=job_id,
+                replace_existing=True
+            )
                 
             logger.info(f"Added new scheduled job: {job_id}")
             return job_id
@@ -127,23 +164,53 @@ class SchedulerManager:
     def get_jobs(self) -> List[Dict[str, Any]]:
         """Get list of all scheduled jobs."""
         jobs = []
+        stats = self.runner.metrics.get_job_stats()
         for job in self.scheduler.get_jobs():
             jobs.append({
                 'id': job.id,
                 'name': job.name,
                 'next_run': job.next_run_time,
-                'trigger': str(job.trigger)
+                'trigger': str(job.trigger),
+                'stats': stats.get(job.id)
             })
         return jobs
 
+    @property
+    def is_leader(self) -> bool:
+        return self._lock.held
+
     def start(self) -> None:
-        """Start the scheduler."""
-        if not self.scheduler.running:
+        """Start the scheduler if this process wins the election.
+
+        Call after forking: the lock and the scheduler thread belong to
+        the process that takes them.
+        """
+        if not self.settings.get('SCHEDULER_ENABLED', True):
+            logger.info("Scheduler disabled")
+            return
+        self._stopped = False
+        self._elect()
+
+    def _elect(self) -> None:
+        self._standby = None
+        if self._stopped or self.scheduler.running:
+            return
+        if self._lock.acquire():
             self.scheduler.start()
-            logger.info("Scheduler started")
+            logger.info(f"Scheduler started in process {os.getpid()}")
+            return
+        logger.debug(f"Scheduler runs in another process; retrying in {self._election_interval}s")
+        self._standby = Timer(self._election_interval, self._elect)
+        self._standby.daemon = True
+        self._standby.start()
 
     def stop(self) -> None:
-        """Stop the scheduler."""
+        """Stop the scheduler and give up the lock."""
+        self._stopped = True
+        if self._standby is not None:
+            self._standby.cancel()
+            self._standby = None
         if self.scheduler.running:
             self.scheduler.shutdown()
-            logger.info("Scheduler stopped")
\ No newline at end of file
+            logger.info("Scheduler stopped")
+        self._lock.release()
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Version stamp for the ingested price snapshot."""
+import logging
+from threading import Lock
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+class SnapshotVersion:
+    """Monotonic version of the price data currently in the graph.
+
+    The ingest path persists a counter on a ``PriceSnapshot`` node and
+    advances this stamp with the stored value, so every process that
+    observes a newer version notifies its listeners exactly once.
+    """
+
+    def __init__(self):
+        self._version = 0
+        self._lock = Lock()
+        self._listeners: List[Callable[[int], None]] = []
+
+    @property
+    def value(self) -> int:
+        """Latest version observed by this process."""
+        return self._version
+
+    def advance(self, version: int) -> bool:
+        """Adopt ``version`` if it is newer and notify listeners."""
+        with self._lock:
+            if version <= self._version:
+                return False
+            self._version = version
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(version)
+            except Exception as e:
+                logger.error(f"Snapshot listener failed: {str(e)}")
+        return True
+
+    def subscribe(self, listener: Callable[[int], None]) -> None:
+        """Call ``listener(version)`` whenever the snapshot advances."""
+        with self._lock:
+            self._listeners.append(listener)
+
+# Global price snapshot version
+price_snapshot = SnapshotVersion()
@@ -1,9 +1,9 @@
-"""Background task management using thread pool."""
+"""Background task management using thread pool and process jobs."""
 import logging
 from typing import Any, Callable, Dict, Optional
 import uuid
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from threading import Lock
 from functools import wraps
@@ -20,6 +20,7 @@ class TaskResult:
     error: Optional[str] = None
     started_at: datetime = None
     completed_at: Optional[datetime] = None
+    progress: Optional[float] = None
 
 class TaskManager:
     """Manager for background tasks using thread pool."""
@@ -27,6 +28,7 @@ class TaskManager:
     def __init__(self, max_workers: int = 3):
         self._executor = ThreadPoolExecutor(max_workers=max_workers)
         self._results: Dict[str, TaskResult] = {}
+        self._jobs: Dict[str, Any] = {}
         self._lock = Lock()
         
     def create_task(
@@ -73,10 +75,60 @@ class TaskManager:
         self._executor.submit(wrapped_func)
         return task_id
         
+    def submit_job(self, name: str, job: Any) -> str:
+        """Track a job already running elsewhere, such as a process pool.
+
+        ``job`` exposes ``future``, ``progress()``, ``cancel()`` and
+        ``result()``; its status is polled through ``get_task_info``.
+        """
+        task_id = str(uuid.uuid4())
+        with self._lock:
+            self._jobs[task_id] = job
+            self._results[task_id] = TaskResult(
+                task_id=task_id,
+                status="running",
+                started_at=datetime.utcnow(),
+                progress=0.0
+            )
+        job.future.add_done_callback(lambda future: self._finish_job(task_id, job, future))
+        logger.info(f"Task {task_id} ({name}) submitted")
+        return task_id
+
+    def _finish_job(self, task_id: str, job: Any, future: Future) -> None:
+        try:
+            result = job.result()
+            status, error = ("cancelled", None) if result is None else ("completed", None)
+        except Exception as e:
+            logger.error(f"Task {task_id} failed: {str(e)}")
+            result, status, error = None, "cancelled" if future.cancelled() else "failed", str(e)
+
+        with self._lock:
+            self._jobs.pop(task_id, None)
+            previous = self._results.get(task_id)
+            self._results[task_id] = TaskResult(
+                task_id=task_id,
+                status=status,
+                result=result,
+                error=error,
+                started_at=previous.started_at if previous else None,
+                completed_at=datetime.utcnow(),
+                progress=job.progress()
+            )
+
+    def cancel_task(self, task_id: str) -> bool:
+        """Cancel a running job; returns False if it cannot be cancelled."""
+        with self._lock:
+            job = self._jobs.get(task_id)
+        return job.cancel() if job else False
+
     def get_task_info(self, task_id: str) -> Optional[TaskResult]:
         """Get current task information."""
         with self._lock:
-            return self._results.get(task_id)
+            result = self._results.get(task_id)
+            job = self._jobs.get(task_id)
+        if result and job and result.status == "running":
+            result.progress = job.progress()
+        return result
             
     def cleanup_old_tasks(self, max_age_hours: int = 24) -> None:
         """Remove old task results."""
@@ -1,13 +1,19 @@
 """WebSocket support using Flask-Sockets."""
 import json
 import logging
-from typing import Dict, List, Optional, Set
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from flask import current_app
+
+import gevent
+from gevent.event import Event
 from geventwebsocket import WebSocketError
 from geventwebsocket.websocket import WebSocket
 
+from src.core.ws_protocol import PROTOCOL_DELTA, DeltaEncoder, feed_history
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -16,61 +22,251 @@ class MarketUpdate:
     item_id: str
     price: float
     timestamp: datetime
-    
-    def to_json(self) -> str:
-        """Convert to JSON string."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serialisable dict."""
         data = asdict(self)
         data['timestamp'] = data['timestamp'].isoformat()
-        return json.dumps(data)
+        return data
+
+    def to_json(self) -> str:
+        """Convert to JSON string."""
+        return json.dumps(self.to_dict())
+
+class ClientChannel:
+    """Bounded outbound queue and writer greenlet for one client.
+
+    Slow consumers never block publishers: with the ``coalesce`` policy
+    only the latest pending update per item is kept, with ``drop`` the
+    oldest pending updates are discarded once the queue is full. Whatever
+    is pending when the writer wakes up is sent as a single batch frame.
+    """
+
+    POLICIES = ('coalesce', 'drop')
+
+    def __init__(self, client_id: str, websocket: WebSocket, max_pending: int = 1000, policy: str = 'coalesce'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.client_id = client_id
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self.policy = policy
+        self.dropped = 0
+        self._pending_by_item: 'OrderedDict[str, MarketUpdate]' = OrderedDict()
+        self._pending: Deque[MarketUpdate] = deque()
+        self._wakeup = Event()
+        self._closed = False
+        self._writer: Optional[gevent.Greenlet] = None
+        self.on_error: Optional[Callable[[str], None]] = None
+        self.encoder: Optional[DeltaEncoder] = None
+        self.seq = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_by_item) if self.policy == 'coalesce' else len(self._pending)
+
+    def start(self) -> None:
+        """Spawn the writer greenlet."""
+        self._writer = gevent.spawn(self._run)
+
+    def close(self) -> None:
+        """Stop the writer and discard pending updates."""
+        self._closed = True
+        self._wakeup.set()
+        if self._writer is not None and self._writer is not gevent.getcurrent():
+            self._writer.kill(block=False)
+
+    def enqueue(self, updates: Iterable[MarketUpdate], seq: Optional[int] = None) -> None:
+        """Queue updates without blocking, applying the slow consumer policy."""
+        if self._closed:
+            return
+        if seq is not None:
+            self.seq = max(self.seq, seq)
+        if self.policy == 'coalesce':
+            pending = self._pending_by_item
+            for update in updates:
+                pending.pop(update.item_id, None)
+                pending[update.item_id] = update
+                if len(pending) > self.max_pending:
+                    pending.popitem(last=False)
+                    self.dropped += 1
+        else:
+            pending = self._pending
+            for update in updates:
+                if len(pending) >= self.max_pending:
+                    pending.popleft()
+                    self.dropped += 1
+                pending.append(update)
+        self._wakeup.set()
+
+    def drain(self) -> List[MarketUpdate]:
+        """Take everything currently pending."""
+        if self.policy == 'coalesce':
+            batch = list(self._pending_by_item.values())
+            self._pending_by_item.clear()
+        else:
+            batch = list(self._pending)
+            self._pending.clear()
+        return batch
+
+    def _run(self) -> None:
+        """Writer loop: one frame per wakeup, however many updates are pending."""
+        while not self._closed:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            batch = self.drain()
+            if not batch or self._closed:
+                continue
+            try:
+                if self.websocket.closed:
+                    raise WebSocketError("Socket is closed")
+                if self.encoder is not None:
+                    frame = self.encoder.encode(batch, self.seq)
+                    if frame is not None:
+                        self.websocket.send(frame, binary=True)
+                else:
+                    self.websocket.send(json.dumps({
+                        'type': 'batch',
+                        'seq': self.seq,
+                        'updates': [update.to_dict() for update in batch]
+                    }))
+            except WebSocketError as e:
+                logger.error(f"Failed to send to client {self.client_id}: {str(e)}")
+                self._closed = True
+                if self.on_error:
+                    self.on_error(self.client_id)
 
 class ConnectionManager:
     """WebSocket connection manager."""
-    def __init__(self):
+    def __init__(self, max_pending: int = 1000, policy: str = 'coalesce'):
         self.active_connections: Dict[str, WebSocket] = {}
         self.subscriptions: Dict[str, Set[str]] = {}
-        
+        self.item_subscribers: Dict[str, Set[str]] = {}
+        self.channels: Dict[str, ClientChannel] = {}
+        self.max_pending = max_pending
+        self.policy = policy
+
     def connect(self, client_id: str, websocket: WebSocket) -> None:
         """Register new connection."""
         self.active_connections[client_id] = websocket
         self.subscriptions[client_id] = set()
+        channel = ClientChannel(client_id, websocket, self.max_pending, self.policy)
+        channel.on_error = self.disconnect
+        channel.start()
+        self.channels[client_id] = channel
         logger.info(f"Client connected: {client_id}")
-        
+
     def disconnect(self, client_id: str) -> None:
         """Remove connection."""
         if client_id in self.active_connections:
             del self.active_connections[client_id]
-        if client_id in self.subscriptions:
-            del self.subscriptions[client_id]
+        for item_id in self.subscriptions.pop(client_id, set()):
+            self._unindex(client_id, item_id)
+        channel = self.channels.pop(client_id, None)
+        if channel:
+            channel.close()
         logger.info(f"Client disconnected: {client_id}")
-        
+
     def subscribe(self, client_id: str, item_id: str) -> None:
         """Subscribe client to item updates."""
         if client_id in self.subscriptions:
             self.subscriptions[client_id].add(item_id)
-            
+            self.item_subscribers.setdefault(item_id, set()).add(client_id)
+
     def unsubscribe(self, client_id: str, item_id: str) -> None:
         """Unsubscribe client from item updates."""
         if client_id in self.subscriptions:
             self.subscriptions[client_id].discard(item_id)
-            
+            self._unindex(client_id, item_id)
+
+    def _unindex(self, client_id: str, item_id: str) -> None:
+        subscribers = self.item_subscribers.get(item_id)
+        if subscribers is not None:
+            subscribers.discard(client_id)
+            if not subscribers:
+                del self.item_subscribers[item_id]
+
+    def publish_batch(self, updates: Iterable[MarketUpdate]) -> None:
+        """Fan a batch of updates out to subscribers without blocking.
+
+        Work is proportional to the matching subscriptions, and each client
+        receives the whole batch through its channel as a single frame.
+        """
+        updates = list(updates)
+        seq = feed_history.record(updates)
+        per_client: Dict[str, List[MarketUpdate]] = {}
+        for update in updates:
+            for client_id in self.item_subscribers.get(update.item_id, ()):
+                per_client.setdefault(client_id, []).append(update)
+
+        for client_id, client_updates in per_client.items():
+            channel = self.channels.get(client_id)
+            if channel:
+                channel.enqueue(client_updates, seq)
+
+    def negotiate(self, client_id: str, hello: Dict[str, Any]) -> None:
+        """Handle a client ``hello``: pick the protocol, subscribe and resync.
+
+        A client reconnecting with the ``epoch`` and last ``seq`` it
+        applied receives the retained updates it missed as a delta;
+        otherwise, including a ``seq`` numbered by another process or one
+        that has aged out, it gets a snapshot of the latest price for each
+        requested item.
+        """
+        channel = self.channels.get(client_id)
+        if channel is None:
+            return
+
+        protocol = hello.get('protocol')
+        if protocol == PROTOCOL_DELTA:
+            channel.encoder = DeltaEncoder()
+        item_ids = set(hello.get('items') or [])
+        for item_id in item_ids:
+            self.subscribe(client_id, item_id)
+
+        channel.websocket.send(json.dumps({
+            'type': 'hello',
+            'protocol': PROTOCOL_DELTA if channel.encoder else 'json',
+            'seq': feed_history.seq,
+            'epoch': feed_history.epoch
+        }))
+
+        last_seq = hello.get('seq')
+        resumable = last_seq is not None and hello.get('epoch') == feed_history.epoch
+        replay = feed_history.since(last_seq, item_ids) if resumable else None
+        if replay is None:
+            replay = feed_history.latest(item_ids)
+            if channel.encoder:
+                channel.encoder.request_snapshot()
+        elif channel.encoder:
+            channel.encoder.resume()
+        if replay:
+            channel.enqueue(replay, feed_history.seq)
+
     async def broadcast_update(self, update: MarketUpdate) -> None:
         """Send update to all subscribed clients."""
-        message = update.to_json()
-        disconnected = []
-        
-        for client_id, subscriptions in self.subscriptions.items():
-            if update.item_id in subscriptions:
-                try:
-                    ws = self.active_connections[client_id]
-                    if not ws.closed:
-                        ws.send(message)
-                except (WebSocketError, KeyError) as e:
-                    logger.error(f"Failed to send to client {client_id}: {str(e)}")
-                    disconnected.append(client_id)
-                    
-        # Clean up disconnected clients
-        for client_id in disconnected:
+        self.publish_batch([update])
+
+    def handle_connection(self, ws: WebSocket) -> None:
+        """Serve a client connection until it closes."""
+        client_id = str(uuid.uuid4())
+        self.connect(client_id, ws)
+        try:
+            while not ws.closed:
+                message = ws.receive()
+                if not message:
+                    continue
+                data = json.loads(message)
+                if data.get('type') == 'hello':
+                    self.negotiate(client_id, data)
+                elif data.get('type') == 'subscribe':
+                    self.subscribe(client_id, data.get('item_id'))
+                elif data.get('type') == 'unsubscribe':
+                    self.unsubscribe(client_id, data.get('item_id'))
+        except (WebSocketError, ValueError) as e:
+            logger.error(f"WebSocket error for client {client_id}: {str(e)}")
+        finally:
             self.disconnect(client_id)
 
 # Global connection manager
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
@@ -0,0 +1,138 @@
+"""Compact delta protocol for the WebSocket market feed.
+
+Clients opt in with a ``hello`` message naming the ``delta`` protocol.
+They then receive binary frames: zlib-deflated compact JSON objects::
+
+    {"k": "d" | "s", "s": seq, "t": epoch, "n": {index: item_id}, "u": [[index, price], ...]}
+
+``k`` is ``s`` for a snapshot (the client replaces its state) and ``d``
+for a delta (the client merges). ``n`` announces dictionary entries the
+client has not seen yet, and ``u`` carries only items whose price changed
+since the last frame sent to that client. The dictionary is per
+connection; a client resuming from its last ``seq`` gets the missed
+updates as a delta and only falls back to a snapshot once they have aged
+out of the history. Sequence numbers are counted per process, so the
+server's ``hello`` names its ``epoch`` and a client resuming with the
+epoch of another process (another worker, or one restarted since) gets
+a snapshot.
+"""
+import json
+import os
+import uuid
+import zlib
+from collections import OrderedDict, deque
+from datetime import datetime
+from threading import Lock
+from typing import Deque, Dict, List, Optional, Tuple
+
+PROTOCOL_JSON = 'json'
+PROTOCOL_DELTA = 'delta'
+
+class FeedHistory:
+    """Sequence-numbered log of recent batches plus the latest price per item."""
+
+    def __init__(self, max_batches: int = 64):
+        self.seq = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self._batches: Deque[Tuple[int, list]] = deque(maxlen=max_batches)
+        self._latest: Dict[str, object] = {}
+        self._lock = Lock()
+        if hasattr(os, 'register_at_fork'):
+            # Workers forked from a preloaded master must not share an epoch
+            os.register_at_fork(after_in_child=self._new_epoch)
+
+    def _new_epoch(self) -> None:
+        self.epoch = uuid.uuid4().hex[:12]
+        self._lock = Lock()
+
+    def record(self, updates: list) -> int:
+        """Assign the next sequence number to a published batch."""
+        with self._lock:
+            self.seq += 1
+            self._batches.append((self.seq, updates))
+            for update in updates:
+                self._latest[update.item_id] = update
+            return self.seq
+
+    def since(self, seq: int, item_ids: set) -> Optional[list]:
+        """Updates after ``seq`` for ``item_ids``, or None if no longer retained."""
+        with self._lock:
+            if seq > self.seq:
+                return None
+            if seq < self.seq and (not self._batches or self._batches[0][0] > seq + 1):
+                return None
+            replay: 'OrderedDict[str, object]' = OrderedDict()
+            for batch_seq, updates in self._batches:
+                if batch_seq <= seq:
+                    continue
+                for update in updates:
+                    if update.item_id in item_ids:
+                        replay.pop(update.item_id, None)
+                        replay[update.item_id] = update
+            return list(replay.values())
+
+    def latest(self, item_ids: set) -> list:
+        """Current price of each requested item that has been published."""
+        with self._lock:
+            return [self._latest[item_id] for item_id in item_ids if item_id in self._latest]
+
+class DeltaEncoder:
+    """Per-client encoder holding that client's dictionary and last-sent state."""
+
+    def __init__(self, compression_level: int = 6):
+        self.compression_level = compression_level
+        self._index: Dict[str, int] = {}
+        self._sent: Dict[int, float] = {}
+        self._snapshot_pending = True
+
+    def request_snapshot(self) -> None:
+        """Make the next frame a full snapshot (used for resync)."""
+        self._snapshot_pending = True
+
+    def resume(self) -> None:
+        """Make the next frame a delta on top of state the client already has."""
+        self._snapshot_pending = False
+
+    def encode(self, updates: list, seq: int) -> Optional[bytes]:
+        """Encode a batch, returning None if nothing changed for this client."""
+        snapshot = self._snapshot_pending
+        if snapshot:
+            self._sent.clear()
+
+        new_entries: Dict[int, str] = {}
+        changes: List[list] = []
+        latest_ts: Optional[datetime] = None
+        for update in updates:
+            index = self._index.get(update.item_id)
+            if index is None:
+                index = self._index[update.item_id] = len(self._index)
+                new_entries[index] = update.item_id
+            if latest_ts is None or update.timestamp > latest_ts:
+                latest_ts = update.timestamp
+            if self._sent.get(index) == update.price:
+                continue
+            self._sent[index] = update.price
+            price = int(update.price) if float(update.price).is_integer() else update.price
+            changes.append([index, price])
+
+        if not changes and not new_entries and not snapshot:
+            return None
+
+        self._snapshot_pending = False
+        frame = {
+            'k': 's' if snapshot else 'd',
+            's': seq,
+            't': int(latest_ts.timestamp()) if latest_ts else None,
+            'u': changes
+        }
+        if new_entries:
+            frame['n'] = new_entries
+        payload = json.dumps(frame, separators=(',', ':'))
+        return zlib.compress(payload.encode('utf-8'), self.compression_level)
+
+def decode_frame(data: bytes) -> dict:
+    """Decode a delta frame (reference implementation for clients and tests)."""
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+# Global feed history shared by all connections
+feed_history = FeedHistory()
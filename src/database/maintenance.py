@@ -0,0 +1,140 @@
+"""Nightly Neo4j maintenance: index health, statistics, pruning and plan warmup."""
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from src.database.query_log import QueryLog, query_log
+
+logger = logging.getLogger(__name__)
+
+PRUNE_PRICE_HISTORY = """
+MATCH (ph:PriceHistory)
+WHERE ph.recorded_at < $cutoff
+CALL {{
+    WITH ph
+    DETACH DELETE ph
+}} IN TRANSACTIONS OF {batch_size} ROWS
+RETURN count(*) AS deleted
+"""
+
+PRUNE_COMBINATIONS = """
+MATCH (c:Combination)
+WHERE c.created < datetime() - duration({{days: $days}})
+CALL {{
+    WITH c
+    DETACH DELETE c
+}} IN TRANSACTIONS OF {batch_size} ROWS
+RETURN count(*) AS deleted
+"""
+
+class DatabaseMaintenance:
+    """Keep indexes healthy and stored history bounded without dropping plans.
+
+    ``run`` checks index population and usage, resamples outdated index
+    statistics, prunes expired price history and saved combinations in
+    batched transactions, then replays the most frequent statements from
+    the query log under ``EXPLAIN``. EXPLAIN plans a statement without
+    running it, so the plan cache is warm again before the first user
+    arrives; nothing here clears it.
+    """
+
+    def __init__(
+        self,
+        database: Any = None,
+        log: QueryLog = query_log,
+        price_history_days: int = 90,
+        combination_days: int = 180,
+        batch_size: int = 10000,
+        warmup_queries: int = 50
+    ):
+        if database is None:
+            from src.database.neo4j import db as database
+        self.db = database
+        self.log = log
+        self.price_history_days = price_history_days
+        self.combination_days = combination_days
+        self.batch_size = int(batch_size)
+        self.warmup_queries = warmup_queries
+
+    def run(self) -> Dict[str, Any]:
+        """Run every maintenance step; a failing step does not stop the rest."""
+        report: Dict[str, Any] = {'stages': {}}
+        for stage, step in (
+            ('indexes', self.check_indexes),
+            ('resample', self.resample_indexes),
+            ('prune', self.prune),
+            ('warmup', self.warm_plans),
+        ):
+            started = time.monotonic()
+            try:
+                report[stage] = step()
+            except Exception as e:
+                logger.error(f"Database maintenance step {stage} failed: {str(e)}")
+                report[stage] = None
+            report['stages'][stage] = time.monotonic() - started
+        logger.info("Database maintenance completed")
+        return report
+
+    def check_indexes(self) -> List[Dict[str, Any]]:
+        """Report population and read counts for every index.
+
+        Read counts are only tracked by newer servers; where they are
+        missing the index is reported without usage.
+        """
+        indexes = []
+        for record in self.db.query("SHOW INDEXES YIELD *"):
+            index = {
+                'name': record.get('name'),
+                'state': record.get('state'),
+                'population': record.get('populationPercent'),
+                'reads': record.get('readCount'),
+                'last_read': record.get('lastRead'),
+            }
+            if index['state'] != 'ONLINE':
+                logger.warning(
+                    f"Index {index['name']} is {index['state']} "
+                    f"({index['population']}% populated)"
+                )
+            elif index['reads'] == 0:
+                logger.info(f"Index {index['name']} has not been read since it was tracked")
+            indexes.append(index)
+        return indexes
+
+    def resample_indexes(self) -> None:
+        """Refresh the selectivity statistics of indexes that have drifted."""
+        self.db.execute("CALL db.resampleOutdatedIndexes()")
+
+    def prune(self) -> Dict[str, int]:
+        """Delete price history and combinations past their retention period."""
+        # recorded_at is written as a local UTC datetime; comparing the raw
+        # property keeps the range scan on price_history_timestamp
+        cutoff = datetime.utcnow() - timedelta(days=self.price_history_days)
+        price_history = self.db.query(
+            PRUNE_PRICE_HISTORY.format(batch_size=self.batch_size),
+            {'cutoff': cutoff}
+        )
+        combinations = self.db.query(
+            PRUNE_COMBINATIONS.format(batch_size=self.batch_size),
+            {'days': self.combination_days}
+        )
+        pruned = {
+            'price_history': price_history[0]['deleted'] if price_history else 0,
+            'combinations': combinations[0]['deleted'] if combinations else 0,
+        }
+        logger.info(
+            f"Pruned {pruned['price_history']} price history entries "
+            f"and {pruned['combinations']} combinations"
+        )
+        return pruned
+
+    def warm_plans(self, limit: Optional[int] = None) -> int:
+        """Plan the most frequent statements again; returns how many planned."""
+        planned = 0
+        for query, parameters in self.log.top(limit or self.warmup_queries):
+            try:
+                self.db.query(f"EXPLAIN {query}", parameters)
+                planned += 1
+            except Exception as e:
+                logger.debug(f"Plan warmup skipped a statement: {str(e)}")
+        return planned
@@ -22,11 +22,12 @@ class Neo4jDB:
         return cls._instance
     
     def __init__(self):
-        self._driver: Optional[Driver] = None
-        self._init_driver()
+        # The singleton is re-initialised on every Neo4jDB() call; keep the driver
+        if not hasattr(self, '_driver'):
+            self._driver: Optional[Driver] = None
     
     def _init_driver(self) -> None:
-        """Initialize the Neo4j driver.""" 
+        """Initialize the Neo4j driver on first use, not at import.""" 
         if self._driver:
             return
             
@@ -45,8 +46,7 @@ class Neo4jDB:
     @contextmanager
     def session(self) -> Session:
         """Get a database session."""
-        if not self._driver:
-            raise ConnectionError("Database not initialized")
+        self._init_driver()
             
         session = None
         try:
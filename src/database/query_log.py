@@ -0,0 +1,62 @@
+"""Fingerprints of the Cypher statements this process runs."""
+import hashlib
+import re
+from collections import Counter
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+
+_WHITESPACE = re.compile(r'\s+')
+
+def _sample(value: Any) -> Any:
+    """A small stand-in for ``value`` with the same Cypher types.
+
+    Plans are cached per statement and parameter types, so a one-element
+    list plans the same way as the thousand-row batch it came from.
+    """
+    if isinstance(value, (list, tuple)):
+        return [_sample(value[0])] if value else []
+    if isinstance(value, dict):
+        return {key: _sample(item) for key, item in value.items()}
+    return value
+
+class QueryLog:
+    """Count statements by fingerprint and keep one sample of their parameters.
+
+    The fingerprint is the statement with whitespace collapsed, which is
+    also how the database keys its plan cache; parameters are kept as
+    shrunk samples so replaying a statement plans the same way. At most
+    ``max_entries`` distinct statements are tracked.
+    """
+
+    def __init__(self, max_entries: int = 500):
+        self.max_entries = max_entries
+        self._counts: Counter = Counter()
+        self._statements: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def fingerprint(query: str) -> str:
+        normalized = _WHITESPACE.sub(' ', query).strip()
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    def record(self, query: str, parameters: Optional[Dict[str, Any]] = None) -> None:
+        key = self.fingerprint(query)
+        with self._lock:
+            if key not in self._statements:
+                if len(self._statements) >= self.max_entries:
+                    return
+                self._statements[key] = (query, _sample(parameters or {}))
+            self._counts[key] += 1
+
+    def top(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """The ``limit`` most frequent statements with sample parameters."""
+        with self._lock:
+            return [self._statements[key] for key, _ in self._counts.most_common(limit)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._statements.clear()
+
+# Global query log
+query_log = QueryLog()
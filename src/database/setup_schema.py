@@ -22,6 +22,7 @@ class DatabaseSchema:
                 "CREATE CONSTRAINT vendor_name_unique IF NOT EXISTS FOR (v:Vendor) REQUIRE v.name IS UNIQUE",
                 "CREATE CONSTRAINT material_name_unique IF NOT EXISTS FOR (m:Material) REQUIRE m.name IS UNIQUE",
                 "CREATE CONSTRAINT trade_id_unique IF NOT EXISTS FOR (t:Trade) REQUIRE t.uid IS UNIQUE",
+                "CREATE CONSTRAINT combination_hash_unique IF NOT EXISTS FOR (c:Combination) REQUIRE c.hash IS UNIQUE",
                 
                 # Property existence constraints
                 "CREATE CONSTRAINT item_required_props IF NOT EXISTS FOR (i:Item) REQUIRE i.name IS NOT NULL",
@@ -52,6 +53,7 @@ class DatabaseSchema:
                 # Temporal indexes
                 "CREATE INDEX price_history_timestamp IF NOT EXISTS FOR (p:PriceHistory) ON (p.recorded_at)",
                 "CREATE INDEX trade_timestamp IF NOT EXISTS FOR (t:Trade) ON (t.created_at)",
+                "CREATE INDEX combination_created IF NOT EXISTS FOR (c:Combination) ON (c.created)",
                 
                 # Category and type indexes
                 "CREATE INDEX item_category IF NOT EXISTS FOR (i:Item) ON (i.category)",
@@ -0,0 +1,125 @@
+"""Replay representative statements at worker start to warm plans and pages."""
+import logging
+import time
+from importlib import import_module
+from threading import Event, Lock
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# Modules whose import registers their statements
+WARMUP_MODULES = (
+    'src.services.market_service',
+    'src.services.item_service',
+    'src.core.neo4j',
+)
+
+SAMPLE_ITEMS_QUERY = """
+MATCH (i:Item)
+WHERE i.last_low_price IS NOT NULL
+RETURN i.uid AS item_id
+LIMIT $limit
+"""
+
+Parameters = Union[Dict[str, Any], Callable[[List[str]], Dict[str, Any]]]
+
+class WarmupQuery(NamedTuple):
+    """A statement as a service runs it, with typical parameters.
+
+    ``parameters`` is a dict or a callable given sample item ids.
+    ``execute=False`` only plans it, for statements too costly to run
+    once per worker.
+    """
+    name: str
+    query: str
+    parameters: Parameters
+    execute: bool = True
+
+class WarmupRegistry:
+    """Statements replayed once per worker before it reports ready.
+
+    Services register the exact text they run, since the plan cache is
+    keyed on it. Each statement runs twice: the first timing pays for
+    planning and a cold page cache, the second shows the warm cost. A
+    failing statement is logged and does not hold readiness back.
+    """
+
+    def __init__(self, sample_size: int = 20):
+        self.sample_size = sample_size
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._queries: Dict[str, WarmupQuery] = {}
+        self._ready = Event()
+        self._lock = Lock()
+
+    def register(self, name: str, query: str, parameters: Parameters = None, execute: bool = True) -> None:
+        with self._lock:
+            self._queries[name] = WarmupQuery(name, query, parameters or {}, execute)
+
+    def queries(self) -> List[WarmupQuery]:
+        with self._lock:
+            return list(self._queries.values())
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self) -> None:
+        self._ready.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def run(self, database: Any = None, modules: Sequence[str] = WARMUP_MODULES) -> Dict[str, Dict[str, Any]]:
+        """Replay every registered statement, then mark the process ready."""
+        try:
+            for module in modules:
+                try:
+                    import_module(module)
+                except Exception as e:
+                    logger.warning(f"Warmup statements of {module} unavailable: {str(e)}")
+            if database is None:
+                from src.database.neo4j import db as database
+
+            started = time.monotonic()
+            item_ids = self._sample_items(database)
+            for warmup in self.queries():
+                self.results[warmup.name] = self._replay(database, warmup, item_ids)
+            cold = sum(result.get('cold') or 0 for result in self.results.values())
+            warm = sum(result.get('warm') or 0 for result in self.results.values())
+            logger.info(
+                f"Warmed {len(self.results)} statements in {time.monotonic() - started:.2f}s "
+                f"(cold {cold:.3f}s, warm {warm:.3f}s)"
+            )
+        except Exception as e:
+            logger.error(f"Warmup failed: {str(e)}")
+        finally:
+            self.mark_ready()
+        return self.results
+
+    def _sample_items(self, database: Any) -> List[str]:
+        try:
+            records = database.query(SAMPLE_ITEMS_QUERY, {'limit': self.sample_size})
+            return [record['item_id'] for record in records]
+        except Exception as e:
+            logger.warning(f"Warmup item sample unavailable: {str(e)}")
+            return []
+
+    @staticmethod
+    def _replay(database: Any, warmup: WarmupQuery, item_ids: List[str]) -> Dict[str, Any]:
+        parameters = warmup.parameters
+        if callable(parameters):
+            parameters = parameters(item_ids)
+        query = warmup.query if warmup.execute else f"EXPLAIN {warmup.query}"
+        timings: Dict[str, Any] = {'cold': None, 'warm': None}
+        try:
+            for run in ('cold', 'warm'):
+                started = time.monotonic()
+                database.query(query, parameters)
+                timings[run] = time.monotonic() - started
+        except Exception as e:
+            logger.warning(f"Warmup of {warmup.name} failed: {str(e)}")
+            timings['error'] = str(e)
+        return timings
+
+# Global warmup registry
+warmup_registry = WarmupRegistry()
@@ -0,0 +1,178 @@
+"""Persisted queries and read-only result caching for the GraphQL API."""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+from graphql import GraphQLError
+from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from src.core.snapshot import price_snapshot
+
+# Operation extensions set by GraphQLView once a persisted query is resolved
+QUERY_HASH_EXTENSION = '_queryHash'
+PERSISTED_QUERY_ERROR_EXTENSION = '_persistedQueryError'
+
+class PersistedQueryError(GraphQLError):
+    """Base error for persisted query lookups, reported in the response body."""
+
+    code = "PERSISTED_QUERY_ERROR"
+
+    def __init__(self, message: str):
+        super().__init__(message, extensions={"code": self.code})
+
+class PersistedQueryNotFound(PersistedQueryError):
+    """Raised when a client sends a hash the registry has not seen."""
+
+    code = "PERSISTED_QUERY_NOT_FOUND"
+
+    def __init__(self):
+        super().__init__("PersistedQueryNotFound")
+
+class PersistedQueryMismatch(PersistedQueryError):
+    """Raised when a hash does not match the query sent with it."""
+
+    code = "PERSISTED_QUERY_HASH_MISMATCH"
+
+def query_hash(query: str) -> str:
+    """SHA-256 hex digest identifying a query document."""
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+class PersistedQueryRegistry:
+    """Bounded hash -> document registry with automatic registration.
+
+    Follows the automatic persisted query convention: a client first sends
+    only ``extensions.persistedQuery.sha256Hash``; on ``PersistedQueryNotFound``
+    it retries with the full document, which registers it for later calls.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self._documents: 'OrderedDict[str, str]' = OrderedDict()
+        self._lock = Lock()
+
+    def resolve(self, query: Optional[str], extensions: Optional[Dict[str, Any]]) -> Tuple[Optional[str], Optional[str]]:
+        """Return the ``(query, hash)`` to execute for an incoming request."""
+        persisted = (extensions or {}).get('persistedQuery') or {}
+        sha = persisted.get('sha256Hash')
+        if sha is None:
+            return query, self.register(query) if query else None
+
+        if query is None:
+            with self._lock:
+                document = self._documents.get(sha)
+                if document is None:
+                    raise PersistedQueryNotFound()
+                self._documents.move_to_end(sha)
+            return document, sha
+
+        if query_hash(query) != sha:
+            raise PersistedQueryMismatch("provided sha256Hash does not match query")
+        self.register(query, sha)
+        return query, sha
+
+    def register(self, query: str, sha: Optional[str] = None) -> str:
+        """Register ``query`` and return its hash."""
+        sha = sha or query_hash(query)
+        with self._lock:
+            self._documents[sha] = query
+            self._documents.move_to_end(sha)
+            while len(self._documents) > self.max_size:
+                self._documents.popitem(last=False)
+        return sha
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+class QueryResultCache:
+    """LRU cache of read-only query results tagged with the price snapshot.
+
+    Entries are dropped as soon as the ingest path advances the price
+    snapshot version, and expire after ``ttl`` seconds regardless so that
+    processes which do not run the ingest still pick up new prices.
+    """
+
+    def __init__(self, max_entries: int = 500, ttl: int = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[int, float, Any]]' = OrderedDict()
+        self._lock = Lock()
+        price_snapshot.subscribe(lambda version: self.clear())
+
+    @staticmethod
+    def key(sha: str, operation_name: Optional[str], variables: Optional[Dict[str, Any]]) -> Hashable:
+        return sha, operation_name, json.dumps(variables or {}, sort_keys=True, default=str)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, stored_at, result = entry
+                if version == price_snapshot.value and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, result: Any) -> None:
+        with self._lock:
+            self._entries[key] = (price_snapshot.value, time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class ResultCacheExtension(SchemaExtension):
+    """Serve read-only queries from ``result_cache`` and clear it on mutations.
+
+    Only operations tagged with their document hash by the view are
+    cached. A hit sets the execution result before execution starts, which
+    makes strawberry skip resolving the operation altogether.
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        error = (self.execution_context.operation_extensions or {}).get(PERSISTED_QUERY_ERROR_EXTENSION)
+        if error is not None:
+            raise error
+        yield
+
+    def on_execute(self) -> Iterator[None]:
+        context = self.execution_context
+        sha = (context.operation_extensions or {}).get(QUERY_HASH_EXTENSION)
+        operation = context.operation_type if sha is not None else None
+
+        key = None
+        if operation is OperationType.QUERY:
+            key = QueryResultCache.key(sha, context.operation_name, context.variables)
+            cached = result_cache.get(key)
+            if cached is not None:
+                context.result = cached
+                yield
+                return
+
+        yield
+
+        result = context.result
+        if result is None or result.errors:
+            return
+        if key is not None:
+            result_cache.set(key, result)
+        elif operation is OperationType.MUTATION:
+            result_cache.clear()
+
+# Global registry and result cache shared by all requests
+persisted_queries = PersistedQueryRegistry()
+result_cache = QueryResultCache()
@@ -0,0 +1,138 @@
+"""Query depth and complexity limits for the GraphQL API."""
+from typing import Any, Dict, Iterator, Optional, Set
+
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    IntValueNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    ValidationRule,
+    VariableNode,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+    validate,
+)
+from strawberry.extensions import SchemaExtension
+
+MAX_QUERY_DEPTH = 8
+MAX_QUERY_COMPLEXITY = 5000
+DEFAULT_LIST_SIZE = 20
+# Largest page a list field returns; resolvers clamp ``limit`` to it
+MAX_LIST_SIZE = 100
+
+def complexity_limit_rule(
+    max_complexity: int = MAX_QUERY_COMPLEXITY,
+    default_list_size: int = DEFAULT_LIST_SIZE,
+    variables: Optional[Dict[str, Any]] = None
+) -> type:
+    """Build a validation rule rejecting operations above ``max_complexity``.
+
+    Every field costs one point plus the cost of its selection. List fields
+    multiply their selection by their ``limit`` argument, or by
+    ``default_list_size`` when none is given, so the estimate tracks the
+    number of resolver calls the query can fan out to. A ``limit`` passed
+    as a variable is read from ``variables``; without them it is costed at
+    ``MAX_LIST_SIZE``, the most a resolver returns.
+    """
+
+    class QueryComplexityRule(ValidationRule):
+        def enter_operation_definition(self, node: OperationDefinitionNode, *_args):
+            root = self.context.schema.get_root_type(node.operation)
+            cost = self._selection_cost(node.selection_set, root, set())
+            if cost > max_complexity:
+                self.report_error(GraphQLError(
+                    f"Query complexity {cost} exceeds the maximum of {max_complexity}",
+                    node
+                ))
+
+        def _selection_cost(
+            self,
+            selection_set: Optional[SelectionSetNode],
+            parent_type,
+            fragments: Set[str]
+        ) -> int:
+            if selection_set is None or parent_type is None:
+                return 0
+
+            schema = self.context.schema
+            total = 0
+            for selection in selection_set.selections:
+                if isinstance(selection, FieldNode):
+                    fields = getattr(parent_type, 'fields', {})
+                    field = fields.get(selection.name.value)
+                    if field is None:
+                        total += 1
+                        continue
+                    child_cost = self._selection_cost(
+                        selection.selection_set,
+                        get_named_type(field.type),
+                        fragments
+                    )
+                    multiplier = 1
+                    if is_list_type(get_nullable_type(field.type)):
+                        multiplier = self._list_size(selection)
+                    total += multiplier * (1 + child_cost)
+                elif isinstance(selection, InlineFragmentNode):
+                    type_condition = (
+                        schema.get_type(selection.type_condition.name.value)
+                        if selection.type_condition else parent_type
+                    )
+                    total += self._selection_cost(selection.selection_set, type_condition, fragments)
+                elif isinstance(selection, FragmentSpreadNode):
+                    name = selection.name.value
+                    fragment = self.context.get_fragment(name)
+                    if fragment is None or name in fragments:
+                        continue
+                    total += self._selection_cost(
+                        fragment.selection_set,
+                        schema.get_type(fragment.type_condition.name.value),
+                        fragments | {name}
+                    )
+            return total
+
+        @staticmethod
+        def _list_size(field: FieldNode) -> int:
+            for argument in field.arguments or ():
+                if argument.name.value != 'limit':
+                    continue
+                value = argument.value
+                if isinstance(value, IntValueNode):
+                    return min(max(int(value.value), 1), MAX_LIST_SIZE)
+                if isinstance(value, VariableNode):
+                    try:
+                        size = int((variables or {})[value.name.value])
+                    except (KeyError, TypeError, ValueError):
+                        return MAX_LIST_SIZE
+                    return min(max(size, 1), MAX_LIST_SIZE)
+            return default_list_size
+
+    return QueryComplexityRule
+
+class QueryComplexityLimiter(SchemaExtension):
+    """Reject operations whose complexity exceeds ``max_complexity``.
+
+    Runs after validation, once the request's variables are known, so
+    ``items(limit: $n)`` is charged for ``$n`` rather than the default.
+    It sits outside the validation cache, whose results are shared by
+    every set of variables.
+    """
+
+    def __init__(
+        self,
+        max_complexity: int = MAX_QUERY_COMPLEXITY,
+        default_list_size: int = DEFAULT_LIST_SIZE
+    ):
+        self.max_complexity = max_complexity
+        self.default_list_size = default_list_size
+
+    def on_execute(self) -> Iterator[None]:
+        context = self.execution_context
+        rule = complexity_limit_rule(self.max_complexity, self.default_list_size, context.variables)
+        errors = validate(context.schema._schema, context.graphql_document, [rule])
+        if errors:
+            raise errors[0]
+        yield
@@ -0,0 +1,111 @@
+"""Per-request DataLoaders backed by one UNWIND query per batch."""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from strawberry.dataloader import DataLoader
+
+from src.models.item import MarketData
+from src.services.item_service import ItemService
+from src.services.market_service import MarketService
+
+ItemKey = Tuple[str, Tuple[str, ...]]
+PriceHistoryKey = Tuple[str, int, Optional[str]]
+
+class GraphQLLoaders:
+    """DataLoaders for one GraphQL request.
+
+    Every ``load`` issued while resolving the same tick is collected and
+    answered with a single Cypher round trip, so nested fields on a list of
+    N items cost one query per field instead of N.
+    """
+
+    def __init__(self, item_service: ItemService, market_service: MarketService):
+        self.item_service = item_service
+        self.market_service = market_service
+        self.item_by_id = DataLoader(load_fn=self._load_items)
+        self.price_history_by_item = DataLoader(load_fn=self._load_price_history)
+        self.trends_by_item = DataLoader(load_fn=self._load_trends)
+        self.crafts_by_item = DataLoader(load_fn=self._load_crafts)
+
+    async def _load_items(self, keys: List[ItemKey]) -> List[Optional[Dict[str, Any]]]:
+        # Keys carry the projected properties; one query per distinct projection
+        groups: Dict[Tuple[str, ...], List[str]] = defaultdict(list)
+        for item_id, properties in keys:
+            groups[properties].append(item_id)
+
+        found: Dict[ItemKey, Dict[str, Any]] = {}
+        for properties, item_ids in groups.items():
+            projection = self.item_service._map_projection('i', properties)
+            records = await self.item_service._execute_query(
+                f"""
+                UNWIND $item_ids AS item_id
+                MATCH (i:Item {{uid: item_id}})
+                RETURN item_id, {projection} as item
+                """,
+                {"item_ids": list(set(item_ids))}
+            )
+            for record in records:
+                found[(record['item_id'], properties)] = record['item']
+        return [found.get(key) for key in keys]
+
+    async def _load_price_history(self, keys: List[PriceHistoryKey]) -> List[List[Dict[str, Any]]]:
+        # One query per distinct (days, vendor) window, normally just one
+        groups: Dict[Tuple[int, Optional[str]], List[str]] = defaultdict(list)
+        for item_id, days, vendor in keys:
+            groups[(days, vendor)].append(item_id)
+
+        history: Dict[PriceHistoryKey, List[Dict[str, Any]]] = {}
+        for (days, vendor), item_ids in groups.items():
+            records = await self.market_service._execute_query(
+                """
+                UNWIND $item_ids AS item_id
+                MATCH (i:Item {uid: item_id})-[:HAD_PRICE]->(ph:PriceHistory)
+                WHERE datetime(ph.recorded_at) > datetime() - duration({days: $days})
+                AND ($vendor IS NULL OR ph.vendor_name = $vendor)
+                WITH item_id, ph
+                ORDER BY ph.recorded_at
+                RETURN item_id, collect({
+                    price: ph.price_rub,
+                    timestamp: ph.recorded_at,
+                    vendor: ph.vendor_name,
+                    currency: ph.currency,
+                    requires_quest: ph.requires_quest
+                }) as history
+                """,
+                {"item_ids": list(set(item_ids)), "days": days, "vendor": vendor}
+            )
+            for record in records:
+                history[(record['item_id'], days, vendor)] = record['history']
+        return [history.get(key, []) for key in keys]
+
+    async def _load_trends(self, item_ids: List[str]) -> List[MarketData]:
+        trends = await self.market_service.analyze_market_trends_bulk(list(set(item_ids)))
+        return [trends.get(item_id, MarketData()) for item_id in item_ids]
+
+    async def _load_crafts(self, item_ids: List[str]) -> List[List[Dict[str, Any]]]:
+        records = await self.item_service._execute_query(
+            """
+            UNWIND $item_ids AS item_id
+            MATCH (i:Item {uid: item_id})<-[:PRODUCES]-(c:Trade {type: 'craft'})
+            MATCH (c)-[r:REQUIRES]->(req:Item)
+            WITH item_id, i, c, collect({
+                item_name: req.name,
+                quantity: toInteger(r.count),
+                base_price: req.base_price,
+                current_price: req.last_low_price
+            }) as requirements
+            OPTIONAL MATCH (i)-[:CAN_SELL_TO]->(st:Trade)
+            RETURN item_id,
+                   c.station as station,
+                   c.level as level,
+                   c.duration as duration,
+                   coalesce(c.output_count, 1) as output_count,
+                   requirements,
+                   max(st.priceRUB) as sell_price
+            """,
+            {"item_ids": list(set(item_ids))}
+        )
+        crafts: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for record in records:
+            crafts[record['item_id']].append(record)
+        return [crafts.get(item_id, []) for item_id in item_ids]
@@ -0,0 +1,18 @@
+"""Permission classes for GraphQL fields."""
+from typing import Any
+
+from strawberry.permission import BasePermission
+from strawberry.types import Info
+
+from src.core.auth import is_admin_request
+
+class IsAdmin(BasePermission):
+    """Allow the field only for requests with a valid admin token.
+
+    The same ``admin_token`` cookie the REST admin routes check.
+    """
+    message = "Admin token is missing or invalid"
+
+    def has_permission(self, source: Any, info: Info, **kwargs: Any) -> bool:
+        request = info.context.get('request')
+        return request is not None and is_admin_request(request)
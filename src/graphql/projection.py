@@ -0,0 +1,48 @@
+"""Map GraphQL selection sets onto Cypher property projections."""
+from typing import Dict, Iterable, Set, Tuple
+
+from strawberry.types import Info
+from strawberry.types.nodes import SelectedField
+
+ITEM_PROPERTY_FIELDS = (
+    'width', 'height', 'weight', 'category', 'type',
+    'grid_image_link', 'wiki_link', 'has_grid',
+    'blocks_headphones', 'max_stackable'
+)
+
+# GraphQL field on ItemType -> Item node properties it reads. Fields backed
+# by relationships (market data, history, crafts) resolve through their own
+# DataLoaders and only cost a query when they are selected.
+ITEM_FIELD_PROPERTIES: Dict[str, Tuple[str, ...]] = {
+    'uid': ('uid',),
+    'name': ('name',),
+    'basePrice': ('base_price',),
+    'currentPrice': ('last_low_price',),
+    'properties': ITEM_PROPERTY_FIELDS,
+}
+
+def selected_field_names(selections: Iterable) -> Set[str]:
+    """Names of the fields selected directly, expanding fragments."""
+    names: Set[str] = set()
+    for selection in selections:
+        if isinstance(selection, SelectedField):
+            names.add(selection.name)
+        else:
+            names |= selected_field_names(selection.selections)
+    return names
+
+def item_projection(info: Info) -> Tuple[str, ...]:
+    """Item node properties needed to answer the ItemType selection in ``info``.
+
+    ``uid`` is always included because nested resolvers key on it. The
+    result is sorted so identical selections share DataLoader batches.
+    """
+    fields = selected_field_names(
+        selection
+        for field in info.selected_fields
+        for selection in field.selections
+    )
+    properties = {'uid'}
+    for field in fields:
+        properties.update(ITEM_FIELD_PROPERTIES.get(field, ()))
+    return tuple(sorted(properties))
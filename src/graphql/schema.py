@@ -1,15 +1,24 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 import strawberry
+from strawberry.extensions import (
+    ParserCache,
+    QueryDepthLimiter,
+    ValidationCache,
+)
+from strawberry.scalars import JSON
 from strawberry.types import Info
 
-from src.services.item_service import ItemService
-from src.services.market_service import MarketService
-from src.models.item import Item, MarketData, PriceEntry
+from src.core.providers import ServiceProvider
+from src.models.item import Item, ItemAdjustment, MarketData, PriceEntry
+from src.graphql.cache import ResultCacheExtension
+from src.graphql.permissions import IsAdmin
+from src.graphql.limits import MAX_LIST_SIZE, MAX_QUERY_DEPTH, QueryComplexityLimiter
+from src.graphql.projection import ITEM_PROPERTY_FIELDS, item_projection
 
-item_service = ItemService()
-market_service = MarketService()
+item_service = ServiceProvider('src.services.item_service:ItemService')
+market_service = ServiceProvider('src.services.market_service:MarketService')
 
 @strawberry.type
 class MarketAnalysisType:
@@ -19,6 +28,20 @@ class MarketAnalysisType:
     volume: int
     price_change_24h: float
 
+    @classmethod
+    def from_market_data(cls, data: MarketData) -> Optional['MarketAnalysisType']:
+        if not data.volume_24h:
+            return None
+        change = data.change_24h or 0.0
+        return cls(
+            volatility=data.volatility_score or 0.0,
+            trend='up' if change > 1 else 'down' if change < -1 else 'stable',
+            # More observations in the window make the trend more reliable
+            confidence=data.volume_24h / (data.volume_24h + 10),
+            volume=data.volume_24h,
+            price_change_24h=change
+        )
+
 @strawberry.type
 class PriceHistoryType:
     price: float
@@ -46,8 +69,31 @@ class CraftAnalysisType:
     profit: float
     profit_per_hour: float
 
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'CraftAnalysisType':
+        requirements = [CraftRequirementType(**req) for req in record['requirements']]
+        total_cost = sum(
+            (req.current_price or req.base_price) * req.quantity
+            for req in requirements
+        )
+        sell_price = (record.get('sell_price') or 0) * record['output_count']
+        duration = record.get('duration') or 0
+        profit = sell_price - total_cost
+        return cls(
+            station=record['station'],
+            level=record['level'],
+            duration=duration,
+            requirements=requirements,
+            output_count=record['output_count'],
+            total_cost=total_cost,
+            sell_price=sell_price,
+            profit=profit,
+            profit_per_hour=profit / (duration / 3600) if duration else 0.0
+        )
+
 @strawberry.type
 class TradeOpportunityType:
+    item_id: strawberry.Private[str]
     item_name: str
     buy_price: float
     sell_price: float
@@ -55,9 +101,32 @@ class TradeOpportunityType:
     profit_percent: float
     buy_vendor: str
     sell_vendor: str
-    market_data: Optional[MarketAnalysisType]
-    barter_options: Optional[List[str]]
-    craft_options: Optional[List[CraftRequirementType]]
+    barter_options: Optional[List[str]] = None
+
+    @strawberry.field
+    async def market_data(self, info: Info) -> Optional[MarketAnalysisType]:
+        data = await info.context['loaders'].trends_by_item.load(self.item_id)
+        return MarketAnalysisType.from_market_data(data)
+
+    @strawberry.field
+    async def craft_options(self, info: Info) -> Optional[List[CraftRequirementType]]:
+        crafts = await info.context['loaders'].crafts_by_item.load(self.item_id)
+        if not crafts:
+            return None
+        return [CraftRequirementType(**req) for craft in crafts for req in craft['requirements']]
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'TradeOpportunityType':
+        return cls(
+            item_id=record['item_id'],
+            item_name=record['item_name'],
+            buy_price=record['buy_price'],
+            sell_price=record['sell_price'],
+            profit=record['profit'],
+            profit_percent=record['profit_percent'],
+            buy_vendor=record['buy_vendor'],
+            sell_vendor=record['sell_vendor']
+        )
 
 @strawberry.type
 class MarketStatisticsType:
@@ -74,17 +143,74 @@ class ItemType:
     name: str
     base_price: float
     current_price: Optional[float]
-    properties: Optional[dict]
-    market_data: Optional[MarketAnalysisType]
-    price_history: List[PriceHistoryType]
-    craft_analysis: Optional[CraftAnalysisType]
+    properties: Optional[JSON]
+
+    @strawberry.field
+    async def market_data(self, info: Info) -> Optional[MarketAnalysisType]:
+        data = await info.context['loaders'].trends_by_item.load(self.uid)
+        return MarketAnalysisType.from_market_data(data)
+
+    @strawberry.field
+    async def price_history(
+        self,
+        info: Info,
+        days: int = 7,
+        vendor: Optional[str] = None
+    ) -> List[PriceHistoryType]:
+        history = await info.context['loaders'].price_history_by_item.load((self.uid, days, vendor))
+        return [PriceHistoryType(**entry) for entry in history]
+
+    @strawberry.field
+    async def craft_analysis(self, info: Info) -> Optional[CraftAnalysisType]:
+        crafts = await info.context['loaders'].crafts_by_item.load(self.uid)
+        if not crafts:
+            return None
+        return max(
+            (CraftAnalysisType.from_record(craft) for craft in crafts),
+            key=lambda craft: craft.profit
+        )
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> 'ItemType':
+        # Records are projected to the selected fields, so others may be absent
+        return cls(
+            uid=record['uid'],
+            name=record.get('name'),
+            base_price=record.get('base_price'),
+            current_price=record.get('last_low_price'),
+            properties={
+                key: record[key] for key in ITEM_PROPERTY_FIELDS
+                if record.get(key) is not None
+            } or None
+        )
+
+@strawberry.input
+class ItemAdjustmentInput:
+    item_id: str
+    price: Optional[float] = strawberry.UNSET
+    blacklisted: Optional[bool] = None
+    locked: Optional[bool] = None
+    duration: Optional[int] = None
+
+    def to_model(self) -> ItemAdjustment:
+        fields = {
+            'item_id': self.item_id,
+            'blacklisted': self.blacklisted,
+            'locked': self.locked,
+            'duration': self.duration
+        }
+        if self.price is not strawberry.UNSET:
+            # Leaving price out keeps the override; null clears it
+            fields['price'] = self.price
+        return ItemAdjustment(**fields)
 
 @strawberry.type
 class Query:
     @strawberry.field
     async def item(self, info: Info, item_id: str) -> Optional[ItemType]:
         """Get a single item by ID."""
-        return await item_service.get_by_id(item_id)
+        record = await info.context['loaders'].item_by_id.load((item_id, item_projection(info)))
+        return ItemType.from_record(record) if record else None
 
     @strawberry.field
     async def items(
@@ -97,18 +223,32 @@ class Query:
         limit: int = 20
     ) -> List[ItemType]:
         """Search for items with filters."""
-        return await item_service.search_items(
+        properties = item_projection(info)
+        records = await item_service.search_items(
             search=search,
             category=category,
             min_price=min_price,
             max_price=max_price,
-            limit=limit
+            limit=min(max(limit, 1), MAX_LIST_SIZE),
+            properties=properties
         )
+        loader = info.context['loaders'].item_by_id
+        for record in records:
+            loader.prime((record['uid'], properties), record)
+        return [ItemType.from_record(record) for record in records]
 
     @strawberry.field
     async def market_statistics(self, info: Info) -> MarketStatisticsType:
         """Get overall market statistics."""
-        return await market_service.get_market_statistics()
+        stats = await market_service.get_market_statistics()
+        return MarketStatisticsType(
+            total_items=stats['total_items'],
+            avg_price=stats['avg_price'],
+            items_above_base=stats['items_above_base'],
+            percent_above_base=stats['percent_above_base'],
+            volatility_index=stats.get('volatility_index'),
+            trade_volume_24h=stats.get('trade_volume_24h')
+        )
 
     @strawberry.field
     async def price_history(
@@ -119,11 +259,8 @@ class Query:
         vendor: Optional[str] = None
     ) -> List[PriceHistoryType]:
         """Get price history for an item."""
-        return await market_service.get_price_history(
-            item_id=item_id,
-            days=days,
-            vendor=vendor
-        )
+        history = await info.context['loaders'].price_history_by_item.load((item_id, days, vendor))
+        return [PriceHistoryType(**entry) for entry in history]
 
     @strawberry.field
     async def trade_opportunities(
@@ -133,10 +270,11 @@ class Query:
         min_profit_percent: float = 10
     ) -> List[TradeOpportunityType]:
         """Find profitable trading opportunities."""
-        return await market_service.find_arbitrage_opportunities(
+        records = await market_service.find_arbitrage_opportunities(
             min_profit=min_profit,
             min_profit_percent=min_profit_percent
         )
+        return [TradeOpportunityType.from_record(record) for record in records]
 
     @strawberry.field
     async def craft_analysis(
@@ -149,7 +287,7 @@ class Query:
 
 @strawberry.type
 class Mutation:
-    @strawberry.mutation
+    @strawberry.mutation(permission_classes=[IsAdmin])
     async def update_price(
         self,
         info: Info,
@@ -163,9 +301,10 @@ class Mutation:
             vendor={"name": vendor}
         )
         await market_service.update_market_prices([entry])
-        return await item_service.get_by_id(item_id)
+        record = await info.context['loaders'].item_by_id.load((item_id, item_projection(info)))
+        return ItemType.from_record(record)
 
-    @strawberry.mutation
+    @strawberry.mutation(permission_classes=[IsAdmin])
     async def blacklist_item(
         self,
         info: Info,
@@ -175,7 +314,16 @@ class Mutation:
         await item_service.blacklist_item(item_id)
         return True
 
-    @strawberry.mutation
+    @strawberry.mutation(permission_classes=[IsAdmin])
+    async def apply_item_adjustments(
+        self,
+        info: Info,
+        changes: List[ItemAdjustmentInput]
+    ) -> List[str]:
+        """Apply many override, blacklist and lock changes in one transaction."""
+        return await item_service.apply_adjustments([change.to_model() for change in changes])
+
+    @strawberry.mutation(permission_classes=[IsAdmin])
     async def remove_from_blacklist(
         self,
         info: Info,
@@ -187,5 +335,13 @@ class Mutation:
 
 schema = strawberry.Schema(
     query=Query,
-    mutation=Mutation
+    mutation=Mutation,
+    extensions=[
+        # Repeated documents skip parsing and validation after the first request
+        ParserCache(maxsize=256),
+        ValidationCache(maxsize=256),
+        QueryDepthLimiter(max_depth=MAX_QUERY_DEPTH),
+        QueryComplexityLimiter(),
+        ResultCacheExtension
+    ]
 )
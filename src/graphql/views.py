@@ -0,0 +1,52 @@
+"""Flask view serving the GraphQL schema."""
+from dataclasses import replace
+from typing import Any, Dict, List, Union
+
+from flask import Request, Response
+from strawberry.flask.views import AsyncGraphQLView
+from strawberry.http import GraphQLRequestData
+
+from src.graphql.cache import (
+    PERSISTED_QUERY_ERROR_EXTENSION,
+    QUERY_HASH_EXTENSION,
+    PersistedQueryError,
+    persisted_queries,
+)
+from src.graphql.loaders import GraphQLLoaders
+from src.graphql.schema import item_service, market_service
+
+class GraphQLView(AsyncGraphQLView):
+    """GraphQL endpoint with fresh DataLoaders for every request.
+
+    Requests may reference a persisted query by hash instead of sending
+    the document; the hash is swapped for the document while the body is
+    parsed and passed on to ``ResultCacheExtension``, which caches the
+    results of read-only queries.
+    """
+
+    async def get_context(self, request: Request, response: Response) -> Dict[str, Any]:
+        return {
+            "request": request,
+            "response": response,
+            "loaders": GraphQLLoaders(item_service, market_service)
+        }
+
+    async def parse_http_body(self, request) -> Union[GraphQLRequestData, List[GraphQLRequestData]]:
+        request_data = await super().parse_http_body(request)
+        if isinstance(request_data, list):
+            return [self._resolve_persisted_query(data) for data in request_data]
+        return self._resolve_persisted_query(request_data)
+
+    @staticmethod
+    def _resolve_persisted_query(request_data: GraphQLRequestData) -> GraphQLRequestData:
+        extensions = dict(request_data.extensions or {})
+        try:
+            query, sha = persisted_queries.resolve(request_data.query, extensions)
+        except PersistedQueryError as e:
+            # Raised by ResultCacheExtension so it is reported in the body
+            extensions[PERSISTED_QUERY_ERROR_EXTENSION] = e
+            return replace(request_data, extensions=extensions)
+
+        if sha is not None:
+            extensions[QUERY_HASH_EXTENSION] = sha
+        return replace(request_data, query=query, extensions=extensions)
@@ -61,6 +61,10 @@ class MarketData(BaseModel):
     volume_24h: Optional[int] = None
     trades_24h: Optional[int] = None
     volatility_score: Optional[float] = None
+    ema: Optional[float] = None
+    vwap: Optional[float] = None
+    z_score: Optional[float] = None
+    is_anomaly: Optional[bool] = None
 
 class ItemBase(BaseModel):
     """Base item model."""
@@ -86,6 +90,22 @@ class ItemUpdate(BaseModel):
     properties: Optional[ItemProperties] = None
     market_data: Optional[MarketData] = None
 
+class ItemAdjustment(BaseModel):
+    """One admin change to an item's price override, blacklist or lock.
+
+    Fields left out are not touched; an explicit ``price`` of None clears
+    the override. ``duration`` is in minutes and applies to every field set.
+    """
+    item_id: str
+    price: Optional[float] = Field(default=None, gt=0)
+    blacklisted: Optional[bool] = None
+    locked: Optional[bool] = None
+    duration: Optional[int] = Field(default=None, gt=0)
+
+    @property
+    def sets_price(self) -> bool:
+        return 'price' in self.model_fields_set
+
 class Item(ItemBase):
     """Complete item model."""
     uid: str
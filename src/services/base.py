@@ -1,5 +1,5 @@
 """Base service with enhanced relationship handling."""
-from typing import Any, Dict, List, Optional, TypeVar, Generic, Union
+from typing import Any, Dict, List, Optional, Sequence, TypeVar, Generic, Union
 import logging
 from datetime import datetime
 
@@ -7,6 +7,7 @@ from neo4j.exceptions import ServiceUnavailable
 from pydantic import BaseModel
 
 from src.database import db
+from src.database.query_log import query_log
 from src.core.exceptions import DatabaseError, NotFoundError
 from src.models.graph_model import NodeLabels, RelationshipTypes
 
@@ -27,6 +28,8 @@ class BaseService(Generic[ModelType]):
         single_result: bool = False
     ) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
         """Execute a Cypher query and handle errors."""
+        # Frequent statements are replayed to warm plans after maintenance
+        query_log.record(query, params)
         try:
             with self.db.session() as session:
                 result = session.run(query, params or {})
@@ -41,6 +44,16 @@ class BaseService(Generic[ModelType]):
             logger.error(f"Database query error: {str(e)}")
             raise DatabaseError(f"Database operation failed: {str(e)}")
 
+    @staticmethod
+    def _map_projection(variable: str, properties: Optional[Sequence[str]] = None) -> str:
+        """Cypher map projection of ``properties`` on ``variable``, or all properties."""
+        if not properties:
+            return f"properties({variable})"
+        invalid = [prop for prop in properties if not prop.isidentifier()]
+        if invalid:
+            raise ValueError(f"Invalid property names: {', '.join(invalid)}")
+        return f"{variable} {{{', '.join('.' + prop for prop in properties)}}}"
+
     async def get_by_id(self, id: str) -> ModelType:
         """Get a single record by ID with relationships."""
         if not self.model_class:
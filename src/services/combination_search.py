@@ -0,0 +1,481 @@
+"""Array-based item combination search shared by the optimizer and its workers."""
+import math
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from math import comb
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Control block layout: cancel flag, top-level branches in total, the shared
+# best-so-far bound (float64 bits), then one finished-branch counter per
+# partition starting at DONE
+CANCEL, TOTAL, BOUND, DONE = 0, 1, 2, 3
+CONTROL_SIZE = DONE + 1
+
+# How many branches to visit between cancel checks and bound exchanges
+CHECK_INTERVAL = 4096
+
+# Float tolerance when pruning against a bound, so rounding never drops a tie
+BOUND_SLACK = 1e-9
+
+class SearchCancelled(Exception):
+    """Raised inside a search whose control block has been flagged."""
+
+# Vendor name of flea market offers in trade data
+FLEA_MARKET = 'Flea Market'
+
+@dataclass
+class PriceArrays:
+    """Item ids with base and effective buy prices, aligned by index.
+
+    ``flea_only`` optionally flags items no trader sells.
+    """
+    item_ids: List[str]
+    base_prices: np.ndarray
+    buy_prices: np.ndarray
+    flea_only: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_items(cls, items: Sequence) -> 'PriceArrays':
+        """Build arrays from Item models, buying at the cheapest known offer.
+
+        One pass over the models fills preallocated arrays, so nothing
+        downstream touches a pydantic object until results are built.
+        """
+        count = len(items)
+        base_prices = np.empty(count, dtype=np.float64)
+        buy_prices = np.empty(count, dtype=np.float64)
+        flea_only = np.empty(count, dtype=bool)
+        for i, item in enumerate(items):
+            offers = item.buy_from
+            base_prices[i] = item.base_price
+            buy_prices[i] = min(p.price_rub for p in offers) if offers else item.base_price
+            flea_only[i] = all(p.vendor.name == FLEA_MARKET for p in offers)
+        return cls(
+            item_ids=[item.uid for item in items],
+            base_prices=base_prices,
+            buy_prices=buy_prices,
+            flea_only=flea_only
+        )
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict]) -> 'PriceArrays':
+        """Build arrays from ``item_id``/``base_price``/``buy_price`` records."""
+        return cls(
+            item_ids=[record['item_id'] for record in records],
+            base_prices=np.array([record['base_price'] for record in records], dtype=np.float64),
+            buy_prices=np.array([record['buy_price'] for record in records], dtype=np.float64),
+            flea_only=np.array([record.get('flea_only', False) for record in records], dtype=bool)
+        )
+
+    def changed_since(self, previous: 'PriceArrays') -> Optional[List[int]]:
+        """Indices whose prices differ from ``previous``, or None if the items differ."""
+        if self.item_ids != previous.item_ids:
+            return None
+        moved = (self.base_prices != previous.base_prices) | (self.buy_prices != previous.buy_prices)
+        return np.flatnonzero(moved).tolist()
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+def count_combinations(eligible: int, max_size: int) -> int:
+    """Number of combinations of 1..max_size items out of ``eligible``."""
+    return sum(comb(eligible, size) for size in range(1, max_size + 1))
+
+def control_size(partitions: int = 1) -> int:
+    """Number of int64 slots in a control block shared by ``partitions`` searches."""
+    return DONE + partitions
+
+def new_control(partitions: int = 1) -> np.ndarray:
+    """A zeroed control block for ``partitions`` searches, with no bound yet."""
+    control = np.zeros(control_size(partitions), dtype=np.int64)
+    reset_control(control)
+    return control
+
+def reset_control(control: np.ndarray) -> None:
+    """Clear progress and flags and drop the shared bound."""
+    control[:] = 0
+    control.view(np.float64)[BOUND] = -math.inf
+
+def search_progress(control: np.ndarray) -> float:
+    """Fraction of top-level branches finished across all partitions."""
+    total = int(control[TOTAL])
+    if not total:
+        return 0.0
+    return min(float(control[DONE:].sum()) / total, 1.0)
+
+def _reachable_totals(bases: List[float], slots: int) -> List[List[float]]:
+    """``reach[t][j]``: the largest base total of at most ``t`` items from ``j`` on."""
+    n = len(bases)
+    reach = [[0.0] * (n + 1)]
+    for _ in range(slots):
+        previous = reach[-1]
+        row = [0.0] * (n + 1)
+        for j in range(n - 1, -1, -1):
+            row[j] = max(row[j + 1], bases[j] + previous[j + 1])
+        reach.append(row)
+    return reach
+
+def merge_results(partials: Iterable[List[Dict]], max_results: int) -> List[Dict]:
+    """Combine per-partition results into the overall top ``max_results``.
+
+    The ordering matches ``search_combinations``, so the merge gives the
+    same answer however the search was split and whichever partition
+    finished first. Seeded combinations appear in every partition and are
+    kept once.
+    """
+    merged = {}
+    for partial in partials:
+        for result in partial:
+            merged.setdefault(tuple(result['indices']), result)
+    return sorted(merged.values(), key=_rank)[:max_results]
+
+def _rank(result: Dict) -> Tuple[float, List[int]]:
+    return (-result['profit_margin'], result['indices'])
+
+def _front(labels: List[tuple]) -> List[tuple]:
+    """Labels not beaten on both cost and value, cheapest first."""
+    labels.sort(key=lambda label: (label[0], -label[1], label[2]))
+    front = []
+    best_value = -math.inf
+    for label in labels:
+        if label[1] > best_value:
+            front.append(label)
+            best_value = label[1]
+    return front
+
+def pareto_front(
+    base_prices: np.ndarray,
+    buy_prices: np.ndarray,
+    eligible: Sequence[int],
+    locked: Sequence[int] = (),
+    max_items: int = 5,
+    min_total_value: float = 400000,
+    flea_only: Optional[np.ndarray] = None
+) -> List[Dict]:
+    """Combinations trading off buy cost, base value and item count.
+
+    Returns every combination reaching ``min_total_value`` that no other
+    beats on all three at once (lower or equal cost and count, higher or
+    equal value), one per distinct trade-off, cheapest first. Locked
+    indices are part of every combination and count towards its size.
+
+    Items are added one at a time, keeping per item count only the
+    partial combinations on the cost/value front: a partial combination
+    beaten on both by another of the same size can never complete into a
+    better one.
+    """
+    locked = list(locked)
+    if len(locked) >= max_items:
+        return []
+
+    base = base_prices.tolist()
+    buy = buy_prices.tolist()
+    # Sets by item count: (buy total, base total, eligible indices)
+    sets: List[List[tuple]] = [[] for _ in range(max_items + 1)]
+    sets[len(locked)] = [(
+        float(buy_prices[locked].sum()) if locked else 0.0,
+        float(base_prices[locked].sum()) if locked else 0.0,
+        ()
+    )]
+    for i in sorted(eligible):
+        for count in range(max_items, len(locked), -1):
+            if sets[count - 1]:
+                sets[count] = _front(sets[count] + [
+                    (cost + buy[i], value + base[i], indices + (i,))
+                    for cost, value, indices in sets[count - 1]
+                ])
+
+    candidates = sorted(
+        (cost, -value, count, indices)
+        for count in range(len(locked) + 1, max_items + 1)
+        for cost, value, indices in sets[count]
+        if value >= min_total_value
+    )
+    # Best value seen so far, all at a lower or equal cost, by item count
+    best_value = [-math.inf] * (max_items + 1)
+    front = []
+    for cost, negative_value, count, indices in candidates:
+        value = -negative_value
+        if best_value[count] >= value:
+            continue
+        for size in range(count, max_items + 1):
+            best_value[size] = max(best_value[size], value)
+        combination = locked + list(indices)
+        point = {
+            'indices': combination,
+            'total_buy_price': int(cost),
+            'total_base_price': int(value),
+            'item_count': count,
+            'profit_margin': (value - cost) / cost if cost else 0.0
+        }
+        if flea_only is not None:
+            point['flea_only_items'] = int(flea_only[combination].sum())
+        front.append(point)
+    return front
+
+def search_combinations(
+    base_prices: np.ndarray,
+    buy_prices: np.ndarray,
+    eligible: Sequence[int],
+    locked: Sequence[int] = (),
+    max_items: int = 5,
+    min_total_value: float = 400000,
+    max_results: int = 10,
+    control: Optional[np.ndarray] = None,
+    partition: int = 0,
+    partitions: int = 1,
+    seed: Iterable[Sequence[int]] = (),
+    bound: float = -math.inf
+) -> List[Dict]:
+    """Find the ``max_results`` most profitable combinations of ``eligible`` indices.
+
+    Every combination holds the locked indices plus at least one eligible
+    index, at most ``max_items`` in all, and must reach
+    ``min_total_value``. Results are ranked by profit margin, ties by
+    their indices, and returned as plain dicts of indices and totals so
+    they cross process boundaries cheaply.
+
+    The search is a depth-first branch and bound over the eligible items
+    ordered by base/buy ratio. A combination's ratio never exceeds the
+    best ratio among its parts, so once the K-th best margin found is out
+    of reach for a branch, that branch and all later siblings are skipped.
+
+    ``partition``/``partitions`` restrict the search to the branches whose
+    first item sits at ``partition`` modulo ``partitions`` in that order;
+    ``merge_results`` over all partitions gives exactly the unpartitioned
+    answer. ``control`` is an optional block from ``new_control`` used to
+    report progress, observe cancellation and, when partitions share it,
+    prune against each other's K-th best margin through ``BOUND``.
+
+    ``seed`` warm-starts the search with combinations (as index lists),
+    typically the previous answer before a price refresh. They are priced
+    afresh and ranked first, so the search starts from a near-final bound
+    and only explores branches that could still beat them. Seeds that no
+    longer qualify are ignored; the answer is the same with or without.
+    ``bound`` is a margin already known to be reached by ``max_results``
+    other combinations; nothing below it is returned.
+    """
+    locked = list(locked)
+    slots = max_items - len(locked)
+    if slots <= 0 or max_results <= 0:
+        return []
+
+    locked_base = float(base_prices[locked].sum()) if locked else 0.0
+    locked_buy = float(buy_prices[locked].sum()) if locked else 0.0
+    base = base_prices.tolist()
+    buy = buy_prices.tolist()
+
+    # Items with no buy price have no margin to rank by
+    order = sorted(
+        (i for i in eligible if buy[i] > 0),
+        key=lambda i: (-base[i] / buy[i], i)
+    )
+    n = len(order)
+    item_base = [base[i] for i in order]
+    item_buy = [buy[i] for i in order]
+    item_ratio = [b / c for b, c in zip(item_base, item_buy)]
+    position = {index: j for j, index in enumerate(order)}
+    reach = _reachable_totals(item_base, slots)
+    branches = range(partition, n, partitions)
+
+    shared = control.view(np.float64) if control is not None else None
+    done_slot = DONE + partition
+    if control is not None:
+        control[TOTAL] = n
+        control[done_slot] = 0
+
+    # Sorted (-margin, indices, base total, buy total), best first
+    best: List[tuple] = []
+    # Margins below this cannot make the top K
+    threshold = bound
+    visited = 0
+
+    def sync() -> None:
+        nonlocal threshold
+        if control[CANCEL]:
+            raise SearchCancelled()
+        bound = shared[BOUND]
+        if len(best) >= max_results and -best[-1][0] > bound:
+            # Racing writers can only lower the bound back to another
+            # worker's K-th best, which is still a valid lower bound
+            bound = shared[BOUND] = -best[-1][0]
+        threshold = max(threshold, bound)
+
+    def record(base_total: float, buy_total: float, chosen: List[int]) -> None:
+        nonlocal threshold
+        margin = (base_total - buy_total) / buy_total
+        if margin < threshold:
+            return
+        entry = (-margin, locked + sorted(order[j] for j in chosen), base_total, buy_total)
+        if len(best) >= max_results and entry >= best[-1]:
+            return
+        at = bisect_left(best, entry)
+        if at < len(best) and best[at] == entry:
+            # Already recorded as a seed
+            return
+        best.insert(at, entry)
+        if len(best) > max_results:
+            best.pop()
+        if len(best) >= max_results:
+            threshold = max(threshold, -best[-1][0])
+
+    def visit(j: int, base_total: float, buy_total: float, chosen: List[int], slots_left: int) -> bool:
+        """Search the branch adding position ``j``; False if it and later ones are out of reach."""
+        nonlocal visited
+        if buy_total > 0:
+            current = base_total / buy_total
+        else:
+            current = math.inf if base_total > 0 else 0.0
+        # Ratios only fall and reachable totals only shrink further along
+        if max(current, item_ratio[j]) - 1 < threshold - BOUND_SLACK:
+            return False
+        if base_total + reach[slots_left][j] < min_total_value:
+            return False
+
+        visited += 1
+        if control is not None and visited % CHECK_INTERVAL == 0:
+            sync()
+
+        base_total += item_base[j]
+        buy_total += item_buy[j]
+        chosen.append(j)
+        if base_total >= min_total_value:
+            record(base_total, buy_total, chosen)
+        if slots_left > 1:
+            for k in range(j + 1, n):
+                if not visit(k, base_total, buy_total, chosen, slots_left - 1):
+                    break
+        chosen.pop()
+        return True
+
+    locked_set = set(locked)
+    for combo in seed:
+        chosen = sorted(position[i] for i in set(combo) - locked_set if i in position)
+        if not chosen or len(chosen) > slots or not locked_set.issubset(combo) \
+                or len(chosen) + len(locked_set) != len(set(combo)):
+            continue
+        # Sum in search order so a seed and its rediscovery compare equal
+        base_total, buy_total = locked_base, locked_buy
+        for j in chosen:
+            base_total += item_base[j]
+            buy_total += item_buy[j]
+        if base_total >= min_total_value:
+            record(base_total, buy_total, chosen)
+
+    for finished, j in enumerate(branches):
+        if not visit(j, locked_base, locked_buy, [], slots):
+            break
+        if control is not None:
+            control[done_slot] = finished + 1
+
+    if control is not None:
+        control[done_slot] = len(branches)
+        if len(best) >= max_results and -best[-1][0] > shared[BOUND]:
+            shared[BOUND] = -best[-1][0]
+
+    return [
+        {
+            'indices': indices,
+            'total_buy_price': int(buy_total),
+            'total_base_price': int(base_total),
+            'profit_margin': -negative_margin
+        }
+        for negative_margin, indices, base_total, buy_total in best
+    ]
+
+def _priced(
+    indices: Sequence[int],
+    locked: List[int],
+    base_prices: np.ndarray,
+    buy_prices: np.ndarray,
+    min_total_value: float
+) -> Optional[Dict]:
+    """A combination's result, summed in search order, or None if it falls short."""
+    base = base_prices.tolist()
+    buy = buy_prices.tolist()
+    chosen = sorted(set(indices) - set(locked), key=lambda i: (-base[i] / buy[i], i))
+    base_total = float(base_prices[locked].sum()) if locked else 0.0
+    buy_total = float(buy_prices[locked].sum()) if locked else 0.0
+    for i in chosen:
+        base_total += base[i]
+        buy_total += buy[i]
+    if base_total < min_total_value:
+        return None
+    return {
+        'indices': locked + sorted(chosen),
+        'total_buy_price': int(buy_total),
+        'total_base_price': int(base_total),
+        'profit_margin': (base_total - buy_total) / buy_total
+    }
+
+def update_combinations(
+    previous: List[Dict],
+    changed: Iterable[int],
+    base_prices: np.ndarray,
+    buy_prices: np.ndarray,
+    eligible: Sequence[int],
+    locked: Sequence[int] = (),
+    max_items: int = 5,
+    min_total_value: float = 400000,
+    max_results: int = 10
+) -> List[Dict]:
+    """Bring ``previous`` up to date after the prices of ``changed`` indices moved.
+
+    ``previous`` is the ``search_combinations`` answer for the same indices
+    and parameters at the old prices. Combinations without a changed item
+    keep their margins, so while ``max_results`` of the previous answer
+    are untouched, the K-th of them bounds everything else that is
+    untouched, and only combinations containing a changed item are
+    searched, against that bound. Otherwise this falls back to a full
+    search seeded with the previous answer. Either way the result equals
+    a fresh ``search_combinations`` call.
+    """
+    locked = list(locked)
+    changed = set(changed)
+    survivors = [result for result in previous if changed.isdisjoint(result['indices'])]
+    if not changed.isdisjoint(locked) or (
+        len(previous) >= max_results and len(survivors) < max_results
+    ):
+        return search_combinations(
+            base_prices, buy_prices, eligible, locked,
+            max_items=max_items,
+            min_total_value=min_total_value,
+            max_results=max_results,
+            seed=[result['indices'] for result in previous]
+        )
+
+    buy = buy_prices.tolist()
+    candidates = {tuple(result['indices']) for result in survivors}
+    # Negated so the best margins sort first with a plain insort
+    margins = sorted(-result['profit_margin'] for result in survivors)
+    eligible = [i for i in eligible if buy[i] > 0]
+    excluded = set()
+    for index in sorted(changed.intersection(eligible)):
+        # Combinations whose first changed item is ``index``
+        excluded.add(index)
+        if len(locked) < max_items:
+            candidates.add(tuple(locked + [index]))
+        bound = -margins[max_results - 1] - BOUND_SLACK if len(margins) >= max_results else -math.inf
+        for result in search_combinations(
+            base_prices, buy_prices,
+            [i for i in eligible if i not in excluded],
+            locked + [index],
+            max_items=max_items,
+            min_total_value=min_total_value,
+            max_results=max_results,
+            bound=bound
+        ):
+            candidates.add(tuple(result['indices']))
+            insort(margins, -result['profit_margin'])
+
+    results = [
+        result for result in (
+            _priced(indices, locked, base_prices, buy_prices, min_total_value)
+            for indices in candidates
+        )
+        if result is not None
+    ]
+    results.sort(key=_rank)
+    return results[:max_results]
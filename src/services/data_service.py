@@ -4,6 +4,7 @@ import requests
 from datetime import datetime
 from src.core.neo4j import Neo4jClient
 from src.models.item import Item
+from src.services.price_adjustments import price_adjustments
 from src.graphql.queries import QUERIES
 
 logger = logging.getLogger(__name__)
@@ -60,9 +61,14 @@ class DataService:
     ) -> List[Dict[str, Any]]:
         """Find optimal item combinations"""
         with self.neo4j as client:
+            stamp = client.get_adjustment_version()
+            if price_adjustments.needs_reload(stamp):
+                price_adjustments.load(client.get_price_adjustments(), stamp)
             return client.find_optimal_combinations(
                 min_total=min_price,
-                max_items=max_items
+                max_items=max_items,
+                overrides=price_adjustments.overrides(),
+                blacklisted=sorted(price_adjustments.blacklisted_ids())
             )
 
     def get_history(
@@ -83,6 +89,15 @@ class DataService:
         with self.neo4j as client:
             return client.save_combination(items, total_price)
 
+    def save_combinations(
+        self,
+        combinations: List[Dict[str, Any]],
+        compact: bool = True
+    ) -> List[str]:
+        """Save many combinations in one transaction"""
+        with self.neo4j as client:
+            return client.save_combinations(combinations, compact)
+
     def delete_combination(self, combination_id: str) -> None:
         """Delete a combination"""
         with self.neo4j as client:
@@ -96,7 +111,8 @@ class DataService:
     ) -> None:
         """Set a price override"""
         with self.neo4j as client:
-            client.set_price_override(item_id, price, duration)
+            stamp = client.set_price_override(item_id, price, duration)
+        price_adjustments.set_override(item_id, price, duration, stamp)
 
     def set_blacklist(
         self,
@@ -106,7 +122,8 @@ class DataService:
     ) -> None:
         """Set item blacklist status"""
         with self.neo4j as client:
-            client.set_blacklist(item_id, blacklisted, duration)
+            stamp = client.set_blacklist(item_id, blacklisted, duration)
+        price_adjustments.set_blacklist(item_id, blacklisted, duration, stamp)
 
     def set_lock(
         self,
@@ -116,4 +133,5 @@ class DataService:
     ) -> None:
         """Set item lock status"""
         with self.neo4j as client:
-            client.set_lock(item_id, locked, duration)
\ No newline at end of file
+            stamp = client.set_lock(item_id, locked, duration)
+        price_adjustments.set_lock(item_id, locked, duration, stamp)
\ No newline at end of file
@@ -7,6 +7,8 @@ from github.PaginatedList import PaginatedList
 from github.GitRelease import GitRelease
 from github.GithubObject import GitHubObject
 
+from src.core.providers import ServiceProvider
+
 logger = logging.getLogger(__name__)
 
 class GitHubService:
@@ -91,5 +93,5 @@ class GitHubService:
             labels=labels
         )
 
-# Global instance
-github_service = GitHubService()
\ No newline at end of file
+# Global instance, connected to GitHub on first use
+github_service = ServiceProvider(GitHubService)
\ No newline at end of file
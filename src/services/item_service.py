@@ -1,28 +1,108 @@
 """Item service with relationship and market data handling."""
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Sequence
 from datetime import datetime
 import logging
 
 from src.database.neo4j import db
-from src.models.item import Item, ItemCreate, ItemUpdate, PriceEntry
-from src.models.models import (
-    Item as ItemNode, PriceHistory, Trade, 
-    Armor, Material, WeaponStats
-)
+from src.models.item import Item, ItemAdjustment, ItemCreate, ItemUpdate, PriceEntry
 from src.services.base import BaseService
+from src.services.price_adjustments import BLACKLIST, LOCK, OVERRIDE, price_adjustments
 from src.database.exceptions import DatabaseError
+from src.database.warmup import warmup_registry
 
 logger = logging.getLogger(__name__)
 
+# Most results one search returns, whatever the caller asks for
+MAX_SEARCH_LIMIT = 100
+
+CRAFT_ANALYSIS_QUERY = """
+MATCH (i:Item)<-[:PRODUCES]-(c:Trade {type: 'craft'})
+MATCH (c)-[r:REQUIRES]->(req:Item)
+WITH i, c, collect({
+    item: req,
+    count: toInteger(r.count)
+}) as requirements
+MATCH (i)-[:CAN_SELL_TO]->(st:Trade)
+WITH i, c, requirements, max(st.priceRUB) as sell_price
+WHERE $min_profit IS NULL OR sell_price - reduce(
+    cost = 0,
+    r IN requirements |
+    cost + r.item.last_low_price * r.count
+) >= $min_profit
+RETURN i.name as item_name,
+       i.uid as item_id,
+       c.station as station,
+       c.level as level,
+       requirements,
+       sell_price,
+       sell_price - reduce(
+           cost = 0,
+           r IN requirements |
+           cost + r.item.last_low_price * r.count
+       ) as profit,
+       c.duration as duration
+ORDER BY profit DESC
+"""
+
+BARTER_TRADES_QUERY = """
+MATCH (i:Item {uid: $item_id})<-[:GIVES]-(b:Trade {type: 'barter'})
+MATCH (b)-[r:REQUIRES]->(req:Item)
+MATCH (b)-[:AVAILABLE_AT]->(v:Vendor)
+RETURN v.name as vendor_name,
+       collect({
+           name: req.name,
+           quantity: r.count,
+           base_price: req.base_price
+       }) as requirements
+"""
+
+OPTIMIZATION_CANDIDATES_QUERY = """
+MATCH (i:Item)
+WHERE i.base_price IS NOT NULL
+OPTIONAL MATCH (i)-[:CAN_BUY_FROM]->(bt:Trade)-[:FROM_VENDOR]->(v:Vendor)
+WITH i,
+     min(bt.priceRUB) as trader_price,
+     count(CASE WHEN v.name <> 'Flea Market' THEN 1 END) as trader_offers
+RETURN i.uid as item_id,
+       i.name as name,
+       i.base_price as base_price,
+       coalesce(trader_price, i.last_low_price, i.base_price) as buy_price,
+       trader_offers = 0 as flea_only
+ORDER BY i.uid
+"""
+
+PRICE_ADJUSTMENTS_QUERY = """
+MATCH (i:Item)
+WHERE i.priceOverride IS NOT NULL
+   OR coalesce(i.blacklisted, false)
+   OR coalesce(i.locked, false)
+RETURN i.uid as item_id,
+       i.priceOverride as price_override,
+       i.priceOverrideExpires as override_expires,
+       coalesce(i.blacklisted, false) as blacklisted,
+       i.blacklistExpires as blacklist_expires,
+       coalesce(i.locked, false) as locked,
+       i.lockExpires as lock_expires
+"""
+
+ADJUSTMENT_VERSION_QUERY = """
+OPTIONAL MATCH (s:PriceSnapshot {key: 'adjustments'})
+RETURN coalesce(s.version, 0) as version
+"""
+
 class ItemService(BaseService):
     """Service for managing items and their relationships."""
 
     def __init__(self):
+        # neomodel is heavy; load it with the first service, not at import
+        from src.models.models import Item as ItemNode
         self.db = db
         self.model_class = ItemNode
 
     async def create_item(self, item: ItemCreate) -> Item:
         """Create a new item with all its relationships."""
+        from src.models.models import Armor, Item as ItemNode, Material, WeaponStats
+
         try:
             # Create base item node
             item_data = item.model_dump()
@@ -56,6 +136,8 @@ class ItemService(BaseService):
 
     async def update_market_data(self, item_id: str, price_entry: PriceEntry) -> None:
         """Update item's price history and market data."""
+        from src.models.models import Item as ItemNode, PriceHistory
+
         try:
             item = ItemNode.nodes.get(uid=item_id)
             
@@ -103,20 +185,16 @@ class ItemService(BaseService):
         """
         return await self._execute_query(query, {"item_id": item_id})
 
+    async def find_profitable_crafts(self, min_profit: Optional[float] = 10000) -> List[Dict[str, Any]]:
+        """Crafts whose best trader sell price beats their inputs by ``min_profit``.
+
+        None returns every craft, most profitable first.
+        """
+        return await self._execute_query(CRAFT_ANALYSIS_QUERY, {"min_profit": min_profit})
+
     async def get_barter_trades(self, item_id: str) -> List[Dict[str, Any]]:
         """Get barter trades involving an item."""
-        query = """
-        MATCH (i:Item {uid: $item_id})<-[:GIVES]-(b:Trade {type: 'barter'})
-        MATCH (b)-[r:REQUIRES]->(req:Item)
-        MATCH (b)-[:AVAILABLE_AT]->(v:Vendor)
-        RETURN v.name as vendor_name,
-               collect({
-                   name: req.name,
-                   quantity: r.count,
-                   base_price: req.base_price
-               }) as requirements
-        """
-        return await self._execute_query(query, {"item_id": item_id})
+        return await self._execute_query(BARTER_TRADES_QUERY, {"item_id": item_id})
 
     async def calculate_profit_margin(self, item_id: str) -> Dict[str, float]:
         """Calculate potential profit margins for an item."""
@@ -137,3 +215,202 @@ class ItemService(BaseService):
         ORDER BY profit DESC
         """
         return await self._execute_query(query, {"item_id": item_id})
+
+    async def search_items(
+        self,
+        search: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: int = 20,
+        properties: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Search items by name, category and price range.
+
+        Only ``properties`` are returned when given, otherwise the whole node.
+        ``limit`` is clamped to 1..MAX_SEARCH_LIMIT.
+        """
+        limit = min(max(int(limit), 1), MAX_SEARCH_LIMIT)
+        query = f"""
+        MATCH (i:Item)
+        WHERE ($search IS NULL OR toLower(i.name) CONTAINS toLower($search))
+        AND ($category IS NULL OR i.category = $category)
+        AND ($min_price IS NULL OR coalesce(i.last_low_price, i.base_price) >= $min_price)
+        AND ($max_price IS NULL OR coalesce(i.last_low_price, i.base_price) <= $max_price)
+        RETURN {self._map_projection('i', properties)} as item
+        ORDER BY i.name
+        LIMIT $limit
+        """
+        records = await self._execute_query(query, {
+            "search": search,
+            "category": category,
+            "min_price": min_price,
+            "max_price": max_price,
+            "limit": limit
+        })
+        return [record['item'] for record in records]
+
+    async def get_optimization_candidates(self) -> List[Dict[str, Any]]:
+        """Prices of every item the combination optimizer may pick.
+
+        The effective buy price is the cheapest offer, else the flea price,
+        else the base price. ``flea_only`` marks items no trader sells.
+        Overrides, blacklists and locks are applied on top by
+        ``price_adjustments``, which also tracks when they expire.
+        """
+        return await self._execute_query(OPTIMIZATION_CANDIDATES_QUERY)
+
+    async def get_price_adjustments(self) -> List[Dict[str, Any]]:
+        """Every item with a price override, blacklist or lock, and their expiries."""
+        return await self._execute_query(PRICE_ADJUSTMENTS_QUERY)
+
+    async def get_adjustment_version(self) -> int:
+        """Version stamp ``apply_adjustments`` bumps with every batch.
+
+        Read it before ``get_price_adjustments`` so a batch landing in
+        between shows up as a newer stamp on the next check.
+        """
+        result = await self._execute_query(ADJUSTMENT_VERSION_QUERY, single_result=True)
+        return result.get('version', 0)
+
+    async def create_price_override(self, item_id: str, price: float, duration: Optional[int] = None) -> None:
+        """Override an item's buy price, for ``duration`` minutes if given."""
+        await self.apply_adjustments([ItemAdjustment(item_id=item_id, price=price, duration=duration)])
+
+    async def blacklist_item(self, item_id: str, duration: Optional[int] = None) -> None:
+        """Keep an item out of combinations, for ``duration`` minutes if given."""
+        await self.apply_adjustments([ItemAdjustment(item_id=item_id, blacklisted=True, duration=duration)])
+
+    async def remove_from_blacklist(self, item_id: str) -> None:
+        await self.apply_adjustments([ItemAdjustment(item_id=item_id, blacklisted=False)])
+
+    async def apply_adjustments(self, changes: Sequence[ItemAdjustment]) -> List[str]:
+        """Apply price override, blacklist and lock changes in one statement.
+
+        The whole batch is one ``UNWIND`` transaction that also bumps the
+        adjustment version, and the in-memory adjustment layer (and with
+        it the optimiser cache) is updated once afterwards; other workers
+        reload theirs when they see the new version. Returns the ids of
+        the items that exist.
+        """
+        if not changes:
+            return []
+
+        result = await self._execute_query(
+            """
+            UNWIND $changes AS change
+            MATCH (i:Item {uid: change.item_id})
+            WITH i, change,
+                 CASE WHEN change.duration IS NULL THEN null
+                      ELSE datetime() + duration({minutes: change.duration}) END as expires
+            FOREACH (_ IN CASE WHEN change.sets_price THEN [1] ELSE [] END |
+                SET i.priceOverride = change.price,
+                    i.priceOverrideExpires = CASE WHEN change.price IS NULL THEN null ELSE expires END)
+            FOREACH (_ IN CASE WHEN change.blacklisted IS NOT NULL THEN [1] ELSE [] END |
+                SET i.blacklisted = change.blacklisted,
+                    i.blacklistExpires = expires)
+            FOREACH (_ IN CASE WHEN change.locked IS NOT NULL THEN [1] ELSE [] END |
+                SET i.locked = change.locked,
+                    i.lockExpires = expires)
+            WITH collect(DISTINCT i.uid) as item_ids
+            MERGE (s:PriceSnapshot {key: 'adjustments'})
+            SET s.version = coalesce(s.version, 0) + 1
+            RETURN item_ids, s.version as version
+            """,
+            {"changes": [
+                {**change.model_dump(), "sets_price": change.sets_price} for change in changes
+            ]},
+            single_result=True
+        )
+        found = set(result.get('item_ids') or [])
+
+        layer_changes = []
+        for change in changes:
+            if change.item_id not in found:
+                continue
+            if change.sets_price:
+                layer_changes.append((OVERRIDE, change.item_id, change.price, change.duration))
+            if change.blacklisted is not None:
+                layer_changes.append((BLACKLIST, change.item_id, change.blacklisted or None, change.duration))
+            if change.locked is not None:
+                layer_changes.append((LOCK, change.item_id, change.locked or None, change.duration))
+        price_adjustments.apply_changes(layer_changes, result.get('version'))
+        return sorted(found)
+
+    async def merge_static_items(self, rows: List[Dict[str, Any]]) -> int:
+        """Merge static item data from the ``full-static`` query profile.
+
+        Each statement handles the whole batch with UNWIND; prices and
+        trader offers are merged separately by their own profiles.
+        """
+        if not rows:
+            return 0
+
+        result = await self._execute_query(
+            """
+            UNWIND $rows AS row
+            MERGE (i:Item {uid: row.id})
+            ON CREATE SET i.created_at = datetime()
+            SET i.name = row.name,
+                i.short_name = row.shortName,
+                i.width = row.width,
+                i.height = row.height,
+                i.weight = row.weight,
+                i.icon_link = row.iconLink,
+                i.image_link = row.imageLink,
+                i.wiki_link = row.wikiLink,
+                i.types = row.types,
+                i.category = coalesce(row.category.name, i.category),
+                i.updated_at = datetime()
+            RETURN count(i) as merged
+            """,
+            {"rows": rows},
+            single_result=True
+        )
+        await self._execute_query(
+            """
+            UNWIND $rows AS row
+            WITH row, row.properties.armor AS armor
+            WHERE armor IS NOT NULL
+            MATCH (i:Item {uid: row.id})
+            MERGE (i)-[:HAS_ARMOR]->(a:Armor)
+            ON CREATE SET a.uid = randomUUID(), a.created_at = datetime()
+            SET a.class_level = armor.class,
+                a.zones = armor.zones,
+                a.durability = armor.durability
+            WITH a, armor
+            WHERE armor.material IS NOT NULL
+            MERGE (m:Material {name: armor.material.name})
+            ON CREATE SET m.uid = randomUUID(), m.created_at = datetime()
+            SET m.destructibility = armor.material.destructibility
+            MERGE (a)-[:MADE_OF]->(m)
+            """,
+            {"rows": rows}
+        )
+        await self._execute_query(
+            """
+            UNWIND $rows AS row
+            WITH row, row.properties.weaponStats AS stats
+            WHERE stats IS NOT NULL
+            MATCH (i:Item {uid: row.id})
+            MERGE (i)-[:HAS_STATS]->(w:WeaponStats)
+            ON CREATE SET w.uid = randomUUID(), w.created_at = datetime()
+            SET w.caliber = stats.caliber,
+                w.firerate = stats.firerate,
+                w.ergonomics = stats.ergonomics,
+                w.recoil_vertical = stats.recoilVertical,
+                w.recoil_horizontal = stats.recoilHorizontal
+            """,
+            {"rows": rows}
+        )
+        return result.get('merged', 0)
+
+# Statements behind the optimiser, craft analysis and item pages
+warmup_registry.register('items.optimization_candidates', OPTIMIZATION_CANDIDATES_QUERY)
+warmup_registry.register('items.price_adjustments', PRICE_ADJUSTMENTS_QUERY)
+warmup_registry.register('items.adjustment_version', ADJUSTMENT_VERSION_QUERY)
+warmup_registry.register('items.craft_analysis', CRAFT_ANALYSIS_QUERY, {'min_profit': 10000})
+warmup_registry.register(
+    'items.barter_trades', BARTER_TRADES_QUERY,
+    lambda item_ids: {'item_id': item_ids[0] if item_ids else ''}
+)
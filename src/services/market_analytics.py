@@ -0,0 +1,159 @@
+"""Vectorised market analytics over price-history arrays."""
+from typing import Dict, List, Optional, Sequence, Tuple
+import time
+
+import numpy as np
+
+from src.models.item import MarketData
+
+# (prices, epoch-second timestamps, volume weights) for a single item,
+# ordered oldest to newest.
+PriceSeries = Tuple[Sequence[float], Sequence[float], Sequence[float]]
+
+class PriceSeriesBatch:
+    """Price series for many items packed into left-aligned 2D arrays.
+
+    Rows are items, columns are observations. Missing observations are
+    NaN in ``prices``/``timestamps`` and zero in ``weights`` so every
+    statistic can be computed across all items at once.
+    """
+
+    def __init__(self, series: Dict[str, PriceSeries]):
+        self.item_ids: List[str] = list(series)
+        width = max((len(prices) for prices, _, _ in series.values()), default=0)
+        shape = (len(self.item_ids), max(width, 1))
+
+        self.prices = np.full(shape, np.nan)
+        self.timestamps = np.full(shape, np.nan)
+        self.weights = np.zeros(shape)
+        self.lengths = np.zeros(len(self.item_ids), dtype=np.int64)
+
+        for row, item_id in enumerate(self.item_ids):
+            prices, timestamps, weights = series[item_id]
+            count = len(prices)
+            self.lengths[row] = count
+            if count:
+                self.prices[row, :count] = prices
+                self.timestamps[row, :count] = timestamps
+                self.weights[row, :count] = weights if len(weights) == count else 1.0
+
+class MarketAnalytics:
+    """Batch trend analytics computed in one vectorised pass per request."""
+
+    def __init__(self, ema_span: int = 12, anomaly_z: float = 3.0):
+        self.ema_alpha = 2.0 / (ema_span + 1)
+        self.anomaly_z = anomaly_z
+
+    def analyze(
+        self,
+        series: Dict[str, PriceSeries],
+        timeframe_hours: int = 24,
+        now: Optional[float] = None
+    ) -> Dict[str, MarketData]:
+        """Compute trend statistics for every item in ``series``."""
+        if not series:
+            return {}
+
+        now = time.time() if now is None else now
+        batch = PriceSeriesBatch(series)
+
+        window = self._window_mask(batch, now - timeframe_hours * 3600)
+        prices = np.where(window, batch.prices, np.nan)
+        weights = np.where(window, batch.weights, 0.0)
+        counts = window.sum(axis=1)
+        has_data = counts > 0
+
+        last = self._last_valid(batch.prices, batch.lengths)
+        change_24h = self._change_since(batch, last, now - 24 * 3600)
+        change_48h = self._change_since(batch, last, now - 48 * 3600)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            low = np.nanmin(np.where(has_data[:, None], prices, 0.0), axis=1)
+            high = np.nanmax(np.where(has_data[:, None], prices, 0.0), axis=1)
+            mean = np.nanmean(np.where(has_data[:, None], prices, 0.0), axis=1)
+            std = np.zeros(len(batch.item_ids))
+            multi = counts > 1
+            if multi.any():
+                std[multi] = np.nanstd(prices[multi], axis=1, ddof=1)
+            volatility = np.where(mean > 0, std / mean, 0.0)
+
+            weight_total = weights.sum(axis=1)
+            vwap = np.where(
+                weight_total > 0,
+                np.nansum(np.nan_to_num(prices) * weights, axis=1) / weight_total,
+                mean
+            )
+            z_score = np.where(std > 0, (last - mean) / std, 0.0)
+
+        ema = self._ema(prices, counts)
+
+        results: Dict[str, MarketData] = {}
+        for row, item_id in enumerate(batch.item_ids):
+            if not has_data[row]:
+                results[item_id] = MarketData()
+                continue
+            results[item_id] = MarketData(
+                change_24h=float(change_24h[row]),
+                change_48h=float(change_48h[row]),
+                low_24h=int(low[row]),
+                high_24h=int(high[row]),
+                volume_24h=int(counts[row]),
+                volatility_score=float(volatility[row]),
+                ema=float(ema[row]),
+                vwap=float(vwap[row]),
+                z_score=float(z_score[row]),
+                is_anomaly=bool(abs(z_score[row]) >= self.anomaly_z)
+            )
+        return results
+
+    @staticmethod
+    def _window_mask(batch: PriceSeriesBatch, since: float) -> np.ndarray:
+        """Boolean mask of observations recorded at or after ``since``."""
+        with np.errstate(invalid='ignore'):
+            return ~np.isnan(batch.prices) & (batch.timestamps >= since)
+
+    @staticmethod
+    def _last_valid(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        """Most recent observation per row (NaN for empty rows)."""
+        rows = np.arange(values.shape[0])
+        last = values[rows, np.maximum(lengths - 1, 0)]
+        return np.where(lengths > 0, last, np.nan)
+
+    def _change_since(
+        self,
+        batch: PriceSeriesBatch,
+        last: np.ndarray,
+        since: float
+    ) -> np.ndarray:
+        """Percent change from the first price at or after ``since`` to ``last``."""
+        window = self._window_mask(batch, since)
+        first_idx = np.argmax(window, axis=1)
+        rows = np.arange(batch.prices.shape[0])
+        first = batch.prices[rows, first_idx]
+        valid = window.any(axis=1) & (first > 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            change = (last - first) / first * 100
+        return np.where(valid, change, 0.0)
+
+    def _ema(self, prices: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Exponential moving average of each row's in-window observations.
+
+        Uses the closed form of the recursive EMA so no per-item loop is
+        needed: the k-th of n values is weighted ``alpha * (1 - alpha)**(n-1-k)``
+        and the oldest value carries the remaining ``(1 - alpha)**(n-1)``.
+        """
+        alpha = self.ema_alpha
+        valid = ~np.isnan(prices)
+        # Compact in-window values to the left so positions are 0..n-1.
+        order = np.argsort(~valid, axis=1, kind='stable')
+        packed = np.take_along_axis(np.nan_to_num(prices), order, axis=1)
+
+        positions = np.arange(prices.shape[1])[None, :]
+        age = counts[:, None] - 1 - positions
+        in_range = age >= 0
+        weights = np.where(in_range, alpha * (1 - alpha) ** np.maximum(age, 0), 0.0)
+        weights[:, 0] = np.where(counts > 0, (1 - alpha) ** np.maximum(counts - 1, 0), 0.0)
+        return (packed * weights).sum(axis=1)
+
+# Shared analytics engine
+market_analytics = MarketAnalytics()
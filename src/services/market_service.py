@@ -1,18 +1,111 @@
 """Market service for price tracking and analysis."""
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import logging
-import statistics
 
 from src.database.neo4j import db
 from src.models.item import Item, MarketData, PriceEntry
-from src.models.models import Item as ItemNode, PriceHistory, Trade
 from src.services.base import BaseService
+from src.services.market_analytics import market_analytics
+from src.services.rolling_stats import rolling_stats
+from src.services.market_statistics import market_statistics
+from src.services.trader_availability import AvailabilityIndex, PlayerProfile, trader_availability
+from src.core.snapshot import price_snapshot
+from src.core.websocket import MarketUpdate, manager as websocket_manager
 from src.database.exceptions import DatabaseError
+from src.database.warmup import warmup_registry
 from src.types.responses import PriceHistoryEntry
 
 logger = logging.getLogger(__name__)
 
+PRICE_HISTORY_QUERY = """
+MATCH (i:Item {uid: $item_id})-[:HAD_PRICE]->(ph:PriceHistory)
+WHERE datetime(ph.recorded_at) > datetime() - duration({days: $days})
+AND ($vendor IS NULL OR ph.vendor_name = $vendor)
+RETURN ph.price_rub as price,
+       ph.recorded_at as timestamp,
+       ph.vendor_name as vendor,
+       ph.currency,
+       ph.requires_quest
+ORDER BY ph.recorded_at
+"""
+
+TRENDS_QUERY = """
+UNWIND $item_ids AS item_id
+MATCH (i:Item {uid: item_id})-[:HAD_PRICE]->(ph:PriceHistory)
+WHERE datetime(ph.recorded_at) > datetime() - duration({hours: $hours})
+WITH item_id, ph
+ORDER BY ph.recorded_at
+RETURN item_id,
+       collect(ph.price_rub) as prices,
+       collect(datetime(ph.recorded_at).epochSeconds) as timestamps,
+       collect(coalesce(ph.restock_amount, 1)) as weights
+"""
+
+# recorded_at is written as a local UTC datetime; comparing the raw
+# property keeps the range scan on price_history_timestamp
+ROLLING_STATS_QUERY = """
+MATCH (i:Item)-[:HAD_PRICE]->(ph:PriceHistory)
+WHERE ph.recorded_at > $since
+WITH i, ph
+ORDER BY ph.recorded_at
+RETURN i.uid as item_id,
+       i.name as item_name,
+       collect(ph.price_rub) as prices,
+       collect(datetime(ph.recorded_at).epochSeconds) as timestamps,
+       collect(coalesce(ph.restock_amount, 1)) as weights
+"""
+
+# The last two prices of every item over its whole history, as
+# PRICE_CHANGES_QUERY compares them
+LAST_TWO_PRICES_QUERY = """
+MATCH (i:Item)-[:HAD_PRICE]->(ph:PriceHistory)
+WITH i, ph
+ORDER BY ph.recorded_at DESC
+WITH i, collect(ph)[0..2] as latest
+RETURN i.uid as item_id,
+       i.name as item_name,
+       [ph IN reverse(latest) | ph.price_rub] as prices,
+       datetime(latest[0].recorded_at).epochSeconds as changed_at
+"""
+
+PRICE_CHANGES_QUERY = """
+MATCH (i:Item)-[:HAD_PRICE]->(ph:PriceHistory)
+WITH i, ph
+ORDER BY ph.recorded_at DESC
+WITH i, collect(ph)[0] as latest, collect(ph)[1] as previous
+WHERE abs((latest.price_rub - previous.price_rub) / previous.price_rub * 100) >= $threshold
+RETURN i.name as item_name,
+       i.uid as item_id,
+       previous.price_rub as old_price,
+       latest.price_rub as new_price,
+       latest.recorded_at as changed_at,
+       ((latest.price_rub - previous.price_rub) / previous.price_rub * 100) as change_percent
+ORDER BY abs(change_percent) DESC
+"""
+
+MARKET_STATISTICS_QUERY = """
+MATCH (i:Item)
+WHERE i.last_low_price IS NOT NULL AND i.base_price IS NOT NULL
+WITH collect(i.last_low_price) as last_prices,
+     collect(i.base_price) as base_prices,
+     collect(coalesce(i.category, 'Uncategorized')) as categories
+OPTIONAL MATCH (s:PriceSnapshot {key: 'market'})
+RETURN last_prices, base_prices, categories,
+       coalesce(s.version, 0) as version
+"""
+
+SNAPSHOT_VERSION_QUERY = """
+OPTIONAL MATCH (s:PriceSnapshot {key: 'market'})
+RETURN coalesce(s.version, 0) as version
+"""
+
+LATEST_PRICES_QUERY = """
+MATCH (i:Item)
+WHERE i.uid IN $item_ids AND i.last_low_price IS NOT NULL
+RETURN i.uid as item_id, i.last_low_price as price
+"""
+
 class MarketService(BaseService):
     """Service for market analysis and price tracking."""
 
@@ -29,19 +122,8 @@ class MarketService(BaseService):
         vendor: Optional[str] = None
     ) -> List[PriceHistoryEntry]:
         """Get price history for an item."""
-        query = """
-        MATCH (i:Item {uid: $item_id})-[:HAD_PRICE]->(ph:PriceHistory)
-        WHERE datetime(ph.recorded_at) > datetime() - duration({days: $days})
-        AND ($vendor IS NULL OR ph.vendor_name = $vendor)
-        RETURN ph.price_rub as price,
-               ph.recorded_at as timestamp,
-               ph.vendor_name as vendor,
-               ph.currency,
-               ph.requires_quest
-        ORDER BY ph.recorded_at
-        """
         return await self._execute_query(
-            query,
+            PRICE_HISTORY_QUERY,
             {"item_id": item_id, "days": days, "vendor": vendor}
         )
 
@@ -51,42 +133,81 @@ class MarketService(BaseService):
         timeframe_hours: int = 24
     ) -> MarketData:
         """Analyze market trends for an item."""
-        query = """
-        MATCH (i:Item {uid: $item_id})-[:HAD_PRICE]->(ph:PriceHistory)
-        WHERE datetime(ph.recorded_at) > datetime() - duration({hours: $hours})
-        RETURN collect(ph.price_rub) as prices,
-               collect(ph.recorded_at) as timestamps
-        """
-        result = await self._execute_query(
-            query,
-            {"item_id": item_id, "hours": timeframe_hours},
-            single_result=True
-        )
-        
-        if not result or not result['prices']:
-            return MarketData()
-
-        prices = result['prices']
-        
-        # Calculate basic statistics
-        current = prices[-1]
-        previous = prices[0] if len(prices) > 1 else current
-        
-        return MarketData(
-            change_24h=((current - previous) / previous * 100) if previous else 0,
-            change_48h=((current - prices[0]) / prices[0] * 100) if len(prices) > 1 else 0,
-            low_24h=min(prices),
-            high_24h=max(prices),
-            volume_24h=len(prices),
-            volatility_score=statistics.stdev(prices) / statistics.mean(prices) if len(prices) > 1 else 0
+        if timeframe_hours == 24 and await self._ensure_rolling_stats():
+            return rolling_stats.trends(item_id)
+        trends = await self.analyze_market_trends_bulk([item_id], timeframe_hours)
+        return trends.get(item_id, MarketData())
+
+    async def analyze_market_trends_bulk(
+        self,
+        item_ids: List[str],
+        timeframe_hours: int = 24
+    ) -> Dict[str, MarketData]:
+        """Analyze market trends for many items in one query and one pass."""
+        if not item_ids:
+            return {}
+
+        results: Dict[str, MarketData] = {}
+        if timeframe_hours == 24 and await self._ensure_rolling_stats():
+            results = {
+                item_id: rolling_stats.trends(item_id)
+                for item_id in item_ids
+                if item_id in rolling_stats
+            }
+            item_ids = [item_id for item_id in item_ids if item_id not in results]
+            if not item_ids:
+                return results
+
+        # change_48h always needs two days of history, whatever the timeframe
+        records = await self._execute_query(
+            TRENDS_QUERY,
+            {"item_ids": list(item_ids), "hours": max(timeframe_hours, 48)}
         )
 
+        series = {item_id: ([], [], []) for item_id in item_ids}
+        for record in records:
+            series[record['item_id']] = (
+                record['prices'],
+                record['timestamps'],
+                record['weights']
+            )
+        results.update(market_analytics.analyze(series, timeframe_hours=timeframe_hours))
+        return results
+
+    async def _ensure_rolling_stats(self) -> bool:
+        """Hydrate rolling statistics from stored history when they are stale.
+
+        The ingesting process keeps them fresh through ``update_market_prices``;
+        other processes rebuild them at most once per cache period.
+        """
+        if rolling_stats.is_fresh(self._cache_duration):
+            return True
+
+        try:
+            rolling_stats.hydrate(
+                await self._execute_query(
+                    ROLLING_STATS_QUERY,
+                    {"since": datetime.utcnow() - timedelta(hours=48)}
+                ),
+                await self._execute_query(LAST_TWO_PRICES_QUERY)
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Rolling statistics hydration failed: {str(e)}")
+            return False
+
     async def find_arbitrage_opportunities(
         self,
         min_profit: float = 10000,
-        min_profit_percent: float = 10
+        min_profit_percent: float = 10,
+        profile: Optional[PlayerProfile] = None
     ) -> List[Dict[str, Any]]:
-        """Find profitable trading opportunities."""
+        """Find profitable trading opportunities.
+
+        With a ``profile``, only buy offers open to that player are kept;
+        each row is checked against the loyalty level and quest of its own
+        buy offer.
+        """
         query = """
         MATCH (i:Item)
         MATCH (i)-[:CAN_BUY_FROM]->(bt:Trade)-[:FROM_VENDOR]->(bv:Vendor)
@@ -99,40 +220,38 @@ class MarketService(BaseService):
                bv.name as buy_vendor,
                sv.name as sell_vendor,
                bt.priceRUB as buy_price,
+               bt.min_level as buy_min_level,
+               bt.task_unlock as buy_task_id,
                st.priceRUB as sell_price,
                st.priceRUB - bt.priceRUB as profit,
                ((st.priceRUB - bt.priceRUB) / bt.priceRUB * 100) as profit_percent
         ORDER BY profit DESC
         """
-        return await self._execute_query(
+        opportunities = await self._execute_query(
             query,
             {"min_profit": min_profit, "min_profit_percent": min_profit_percent}
         )
+        if profile is None or not profile.restricts:
+            return opportunities
+        return [
+            opp for opp in opportunities
+            if profile.can_buy(opp['buy_vendor'], opp['buy_min_level'], opp['buy_task_id'])
+        ]
 
     async def track_price_changes(
         self,
         threshold_percent: float = 5
     ) -> List[Dict[str, Any]]:
         """Track significant price changes."""
-        query = """
-        MATCH (i:Item)-[:HAD_PRICE]->(ph:PriceHistory)
-        WITH i, ph
-        ORDER BY ph.recorded_at DESC
-        WITH i, collect(ph)[0] as latest, collect(ph)[1] as previous
-        WHERE abs((latest.price_rub - previous.price_rub) / previous.price_rub * 100) >= $threshold
-        RETURN i.name as item_name,
-               i.uid as item_id,
-               previous.price_rub as old_price,
-               latest.price_rub as new_price,
-               latest.recorded_at as changed_at,
-               ((latest.price_rub - previous.price_rub) / previous.price_rub * 100) as change_percent
-        ORDER BY abs(change_percent) DESC
-        """
-        return await self._execute_query(query, {"threshold": threshold_percent})
+        if await self._ensure_rolling_stats():
+            return rolling_stats.price_changes(threshold_percent)
+
+        return await self._execute_query(PRICE_CHANGES_QUERY, {"threshold": threshold_percent})
 
     async def update_market_prices(self, prices: List[PriceEntry]) -> None:
         """Bulk update market prices."""
         try:
+            updates: List[MarketUpdate] = []
             for price in prices:
                 # Create trade record
                 trade_data = {
@@ -140,6 +259,8 @@ class MarketService(BaseService):
                     "vendor_name": price.vendor.name,
                     "currency": price.currency,
                     "requires_quest": price.requires_quest,
+                    # Stored so hydrating processes weight it as this one does
+                    "restock_amount": price.restock_amount or 1,
                     "recorded_at": datetime.utcnow()
                 }
                 
@@ -150,33 +271,263 @@ class MarketService(BaseService):
                 CREATE (i)-[:HAD_PRICE]->(ph)
                 WITH i, ph
                 SET i.last_low_price = $price_rub
+                RETURN i.uid as item_id, i.name as item_name
                 """
-                await self._execute_query(
+                record = await self._execute_query(
                     query,
-                    {"item_name": price.item_name, **trade_data}
+                    {
+                        "item_name": price.item_name,
+                        "price_data": trade_data,
+                        **trade_data
+                    },
+                    single_result=True
                 )
 
-            self._last_update = datetime.utcnow()
-            self._price_cache.clear()
+                # Keep rolling aggregates current without re-reading history
+                if record:
+                    rolling_stats.record(
+                        record['item_id'],
+                        price.price_rub,
+                        trade_data['recorded_at'].replace(tzinfo=timezone.utc).timestamp(),
+                        weight=trade_data['restock_amount'],
+                        item_name=record['item_name']
+                    )
+                    updates.append(MarketUpdate(
+                        item_id=record['item_id'],
+                        price=price.price_rub,
+                        timestamp=trade_data['recorded_at']
+                    ))
+
+            await self._complete_ingest(updates)
             
         except Exception as e:
             logger.error(f"Failed to update market prices: {str(e)}")
             raise DatabaseError(f"Market price update failed: {str(e)}")
 
-    async def get_market_statistics(self) -> Dict[str, Any]:
-        """Get overall market statistics."""
+    async def merge_item_prices(self, rows: List[Dict[str, Any]]) -> int:
+        """Merge flea market prices from the ``prices`` query profile.
+
+        One UNWIND statement updates every item and appends a PriceHistory
+        entry only where the lowest price actually moved.
+        """
+        recorded_at = datetime.utcnow()
         query = """
-        MATCH (i:Item)
-        WHERE exists(i.last_low_price) AND exists(i.base_price)
-        WITH count(i) as total_items,
-             avg(i.last_low_price) as avg_price,
-             sum(
-                CASE WHEN i.last_low_price > i.base_price
-                THEN 1 ELSE 0 END
-             ) as items_above_base
-        RETURN total_items,
-               avg_price,
-               items_above_base,
-               (items_above_base * 100.0 / total_items) as percent_above_base
+        UNWIND $rows AS row
+        MATCH (i:Item {uid: row.id})
+        WITH i, row, i.last_low_price AS previous
+        SET i.base_price = coalesce(row.basePrice, i.base_price),
+            i.last_low_price = coalesce(row.lastLowPrice, i.last_low_price),
+            i.avg_24h_price = row.avg24hPrice,
+            i.low_24h_price = row.low24h,
+            i.high_24h_price = row.high24h,
+            i.change_last_48h = row.changeLast48h,
+            i.updated_at = datetime()
+        WITH i, row, previous
+        WHERE row.lastLowPrice IS NOT NULL
+        AND (previous IS NULL OR previous <> row.lastLowPrice)
+        CREATE (ph:PriceHistory {
+            uid: randomUUID(),
+            price_rub: row.lastLowPrice,
+            vendor_name: 'Flea Market',
+            currency: 'RUB',
+            restock_amount: 1,
+            recorded_at: $recorded_at
+        })
+        CREATE (i)-[:HAD_PRICE]->(ph)
+        RETURN i.uid as item_id, i.name as item_name, row.lastLowPrice as price
+        """
+        try:
+            records = await self._execute_query(query, {"rows": rows, "recorded_at": recorded_at})
+        except Exception as e:
+            logger.error(f"Failed to merge item prices: {str(e)}")
+            raise DatabaseError(f"Item price merge failed: {str(e)}")
+
+        timestamp = recorded_at.replace(tzinfo=timezone.utc).timestamp()
+        updates: List[MarketUpdate] = []
+        for record in records:
+            rolling_stats.record(
+                record['item_id'],
+                record['price'],
+                timestamp,
+                item_name=record['item_name']
+            )
+            updates.append(MarketUpdate(
+                item_id=record['item_id'],
+                price=record['price'],
+                timestamp=recorded_at
+            ))
+        await self._complete_ingest(updates)
+        return len(records)
+
+    async def merge_trade_offers(self, rows: List[Dict[str, Any]]) -> int:
+        """Merge trader buy/sell offers from the ``trading`` query profile.
+
+        An offer is keyed by item, direction, vendor, loyalty level and
+        quest, so a trader selling an item at several levels keeps one
+        Trade per level. Offers of the synced items that the upstream no
+        longer lists are deleted.
         """
-        return await self._execute_query(query, single_result=True)
+        synced_at = datetime.now(timezone.utc)
+        offers = [
+            {
+                "item_id": row['id'],
+                "direction": direction,
+                "vendor": offer['vendor']['name'],
+                "source": offer.get('source'),
+                "price": offer.get('price'),
+                "currency": offer.get('currency'),
+                "price_rub": offer.get('priceRUB'),
+                "min_level": offer['vendor'].get('minTraderLevel'),
+                "task_id": (offer['vendor'].get('taskUnlock') or {}).get('id')
+            }
+            for row in rows
+            for direction, key in (('buy', 'buyFor'), ('sell', 'sellFor'))
+            for offer in row.get(key) or []
+            if offer.get('vendor')
+        ]
+        if not rows:
+            return 0
+
+        query = """
+        UNWIND $offers AS offer
+        MATCH (i:Item {uid: offer.item_id})
+        MERGE (t:Trade {trade_key: offer.item_id + ':' + offer.direction + ':' + offer.vendor
+                                   + ':' + coalesce(toString(offer.min_level), '')
+                                   + ':' + coalesce(offer.task_id, '')})
+        ON CREATE SET t.uid = randomUUID(), t.created_at = datetime()
+        SET t.trade_type = offer.direction,
+            t.source = offer.source,
+            t.original_price = offer.price,
+            t.currency = offer.currency,
+            t.priceRUB = offer.price_rub,
+            t.min_level = offer.min_level,
+            t.task_unlock = offer.task_id,
+            t.updated_at = $synced_at
+        MERGE (v:Vendor {name: offer.vendor})
+        FOREACH (_ IN CASE WHEN offer.direction = 'buy' THEN [1] ELSE [] END |
+            MERGE (i)-[:CAN_BUY_FROM]->(t)
+            MERGE (t)-[:FROM_VENDOR]->(v))
+        FOREACH (_ IN CASE WHEN offer.direction = 'sell' THEN [1] ELSE [] END |
+            MERGE (i)-[:CAN_SELL_TO]->(t)
+            MERGE (t)-[:TO_VENDOR]->(v))
+        RETURN count(t) as merged
+        """
+        try:
+            result = await self._execute_query(
+                query,
+                {"offers": offers, "synced_at": synced_at},
+                single_result=True
+            )
+            # Offers gone upstream, and those merged under the old per-vendor key
+            await self._execute_query(
+                """
+                UNWIND $item_ids AS item_id
+                MATCH (:Item {uid: item_id})-[:CAN_BUY_FROM|CAN_SELL_TO]->(t:Trade)
+                WHERE t.updated_at IS NULL OR t.updated_at < $synced_at
+                DETACH DELETE t
+                """,
+                {"item_ids": sorted({row['id'] for row in rows}), "synced_at": synced_at}
+            )
+        except Exception as e:
+            logger.error(f"Failed to merge trade offers: {str(e)}")
+            raise DatabaseError(f"Trade offer merge failed: {str(e)}")
+
+        # Rebuild the availability bitmap once per ingest, not per request
+        await self.refresh_trader_availability()
+        return result.get('merged', 0)
+
+    async def _complete_ingest(self, updates: List[MarketUpdate]) -> None:
+        """Publish a finished price ingest to caches, statistics and subscribers."""
+        self._last_update = datetime.utcnow()
+        self._price_cache.clear()
+
+        # Publish the new snapshot and materialise its statistics once
+        version = await self._bump_snapshot_version()
+        await self.refresh_market_statistics(version)
+
+        # Push the whole ingest to subscribers as one frame per client
+        websocket_manager.publish_batch(updates)
+
+    async def _bump_snapshot_version(self) -> int:
+        """Persist and adopt a new price snapshot version."""
+        query = """
+        MERGE (s:PriceSnapshot {key: 'market'})
+        SET s.version = coalesce(s.version, 0) + 1,
+            s.updated_at = datetime()
+        RETURN s.version as version
+        """
+        result = await self._execute_query(query, single_result=True)
+        version = result['version']
+        price_snapshot.advance(version)
+        return version
+
+    async def get_snapshot_version(self) -> int:
+        """Snapshot version stored by the last completed ingest."""
+        result = await self._execute_query(SNAPSHOT_VERSION_QUERY, single_result=True)
+        return result.get('version', 0)
+
+    async def get_latest_prices(self, item_ids: List[str]) -> List[Dict[str, Any]]:
+        """Current lowest flea price of each of ``item_ids`` that has one."""
+        return await self._execute_query(LATEST_PRICES_QUERY, {"item_ids": item_ids})
+
+    async def get_trader_availability(self) -> AvailabilityIndex:
+        """Availability index for the current ingest, rebuilt if stale."""
+        if trader_availability.is_stale(price_snapshot.value):
+            return await self.refresh_trader_availability()
+        return trader_availability.index
+
+    async def refresh_trader_availability(self) -> AvailabilityIndex:
+        """Rebuild the availability index from the cheapest offer per item, vendor, level and quest."""
+        query = """
+        MATCH (i:Item)-[:CAN_BUY_FROM]->(t:Trade)-[:FROM_VENDOR]->(v:Vendor)
+        WHERE t.priceRUB IS NOT NULL
+        RETURN i.uid as item_id,
+               v.name as vendor,
+               t.min_level as min_level,
+               t.task_unlock as task_id,
+               min(t.priceRUB) as price_rub
+        """
+        records = await self._execute_query(query)
+        return trader_availability.build(price_snapshot.value, records)
+
+    async def get_market_statistics(self) -> Dict[str, Any]:
+        """Get overall market statistics from the materialised snapshot."""
+        if market_statistics.is_stale(price_snapshot.value):
+            await self.refresh_market_statistics()
+        return market_statistics.snapshot.statistics
+
+    async def refresh_market_statistics(self, version: Optional[int] = None) -> Dict[str, Any]:
+        """Recompute market statistics with a single scan over all items.
+
+        The stored version is recorded on the statistics only; adopting it
+        is left to the ingest path and the snapshot relay, which also push
+        the new prices to subscribers.
+        """
+        result = await self._execute_query(MARKET_STATISTICS_QUERY, single_result=True)
+        stored_version = result.get('version', 0)
+
+        snapshot = market_statistics.materialize(
+            version=max(version or 0, stored_version),
+            last_prices=result.get('last_prices', []),
+            base_prices=result.get('base_prices', []),
+            categories=result.get('categories', [])
+        )
+        return snapshot.statistics
+
+# Statements behind the market analysis and item history pages
+warmup_registry.register('market.statistics', MARKET_STATISTICS_QUERY)
+# Hydration runs these on first use; warmup only plans them
+warmup_registry.register(
+    'market.rolling_stats', ROLLING_STATS_QUERY,
+    lambda item_ids: {'since': datetime.utcnow() - timedelta(hours=48)},
+    execute=False
+)
+warmup_registry.register('market.last_two_prices', LAST_TWO_PRICES_QUERY, execute=False)
+warmup_registry.register('market.price_changes', PRICE_CHANGES_QUERY, {'threshold': 5}, execute=False)
+warmup_registry.register(
+    'market.trends', TRENDS_QUERY, lambda item_ids: {'item_ids': item_ids, 'hours': 48}
+)
+warmup_registry.register(
+    'market.price_history', PRICE_HISTORY_QUERY,
+    lambda item_ids: {'item_id': item_ids[0] if item_ids else '', 'days': 7, 'vendor': None}
+)
@@ -0,0 +1,97 @@
+"""Materialised market statistics recomputed once per ingest cycle."""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+@dataclass
+class MarketStatisticsSnapshot:
+    """Aggregated market statistics for one price snapshot version."""
+    version: int
+    computed_at: datetime
+    statistics: Dict[str, Any] = field(default_factory=dict)
+
+class MarketStatisticsMaterializer:
+    """Holds the latest statistics snapshot and recomputes it on demand."""
+
+    def __init__(self, max_age: timedelta = timedelta(minutes=5)):
+        self.max_age = max_age
+        self._snapshot: Optional[MarketStatisticsSnapshot] = None
+        self._lock = Lock()
+
+    @property
+    def snapshot(self) -> Optional[MarketStatisticsSnapshot]:
+        return self._snapshot
+
+    def is_stale(self, version: Optional[int] = None) -> bool:
+        """Whether the snapshot is missing, too old or behind ``version``."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return True
+        if version is not None and snapshot.version < version:
+            return True
+        return datetime.utcnow() - snapshot.computed_at > self.max_age
+
+    def materialize(
+        self,
+        version: int,
+        last_prices: Sequence[float],
+        base_prices: Sequence[float],
+        categories: Sequence[str]
+    ) -> MarketStatisticsSnapshot:
+        """Compute aggregates from parallel per-item arrays and store them."""
+        prices = np.asarray(last_prices, dtype=float)
+        bases = np.asarray(base_prices, dtype=float)
+        above = prices > bases
+
+        statistics = self._aggregate(prices, above)
+        statistics['price_percentiles'] = (
+            {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(prices, PERCENTILES))}
+            if prices.size else {}
+        )
+
+        names, codes = np.unique(np.asarray(categories, dtype=object), return_inverse=True)
+        counts = np.bincount(codes, minlength=len(names))
+        price_sums = np.bincount(codes, weights=prices, minlength=len(names))
+        above_counts = np.bincount(codes, weights=above, minlength=len(names))
+        statistics['categories'] = {
+            str(name): {
+                'total_items': int(counts[i]),
+                'avg_price': float(price_sums[i] / counts[i]),
+                'items_above_base': int(above_counts[i]),
+                'percent_above_base': float(above_counts[i] * 100.0 / counts[i])
+            }
+            for i, name in enumerate(names)
+        }
+
+        snapshot = MarketStatisticsSnapshot(
+            version=version,
+            computed_at=datetime.utcnow(),
+            statistics=statistics
+        )
+        statistics['version'] = version
+        statistics['computed_at'] = snapshot.computed_at.isoformat()
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.version <= version:
+                self._snapshot = snapshot
+        return snapshot
+
+    @staticmethod
+    def _aggregate(prices: np.ndarray, above: np.ndarray) -> Dict[str, Any]:
+        total = int(prices.size)
+        items_above_base = int(above.sum())
+        return {
+            'total_items': total,
+            'avg_price': float(prices.mean()) if total else 0.0,
+            'median_price': float(np.median(prices)) if total else 0.0,
+            'items_above_base': items_above_base,
+            'percent_above_base': items_above_base * 100.0 / total if total else 0.0
+        }
+
+# Global market statistics materializer
+market_statistics = MarketStatisticsMaterializer()
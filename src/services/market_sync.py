@@ -0,0 +1,62 @@
+"""Scheduled refresh of upstream data through trimmed query profiles."""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from src.config.queries import QUERY_PROFILES
+from src.services.item_service import ItemService
+from src.services.market_service import MarketService
+from src.services.tarkov_api_service import TarkovApiService
+
+logger = logging.getLogger(__name__)
+
+class MarketSyncService:
+    """Fetch a query profile from Tarkov.dev and merge it into the graph.
+
+    ``prices`` updates flea prices and history, ``trading`` the trader
+    offers, and ``full-static`` item properties. Each profile requests
+    only the fields its merge writes.
+    """
+
+    def __init__(
+        self,
+        api: Optional[TarkovApiService] = None,
+        market_service: Optional[MarketService] = None,
+        item_service: Optional[ItemService] = None
+    ):
+        self.api = api or TarkovApiService()
+        self.market_service = market_service or MarketService()
+        self.item_service = item_service or ItemService()
+        self._mergers = {
+            'prices': self.market_service.merge_item_prices,
+            'trading': self.market_service.merge_trade_offers,
+            'full-static': self.item_service.merge_static_items,
+        }
+
+    async def sync(self, profile_name: str) -> Dict[str, Any]:
+        """Refresh one profile and report what was fetched and merged."""
+        if profile_name not in QUERY_PROFILES:
+            raise ValueError(f"Unknown query profile: {profile_name}")
+
+        started = time.monotonic()
+        rows = await self.api.fetch_profile(profile_name)
+        fetched_at = time.monotonic()
+        merged = await self._mergers[profile_name](rows)
+        finished = time.monotonic()
+        result = {
+            'profile': profile_name,
+            'fetched': len(rows),
+            'merged': merged,
+            'duration': finished - started,
+            'stages': {'fetch': fetched_at - started, 'merge': finished - fetched_at}
+        }
+        logger.info(
+            f"Synced {profile_name} profile: {result['fetched']} fetched, "
+            f"{result['merged']} merged in {result['duration']:.1f}s"
+        )
+        return result
+
+    def sync_blocking(self, profile_name: str) -> Dict[str, Any]:
+        """Synchronous entry point for scheduler threads."""
+        return asyncio.run(self.sync(profile_name))
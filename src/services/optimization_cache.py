@@ -0,0 +1,107 @@
+"""Memoised optimiser results, valid for one price snapshot."""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Hashable, Iterable, List, Optional, Tuple
+
+from src.core.snapshot import price_snapshot
+from src.services.price_adjustments import price_adjustments
+
+class OptimizationCache:
+    """LRU cache of optimiser results tagged with the price snapshot version.
+
+    Searches return an exact, deterministically ordered top K, so the top
+    k of a cached top K (k <= K) is the answer to the smaller request; a
+    cached result shorter than its K was exhaustive and answers any K.
+    Entries are dropped when the ingest path advances the price snapshot
+    or an admin price adjustment changes or expires, and expire after ``ttl`` seconds for processes that do not run it.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: int = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[int, float, Optional[int], List[Any]]]' = OrderedDict()
+        self._lock = Lock()
+        price_snapshot.subscribe(lambda version: self.clear())
+        price_adjustments.subscribe(lambda changes: self.clear())
+
+    @staticmethod
+    def selection_hash(*id_sets: Iterable[str]) -> str:
+        """Order-independent digest of the locked, blacklisted or candidate id sets."""
+        digest = hashlib.sha256()
+        for ids in id_sets:
+            digest.update(json.dumps(sorted(set(ids))).encode('utf-8'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def key(namespace: str, selection: str, **params: Any) -> Hashable:
+        """Cache key for a search; pass every parameter except ``max_results``."""
+        return namespace, selection, json.dumps(params, sort_keys=True, default=str)
+
+    def get(self, key: Hashable, max_results: Optional[int] = None) -> Optional[List[Any]]:
+        """Cached results for ``key`` cut to ``max_results``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                _, _, cached_max, results = entry
+                if not self._live(entry):
+                    del self._entries[key]
+                elif self._covers(cached_max, len(results), max_results):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(results[:max_results])
+            self.misses += 1
+            return None
+
+    def _live(self, entry: Tuple) -> bool:
+        version, stored_at = entry[0], entry[1]
+        return version == price_snapshot.value and time.monotonic() - stored_at < self.ttl
+
+    @staticmethod
+    def _covers(cached_max: Optional[int], found: int, wanted: Optional[int]) -> bool:
+        if cached_max is None or found < cached_max:
+            return True
+        return wanted is not None and wanted <= cached_max
+
+    def set(
+        self,
+        key: Hashable,
+        results: List[Any],
+        max_results: Optional[int] = None,
+        version: Optional[int] = None
+    ) -> None:
+        """Store ``results`` of a search for at most ``max_results``.
+
+        ``version`` is the snapshot the search started from; results are
+        discarded if prices moved on while it ran. A larger cached result
+        for the same key is kept in preference to a smaller one.
+        """
+        with self._lock:
+            if version is not None and version != price_snapshot.value:
+                return
+            existing = self._entries.get(key)
+            if (
+                existing is not None
+                and self._live(existing)
+                and self._covers(existing[2], len(existing[3]), max_results)
+                and not self._covers(max_results, len(results), existing[2])
+            ):
+                return
+            self._entries[key] = (price_snapshot.value, time.monotonic(), max_results, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Global optimiser result cache
+optimization_cache = OptimizationCache()
@@ -0,0 +1,245 @@
+"""Process-pool runner for CPU-bound combination searches."""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from threading import Lock
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.services.combination_search import (
+    CANCEL,
+    PriceArrays,
+    SearchCancelled,
+    control_size,
+    merge_results,
+    reset_control,
+    search_combinations,
+    search_progress,
+)
+
+class SharedPriceArrays:
+    """Price arrays and a control block placed in shared memory.
+
+    Workers attach by name, so a job submission pickles a few strings and
+    index lists rather than every Item model. All partitions of a job
+    share one control block and so one best-so-far bound.
+    """
+
+    def __init__(self, prices: PriceArrays, partitions: int = 1):
+        self.size = len(prices)
+        self.partitions = partitions
+        self._prices = shared_memory.SharedMemory(create=True, size=max(self.size, 1) * 2 * 8)
+        self._control = shared_memory.SharedMemory(create=True, size=control_size(partitions) * 8)
+        self.prices = np.ndarray((2, self.size), dtype=np.float64, buffer=self._prices.buf)
+        self.prices[0] = prices.base_prices
+        self.prices[1] = prices.buy_prices
+        self.control = np.ndarray((control_size(partitions),), dtype=np.int64, buffer=self._control.buf)
+        reset_control(self.control)
+
+    @property
+    def names(self) -> Dict[str, Any]:
+        return {
+            'prices': self._prices.name,
+            'control': self._control.name,
+            'size': self.size,
+            'partitions': self.partitions
+        }
+
+    def release(self) -> None:
+        """Close and unlink both blocks; safe to call more than once."""
+        # Views must go before the buffers they point into can be closed
+        self.prices = self.control = None
+        for block in (self._prices, self._control):
+            try:
+                block.close()
+            except BufferError:
+                # A concurrent progress() read still holds a view; the
+                # mapping goes away with it
+                pass
+            try:
+                block.unlink()
+            except FileNotFoundError:
+                pass
+
+def _run_search(shared: Dict[str, Any], params: Dict[str, Any]) -> Optional[List[Dict]]:
+    """Worker entry point: attach to shared arrays and run one partition."""
+    prices_block = shared_memory.SharedMemory(name=shared['prices'])
+    control_block = shared_memory.SharedMemory(name=shared['control'])
+    try:
+        prices = np.ndarray((2, shared['size']), dtype=np.float64, buffer=prices_block.buf)
+        control = np.ndarray(
+            (control_size(shared['partitions']),), dtype=np.int64, buffer=control_block.buf
+        )
+        try:
+            return search_combinations(prices[0], prices[1], control=control, **params)
+        except SearchCancelled:
+            return None
+        finally:
+            del prices, control
+    finally:
+        prices_block.close()
+        control_block.close()
+
+class OptimizationJob:
+    """Handle on a submitted search: progress, cancellation and results.
+
+    ``future`` resolves once every partition has finished, to their merged
+    results or to None if the search was cancelled.
+    """
+
+    def __init__(
+        self,
+        prices: PriceArrays,
+        shared: SharedPriceArrays,
+        parts: List[Future],
+        max_results: int
+    ):
+        self.prices = prices
+        self._shared = shared
+        self._parts = parts
+        self._max_results = max_results
+        self._pending = len(parts)
+        self._lock = Lock()
+        self._final_progress: Optional[float] = None
+        self.future: Future = Future()
+        self.future.add_done_callback(self._release)
+        for part in parts:
+            part.add_done_callback(self._part_done)
+
+    def _part_done(self, part: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            if self._pending:
+                return
+        failed = [
+            p.exception() for p in self._parts
+            if not p.cancelled() and p.exception() is not None
+        ]
+        if failed:
+            self.future.set_exception(failed[0])
+        elif any(p.cancelled() or p.result() is None for p in self._parts):
+            self.future.set_result(None)
+        else:
+            self.future.set_result(
+                merge_results((p.result() for p in self._parts), self._max_results)
+            )
+
+    def _release(self, future: Future) -> None:
+        finished = (
+            not future.cancelled()
+            and future.exception() is None
+            and future.result() is not None
+        )
+        self._final_progress = 1.0 if finished else self.progress()
+        self._shared.release()
+
+    def progress(self) -> float:
+        """Fraction of the search space examined so far."""
+        if self._final_progress is not None:
+            return self._final_progress
+        control = self._shared.control
+        if control is None:
+            return 0.0
+        return search_progress(control)
+
+    def cancel(self) -> bool:
+        """Stop the search; returns False if it had already finished."""
+        if self.future.done():
+            return False
+        if self._shared.control is not None:
+            self._shared.control[CANCEL] = 1
+        for part in self._parts:
+            part.cancel()
+        return True
+
+    @property
+    def cancelled(self) -> bool:
+        return (
+            self.future.done()
+            and self.future.exception() is None
+            and self.future.result() is None
+        )
+
+    def result(self, timeout: Optional[float] = None) -> Optional[List[Dict]]:
+        """Results with item ids in place of indices, or None if cancelled."""
+        raw = self.future.result(timeout=timeout)
+        if raw is None:
+            return None
+        return [
+            {
+                'item_ids': [self.prices.item_ids[index] for index in result['indices']],
+                **{key: value for key, value in result.items() if key != 'indices'}
+            }
+            for result in raw
+        ]
+
+class OptimizationRunner:
+    """Run combination searches in worker processes, off the GIL."""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or max((os.cpu_count() or 2) - 1, 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # Workers must inherit the tracker that owns our shared blocks,
+                # or each starts its own and "cleans up" blocks on exit
+                resource_tracker.ensure_running()
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def submit(
+        self,
+        prices: PriceArrays,
+        max_items: int = 5,
+        min_total_value: float = 400000,
+        max_results: int = 10,
+        locked_ids: Sequence[str] = (),
+        blacklisted_ids: Sequence[str] = (),
+        partitions: Optional[int] = None
+    ) -> OptimizationJob:
+        """Start a search over ``prices`` and return its job handle.
+
+        The search is split into ``partitions`` interleaved slices of the
+        first-item branches, one per worker by default.
+        """
+        partitions = max(partitions or self.max_workers, 1)
+        locked_set, blacklisted_set = set(locked_ids), set(blacklisted_ids)
+        locked = [i for i, item_id in enumerate(prices.item_ids) if item_id in locked_set]
+        eligible = [
+            i for i, item_id in enumerate(prices.item_ids)
+            if item_id not in locked_set and item_id not in blacklisted_set
+        ]
+
+        shared = SharedPriceArrays(prices, partitions)
+        parts: List[Future] = []
+        try:
+            for partition in range(partitions):
+                parts.append(self.executor.submit(_run_search, shared.names, {
+                    'eligible': eligible,
+                    'locked': locked,
+                    'max_items': max_items,
+                    'min_total_value': min_total_value,
+                    'max_results': max_results,
+                    'partition': partition,
+                    'partitions': partitions
+                }))
+        except Exception:
+            for part in parts:
+                part.cancel()
+            shared.release()
+            raise
+        return OptimizationJob(prices, shared, parts, max_results)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+# Global runner shared by request handlers
+optimization_runner = OptimizationRunner()
@@ -1,15 +1,28 @@
 """Optimized item combination calculator."""
-from typing import List, Optional, Tuple
-from itertools import combinations
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
 import numpy as np
 from pydantic import BaseModel
 
 from src.models.item import Item
 from src.core.logging import get_logger
-from src.services.task_manager import task_queue
+from src.core.snapshot import price_snapshot
+from src.services.combination_search import (
+    PriceArrays,
+    pareto_front,
+    search_combinations,
+    update_combinations,
+)
+from src.services.optimization_cache import optimization_cache
+from src.services.optimization_runner import OptimizationJob, optimization_runner
+from src.services.price_adjustments import price_adjustments
+from src.services.trader_availability import PlayerProfile, trader_availability
 
 logger = get_logger(__name__)
 
+# Previous answers kept for warm-starting in-process searches
+MAX_WARM_STARTS = 32
+
 class CombinationResult(BaseModel):
     """Result model for item combinations."""
     items: List[Item]
@@ -17,29 +30,131 @@ class CombinationResult(BaseModel):
     total_base_price: int
     profit_margin: float
 
+class ParetoPoint(BaseModel):
+    """One trade-off on the cost/value/item-count Pareto front."""
+    items: List[Item]
+    total_buy_price: int
+    total_base_price: int
+    item_count: int
+    flea_only_items: int
+    profit_margin: float
+
+class SearchInput:
+    """Struct-of-arrays form of one optimiser request.
+
+    Searches only see ``prices`` and the ``eligible``/``locked`` index
+    lists; ``items`` is read once per result to build the output models.
+    ``profile`` is the player profile the prices were filtered for, or
+    None when none was applied.
+    """
+    __slots__ = ('prices', 'items', 'locked_ids', 'eligible', 'locked', 'profile')
+
+    def __init__(
+        self,
+        prices: PriceArrays,
+        items: List[Item],
+        locked_ids: List[str],
+        eligible: List[int],
+        locked: List[int],
+        profile: Optional[PlayerProfile] = None
+    ):
+        self.prices = prices
+        self.items = items
+        self.locked_ids = locked_ids
+        self.eligible = eligible
+        self.locked = locked
+        self.profile = profile
+
+    def excluded_ids(self) -> List[str]:
+        """Ids of items that are neither eligible nor locked."""
+        excluded = np.ones(len(self.items), dtype=bool)
+        excluded[self.eligible] = False
+        excluded[self.locked] = False
+        return [self.prices.item_ids[i] for i in np.flatnonzero(excluded)]
+
+    def build(self, model: type, results: List[Dict]) -> List[BaseModel]:
+        """``model`` instances for the final results, with their items."""
+        return [
+            model(
+                items=[self.items[i] for i in result['indices']],
+                **{key: value for key, value in result.items() if key != 'indices'}
+            )
+            for result in results
+        ]
+
 class ItemOptimizer:
     """Efficient item combination optimizer."""
     
     def __init__(self):
         self._blacklist = set()
-        self._locked_items = set()
+        self._locked_items: Dict[str, Item] = {}
+        self._previous: 'OrderedDict[Hashable, Tuple[PriceArrays, int, List[Dict]]]' = OrderedDict()
     
     def _calculate_prices(self, items: List[Item]) -> Tuple[int, int]:
         """Calculate total buy and base prices for items."""
-        total_buy = sum(min(p.price_rub for p in item.buy_for) if item.buy_for else item.base_price 
-                       for item in items)
-        total_base = sum(item.base_price for item in items)
-        return total_buy, total_base
-    
-    def _is_valid_combination(
-        self, 
-        items: List[Item], 
-        min_total_value: int = 400000
-    ) -> bool:
-        """Check if combination meets criteria."""
-        return (
-            not any(item.id in self._blacklist for item in items) and
-            all(locked.id in {i.id for i in items} for locked in self._locked_items)
+        prices = PriceArrays.from_items(items)
+        return int(prices.buy_prices.sum()), int(prices.base_prices.sum())
+
+    def _search_input(
+        self,
+        items: List[Item],
+        include_flea_only: bool = True,
+        profile: Optional[PlayerProfile] = None
+    ) -> 'SearchInput':
+        """Price arrays and index lists for ``items`` plus the locked items.
+
+        A ``profile`` reprices items at the cheapest offer open to that
+        player and drops the ones it cannot buy, using the availability
+        index built at ingest; before the index exists the profile is not
+        applied, and the result says so. Admin overrides, blacklists and locks from
+        ``price_adjustments`` apply on top, alongside this optimizer's own.
+        """
+        locked_items = list(self._locked_items.values())
+        known = {item.uid for item in items}
+        all_items = items + [item for item in locked_items if item.uid not in known]
+        prices = PriceArrays.from_items(all_items)
+        available = None
+        applied = None
+        if profile is not None and profile.restricts:
+            index = trader_availability.index
+            if index is None:
+                logger.warning("Trader availability not built yet, ignoring player profile")
+            else:
+                prices, available = index.apply(prices, profile)
+                applied = profile
+        effective = price_adjustments.apply(prices)
+        prices = effective.prices
+
+        locked_set = {item.uid for item in locked_items}
+        locked_mask = effective.locked | np.fromiter(
+            (uid in locked_set for uid in prices.item_ids), dtype=bool, count=len(all_items)
+        )
+        locked_ids = [prices.item_ids[i] for i in np.flatnonzero(locked_mask)]
+        excluded = locked_mask | effective.blacklisted | np.fromiter(
+            (uid in self._blacklist for uid in prices.item_ids), dtype=bool, count=len(all_items)
+        )
+        if not include_flea_only:
+            excluded |= prices.flea_only
+        if available is not None:
+            excluded |= ~available
+        return SearchInput(
+            prices,
+            all_items,
+            locked_ids,
+            eligible=np.flatnonzero(~excluded).tolist(),
+            locked=np.flatnonzero(locked_mask).tolist(),
+            profile=applied
+        )
+
+    def _cache_key(self, namespace: str, search: 'SearchInput', **params) -> Hashable:
+        # Keyed on the profile actually applied: an unrestricted answer
+        # computed before the availability index existed is filed as one
+        return optimization_cache.key(
+            namespace,
+            optimization_cache.selection_hash(search.prices.item_ids, search.locked_ids, self._blacklist),
+            adjustments=price_adjustments.generation,
+            profile=search.profile.key() if search.profile else None,
+            **params
         )
     
     async def find_optimal_combinations(
@@ -47,64 +162,133 @@ class ItemOptimizer:
         items: List[Item],
         max_items: int = 5,
         min_total_value: int = 400000,
-        max_results: int = 10
+        max_results: int = 10,
+        profile: Optional[PlayerProfile] = None
     ) -> List[CombinationResult]:
-        """Find optimal item combinations efficiently."""
-        # Convert items to numpy array for faster processing
-        item_array = np.array(items)
-        results = []
-        
-        # Pre-calculate prices
-        base_prices = np.array([item.base_price for item in items])
-        buy_prices = np.array([
-            min(p.price_rub for p in item.buy_for) if item.buy_for else item.base_price 
-            for item in items
-        ])
-        
-        # Start with locked items if any
-        base_combination = list(self._locked_items)
-        remaining_slots = max_items - len(base_combination)
-        
-        if remaining_slots <= 0:
-            return results
-            
-        # Filter eligible items
-        mask = ~np.isin([item.id for item in items], 
-                        [item.id for item in base_combination + list(self._blacklist)])
-        eligible_items = item_array[mask]
-        eligible_base_prices = base_prices[mask]
-        eligible_buy_prices = buy_prices[mask]
-        
-        # Generate combinations in parallel chunks
-        for size in range(remaining_slots, 0, -1):
-            for combo_items in combinations(range(len(eligible_items)), size):
-                combo_base_total = (eligible_base_prices[list(combo_items)].sum() + 
-                                  sum(item.base_price for item in base_combination))
-                
-                if combo_base_total >= min_total_value:
-                    combo_buy_total = (eligible_buy_prices[list(combo_items)].sum() + 
-                                     sum(min(p.price_rub for p in item.buy_for) 
-                                         if item.buy_for else item.base_price 
-                                         for item in base_combination))
-                    
-                    full_combo = base_combination + [eligible_items[i] for i in combo_items]
-                    
-                    results.append(CombinationResult(
-                        items=full_combo,
-                        total_buy_price=int(combo_buy_total),
-                        total_base_price=int(combo_base_total),
-                        profit_margin=(combo_base_total - combo_buy_total) / combo_buy_total
-                    ))
-                    
-                    if len(results) >= max_results:
-                        break
-            
-            if results:
-                break
-        
-        # Sort by profit margin
-        results.sort(key=lambda x: x.profit_margin, reverse=True)
-        return results[:max_results]
+        """Find optimal item combinations in-process.
+
+        Prefer ``submit_optimization`` for large item sets: this call holds
+        the GIL for the whole search. Results are memoised for the current
+        price snapshot, and after a refresh the search is warm-started from
+        the previous answer.
+        """
+        version = price_snapshot.value
+        search = self._search_input(items, profile=profile)
+        key = self._cache_key(
+            'items',
+            search,
+            max_items=max_items,
+            min_total_value=min_total_value
+        )
+        cached = optimization_cache.get(key, max_results)
+        if cached is not None:
+            return cached
+
+        results = self._search(
+            key,
+            search,
+            max_items=max_items,
+            min_total_value=min_total_value,
+            max_results=max_results
+        )
+        combinations = search.build(CombinationResult, results)
+        optimization_cache.set(key, combinations, max_results, version)
+        return combinations
+
+    async def find_pareto_front(
+        self,
+        items: List[Item],
+        max_items: int = 5,
+        min_total_value: int = 400000,
+        include_flea_only: bool = True,
+        profile: Optional[PlayerProfile] = None
+    ) -> List[ParetoPoint]:
+        """Every best trade-off between buy cost, base value and item count.
+
+        Memoised for the current price snapshot like
+        ``find_optimal_combinations``.
+        """
+        version = price_snapshot.value
+        search = self._search_input(items, include_flea_only, profile)
+        key = self._cache_key(
+            'pareto',
+            search,
+            max_items=max_items,
+            min_total_value=min_total_value,
+            include_flea_only=include_flea_only
+        )
+        cached = optimization_cache.get(key)
+        if cached is not None:
+            return cached
+
+        front = pareto_front(
+            search.prices.base_prices,
+            search.prices.buy_prices,
+            eligible=search.eligible,
+            locked=search.locked,
+            max_items=max_items,
+            min_total_value=min_total_value,
+            flea_only=search.prices.flea_only
+        )
+        points = search.build(ParetoPoint, front)
+        optimization_cache.set(key, points, version=version)
+        return points
+
+    def _search(
+        self,
+        key: Hashable,
+        search: 'SearchInput',
+        max_items: int,
+        min_total_value: int,
+        max_results: int
+    ) -> List[Dict]:
+        """Search, warm-started from the previous answer for ``key`` if there is one.
+
+        After a price refresh usually only a few items move, and
+        ``update_combinations`` only re-checks combinations containing them.
+        """
+        prices, eligible, locked = search.prices, search.eligible, search.locked
+        params = dict(max_items=max_items, min_total_value=min_total_value, max_results=max_results)
+        previous = self._previous.pop(key, None)
+        changed = prices.changed_since(previous[0]) if previous else None
+        if changed is not None and previous[1] >= max_results:
+            results = update_combinations(
+                previous[2][:max_results], changed,
+                prices.base_prices, prices.buy_prices, eligible, locked, **params
+            )
+            logger.debug("Warm-started combination search", changed=len(changed))
+        else:
+            results = search_combinations(prices.base_prices, prices.buy_prices, eligible, locked, **params)
+
+        self._previous[key] = (prices, max_results, results)
+        while len(self._previous) > MAX_WARM_STARTS:
+            self._previous.popitem(last=False)
+        return results
+
+    def submit_optimization(
+        self,
+        items: List[Item],
+        max_items: int = 5,
+        min_total_value: int = 400000,
+        max_results: int = 10,
+        partitions: Optional[int] = None,
+        profile: Optional[PlayerProfile] = None
+    ) -> OptimizationJob:
+        """Run the search in the process pool and return its job handle.
+
+        The search is partitioned across ``partitions`` workers, all of the
+        pool by default; the merged result does not depend on the split.
+        """
+        search = self._search_input(items, profile=profile)
+        return optimization_runner.submit(
+            search.prices,
+            max_items=max_items,
+            min_total_value=min_total_value,
+            max_results=max_results,
+            locked_ids=search.locked_ids,
+            blacklisted_ids=search.excluded_ids(),
+            partitions=partitions
+        )
     
     def blacklist_item(self, item_id: str) -> None:
         """Add item to blacklist."""
@@ -116,11 +300,11 @@ class ItemOptimizer:
         
     def lock_item(self, item_id: str, item: Item) -> None:
         """Lock item in combinations."""
-        self._locked_items.add(item)
+        self._locked_items[item_id] = item
         
     def unlock_item(self, item_id: str) -> None:
         """Unlock item from combinations."""
-        self._locked_items = {item for item in self._locked_items if item.id != item_id}
+        self._locked_items.pop(item_id, None)
 
 # Global optimizer instance
 optimizer = ItemOptimizer()
\ No newline at end of file
@@ -1,7 +1,10 @@
+import copy
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from src.core.neo4j import Neo4jClient
+from src.core.snapshot import price_snapshot
 from src.services.exceptions import OptimizationError
+from src.services.optimization_cache import optimization_cache
 
 class OptimizerService:
     """Service for handling item optimization logic"""
@@ -17,20 +20,39 @@ class OptimizerService:
     ) -> List[Dict[str, Any]]:
         """
         Find optimal combinations of items based on criteria
+
+        Results are memoised per price snapshot, keyed by the criteria and
+        the current locked and blacklisted items.
         """
         try:
+            version = price_snapshot.value
+            locked_items = self._get_locked_items() if include_locked else []
+            key = optimization_cache.key(
+                'neo4j',
+                optimization_cache.selection_hash(
+                    [item['id'] for item in locked_items],
+                    self._get_blacklisted_ids()
+                ),
+                min_price=min_price,
+                max_items=max_items,
+                include_locked=include_locked
+            )
+            cached = optimization_cache.get(key)
+            if cached is not None:
+                return copy.deepcopy(cached)
+
             with self.neo4j as client:
                 combinations = client.find_optimal_combinations(
                     min_total=min_price,
                     max_items=max_items
                 )
                 
-                if include_locked:
-                    # Always include locked items in the results
-                    locked_items = self._get_locked_items()
-                    combinations = self._merge_locked_items(combinations, locked_items)
-                    
-                return combinations
+            if include_locked:
+                # Always include locked items in the results
+                combinations = self._merge_locked_items(combinations, locked_items)
+
+            optimization_cache.set(key, copy.deepcopy(combinations), version=version)
+            return combinations
         except Exception as e:
             raise OptimizationError(f"Failed to find optimal combinations: {str(e)}")
 
@@ -45,6 +67,17 @@ class OptimizerService:
             """
             return client.query(query)
 
+    def _get_blacklisted_ids(self) -> List[str]:
+        """Ids of all currently blacklisted items"""
+        with self.neo4j as client:
+            query = """
+            MATCH (i:Item)
+            WHERE i.blacklisted = true AND
+                  (i.blacklistExpires IS NULL OR i.blacklistExpires > datetime())
+            RETURN i.id as id
+            """
+            return [record['id'] for record in client.query(query)]
+
     def _merge_locked_items(
         self,
         combinations: List[Dict[str, Any]],
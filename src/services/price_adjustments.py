@@ -0,0 +1,335 @@
+"""Admin price overrides, blacklists and locks layered over the price snapshot."""
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from threading import RLock, Timer
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from src.services.combination_search import PriceArrays
+
+logger = logging.getLogger(__name__)
+
+OVERRIDE, BLACKLIST, LOCK = 'override', 'blacklist', 'lock'
+
+class EffectivePrices(NamedTuple):
+    """Prices with overrides applied, plus blacklisted and locked item masks."""
+    prices: PriceArrays
+    blacklisted: np.ndarray
+    locked: np.ndarray
+
+def _timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds for a stored expiry; naive datetimes are UTC."""
+    if value is None:
+        return None
+    if hasattr(value, 'to_native'):
+        value = value.to_native()
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+class PriceAdjustments:
+    """In-memory overrides, blacklists and locks with an expiry heap.
+
+    ``rebase`` copies the candidate prices of a snapshot once; after that
+    every change, including an expiry, patches the one row it touches, so
+    ``view`` hands the optimiser ready arrays instead of the graph working
+    out ``datetime()`` comparisons for every item on every search.
+    Overrides replace the buy price. A timer fires at the next expiry and
+    notifies subscribers; reads also expire anything due, so correctness
+    does not depend on it.
+
+    Every worker holds its own layer, so changes are also stamped with
+    an adjustment version persisted in the graph. ``needs_reload`` tells
+    a worker to ``load`` again once another one has moved that stamp,
+    or once the loaded adjustments are older than ``max_age``.
+    """
+
+    def __init__(
+        self,
+        max_age: float = 300,
+        clock: Callable[[], float] = time.time,
+        proactive: bool = True
+    ):
+        self.max_age = max_age
+        self.generation = 0
+        self.loaded = False
+        self._clock = clock
+        self._proactive = proactive
+        self._entries: Dict[str, Dict[str, Tuple[Any, Optional[float]]]] = {
+            OVERRIDE: {}, BLACKLIST: {}, LOCK: {}
+        }
+        self._heap: List[Tuple[float, int, str, str]] = []
+        self._seq = 0
+        self._timer: Optional[Timer] = None
+        self._armed_for: Optional[float] = None
+        self._listeners: List[Callable[[List[Tuple[str, str]]], None]] = []
+        self._base: Optional[PriceArrays] = None
+        self._view: Optional[EffectivePrices] = None
+        self._rows: Dict[str, int] = {}
+        self._version = -1
+        self._based_at = 0.0
+        self._stamp = 0
+        self._loaded_at = 0.0
+        self._lock = RLock()
+        if proactive and hasattr(os, 'register_at_fork'):
+            # Timer threads do not survive a fork; re-arm in the child
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def subscribe(self, listener: Callable[[List[Tuple[str, str]]], None]) -> None:
+        """Call ``listener(changes)`` with ``(kind, item_id)`` pairs after each change."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def set_override(
+        self,
+        item_id: str,
+        price: Optional[float],
+        duration: Optional[int] = None,
+        stamp: Optional[int] = None
+    ) -> None:
+        """Override an item's buy price for ``duration`` minutes; None clears it."""
+        self._set(OVERRIDE, item_id, None if price is None else float(price), duration, stamp)
+
+    def set_blacklist(
+        self,
+        item_id: str,
+        blacklisted: bool,
+        duration: Optional[int] = None,
+        stamp: Optional[int] = None
+    ) -> None:
+        self._set(BLACKLIST, item_id, True if blacklisted else None, duration, stamp)
+
+    def set_lock(
+        self,
+        item_id: str,
+        locked: bool,
+        duration: Optional[int] = None,
+        stamp: Optional[int] = None
+    ) -> None:
+        self._set(LOCK, item_id, True if locked else None, duration, stamp)
+
+    def _set(self, kind: str, item_id: str, value: Any, duration: Optional[int], stamp: Optional[int]) -> None:
+        self.apply_changes([(kind, item_id, value, duration)], stamp)
+
+    def apply_changes(
+        self,
+        changes: Iterable[Tuple[str, str, Any, Optional[int]]],
+        stamp: Optional[int] = None
+    ) -> None:
+        """Apply ``(kind, item_id, value, duration)`` changes as one batch.
+
+        A None value clears the adjustment. Subscribers hear about the
+        whole batch once. ``stamp`` is the adjustment version the batch
+        was persisted as; it is adopted only when it directly follows the
+        loaded one, so a change another worker made in between still
+        triggers a reload.
+        """
+        now = self._clock()
+        applied = []
+        with self._lock:
+            if stamp is not None and stamp == self._stamp + 1:
+                self._stamp = stamp
+            for kind, item_id, value, duration in changes:
+                expires = None if duration is None else now + duration * 60
+                self._store(kind, item_id, value, expires)
+                applied.append((kind, item_id))
+            self._schedule()
+        if applied:
+            self._notify(applied)
+
+    def _store(self, kind: str, item_id: str, value: Any, expires: Optional[float]) -> None:
+        entries = self._entries[kind]
+        if value is None:
+            entries.pop(item_id, None)
+        else:
+            entries[item_id] = (value, expires)
+            if expires is not None:
+                self._seq += 1
+                heapq.heappush(self._heap, (expires, self._seq, kind, item_id))
+        self.generation += 1
+        self._patch(kind, item_id)
+
+    def load(self, records: Sequence[Dict[str, Any]], stamp: Optional[int] = None) -> None:
+        """Replace every adjustment with ``records`` read from the graph.
+
+        Each record has ``item_id`` and optional ``price_override``,
+        ``override_expires``, ``blacklisted``, ``blacklist_expires``,
+        ``locked`` and ``lock_expires`` fields; expired ones are skipped.
+        ``stamp`` is the adjustment version read before the records.
+        """
+        now = self._clock()
+        with self._lock:
+            for entries in self._entries.values():
+                entries.clear()
+            self._heap.clear()
+            for record in records:
+                for kind, value, expires in (
+                    (OVERRIDE, record.get('price_override'), record.get('override_expires')),
+                    (BLACKLIST, record.get('blacklisted') or None, record.get('blacklist_expires')),
+                    (LOCK, record.get('locked') or None, record.get('lock_expires')),
+                ):
+                    expires = _timestamp(expires)
+                    if value is not None and (expires is None or expires > now):
+                        self._store(kind, record['item_id'], value, expires)
+            if self._base is not None:
+                self._view = self._apply(self._base)
+            # Removals leave nothing to store, so count the reload itself
+            self.generation += 1
+            if stamp is not None:
+                self._stamp = stamp
+            self._loaded_at = now
+            self.loaded = True
+            self._schedule()
+        self._notify([])
+
+    def expire(self, now: Optional[float] = None) -> List[Tuple[str, str]]:
+        """Drop every adjustment due by ``now`` and return what expired."""
+        now = self._clock() if now is None else now
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                expires, _, kind, item_id = heapq.heappop(self._heap)
+                entry = self._entries[kind].get(item_id)
+                # Entries replaced since they were pushed leave stale heap rows
+                if entry is not None and entry[1] == expires:
+                    self._store(kind, item_id, None, None)
+                    expired.append((kind, item_id))
+            self._schedule()
+        if expired:
+            logger.info(f"Expired {len(expired)} price adjustments")
+            self._notify(expired)
+        return expired
+
+    def _schedule(self) -> None:
+        """Arm the timer for the earliest pending expiry."""
+        due = self._heap[0][0] if self._heap else None
+        if not self._proactive or due == self._armed_for:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._armed_for = due
+        if due is not None:
+            self._timer = Timer(max(due - self._clock(), 0), self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _after_fork(self) -> None:
+        self._lock = RLock()
+        self._timer = self._armed_for = None
+        self._schedule()
+
+    def _fire(self) -> None:
+        with self._lock:
+            self._timer = self._armed_for = None
+        self.expire()
+
+    def _notify(self, changes: List[Tuple[str, str]]) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(changes)
+            except Exception as e:
+                logger.error(f"Price adjustment listener failed: {str(e)}")
+
+    def overrides(self) -> Dict[str, float]:
+        self.expire()
+        return {item_id: price for item_id, (price, _) in self._entries[OVERRIDE].items()}
+
+    def blacklisted_ids(self) -> Set[str]:
+        self.expire()
+        return set(self._entries[BLACKLIST])
+
+    def locked_ids(self) -> Set[str]:
+        self.expire()
+        return set(self._entries[LOCK])
+
+    def needs_reload(self, stamp: Optional[int] = None) -> bool:
+        """Whether the adjustments are missing, too old or behind ``stamp``."""
+        if not self.loaded:
+            return True
+        if stamp is not None and self._stamp < stamp:
+            return True
+        return self._clock() - self._loaded_at > self.max_age
+
+    def is_stale(self, version: Optional[int] = None) -> bool:
+        """Whether the candidate prices are missing, too old or behind ``version``."""
+        if self._view is None:
+            return True
+        if version is not None and self._version < version:
+            return True
+        return self._clock() - self._based_at > self.max_age
+
+    def rebase(self, version: int, prices: PriceArrays) -> EffectivePrices:
+        """Adopt the candidate ``prices`` of snapshot ``version``."""
+        with self._lock:
+            self._base = prices
+            self._rows = {item_id: row for row, item_id in enumerate(prices.item_ids)}
+            self._view = self._apply(prices)
+            self._version, self._based_at = version, self._clock()
+            return self._view
+
+    def view(self) -> Optional[EffectivePrices]:
+        """Effective candidate prices, or None before the first ``rebase``.
+
+        The arrays are patched in place by later changes; copy them if
+        they must stay fixed across an await.
+        """
+        self.expire()
+        return self._view
+
+    def apply(self, prices: PriceArrays) -> EffectivePrices:
+        """Effective prices for an arbitrary item set.
+
+        Row positions are reused when ``prices`` shares the rebased item
+        list, leaving a copy plus O(adjustments) work.
+        """
+        self.expire()
+        with self._lock:
+            return self._apply(prices)
+
+    def _apply(self, prices: PriceArrays) -> EffectivePrices:
+        same_items = self._base is not None and prices.item_ids is self._base.item_ids
+        positions = self._rows if same_items else {
+            item_id: row for row, item_id in enumerate(prices.item_ids)
+        }
+
+        def indices(kind: str) -> List[int]:
+            return [positions[item_id] for item_id in self._entries[kind] if item_id in positions]
+
+        buy = prices.buy_prices.copy()
+        overridden = indices(OVERRIDE)
+        buy[overridden] = [self._entries[OVERRIDE][prices.item_ids[row]][0] for row in overridden]
+        blacklisted = np.zeros(len(prices), dtype=bool)
+        blacklisted[indices(BLACKLIST)] = True
+        locked = np.zeros(len(prices), dtype=bool)
+        locked[indices(LOCK)] = True
+        return EffectivePrices(
+            PriceArrays(prices.item_ids, prices.base_prices, buy, prices.flea_only),
+            blacklisted,
+            locked
+        )
+
+    def _patch(self, kind: str, item_id: str) -> None:
+        """Bring one row of the candidate view up to date."""
+        row = self._rows.get(item_id)
+        if self._view is None or row is None:
+            return
+        entry = self._entries[kind].get(item_id)
+        if kind == OVERRIDE:
+            self._view.prices.buy_prices[row] = (
+                entry[0] if entry is not None else self._base.buy_prices[row]
+            )
+        else:
+            mask = self._view.blacklisted if kind == BLACKLIST else self._view.locked
+            mask[row] = entry is not None
+
+# Global adjustment layer
+price_adjustments = PriceAdjustments()
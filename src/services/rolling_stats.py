@@ -0,0 +1,293 @@
+"""Incremental rolling price statistics maintained on each price write."""
+from collections import deque
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+import math
+import time
+
+from src.models.item import MarketData
+
+# Matches the MarketAnalytics default so both paths report the same EMA
+DEFAULT_EMA_SPAN = 12
+
+class RollingWindow:
+    """Time-bounded window with O(1) amortised aggregate updates.
+
+    Mean and variance use Welford's algorithm (with the inverse update on
+    eviction) and min/max use monotonic deques, so nothing is ever
+    re-aggregated from the full window.
+
+    The EMA covers the in-window observations only, weighted as
+    ``MarketAnalytics._ema`` weights them: the k-th of n values carries
+    ``alpha * (1 - alpha)**(n-1-k)`` and the oldest is the seed. The
+    decayed sum of ``alpha``-weighted values is kept incrementally, an
+    evicted value's term is subtracted, and the seed's remaining weight
+    is added back when the EMA is read.
+    """
+
+    __slots__ = (
+        'window_seconds', 'ema_alpha', '_samples', '_min', '_max', '_seq',
+        'count', 'mean', 'm2', 'weight_total', 'weighted_total', 'ema_total'
+    )
+
+    def __init__(self, window_seconds: float, ema_alpha: float = 2.0 / (DEFAULT_EMA_SPAN + 1)):
+        self.window_seconds = window_seconds
+        self.ema_alpha = ema_alpha
+        self._samples: Deque[Tuple[int, float, float, float]] = deque()
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._seq = 0
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.weight_total = 0.0
+        self.weighted_total = 0.0
+        self.ema_total = 0.0
+
+    def add(self, price: float, timestamp: float, weight: float = 1.0) -> None:
+        """Add an observation and evict everything that fell out of the window."""
+        self._seq += 1
+        self._samples.append((self._seq, timestamp, price, weight))
+
+        self.count += 1
+        delta = price - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (price - self.mean)
+        self.weight_total += weight
+        self.weighted_total += price * weight
+        self.ema_total = (1 - self.ema_alpha) * self.ema_total + self.ema_alpha * price
+
+        while self._min and self._min[-1][1] >= price:
+            self._min.pop()
+        self._min.append((self._seq, price))
+        while self._max and self._max[-1][1] <= price:
+            self._max.pop()
+        self._max.append((self._seq, price))
+
+        self.evict(timestamp)
+
+    def evict(self, now: float) -> None:
+        """Drop observations older than the window relative to ``now``."""
+        cutoff = now - self.window_seconds
+        while self._samples and self._samples[0][1] < cutoff:
+            seq, _, price, weight = self._samples.popleft()
+            self._remove(price, weight)
+            if self._min and self._min[0][0] == seq:
+                self._min.popleft()
+            if self._max and self._max[0][0] == seq:
+                self._max.popleft()
+
+    def _remove(self, price: float, weight: float) -> None:
+        """Inverse Welford update for an evicted observation."""
+        if self.count <= 1:
+            self.count = 0
+            self.mean = self.m2 = 0.0
+            self.weight_total = self.weighted_total = self.ema_total = 0.0
+            return
+        # The evicted value is the oldest of ``count``
+        self.ema_total -= self.ema_alpha * (1 - self.ema_alpha) ** (self.count - 1) * price
+        mean_before = self.mean
+        self.count -= 1
+        self.mean = (mean_before * (self.count + 1) - price) / self.count
+        self.m2 = max(self.m2 - (price - mean_before) * (price - self.mean), 0.0)
+        self.weight_total -= weight
+        self.weighted_total -= price * weight
+
+    @property
+    def total(self) -> float:
+        return self.mean * self.count
+
+    @property
+    def sum_squares(self) -> float:
+        return self.m2 + self.count * self.mean ** 2
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def minimum(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def maximum(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def first(self) -> Optional[float]:
+        return self._samples[0][2] if self._samples else None
+
+    @property
+    def ema(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self.ema_total + (1 - self.ema_alpha) ** self.count * self._samples[0][2]
+
+    @property
+    def vwap(self) -> Optional[float]:
+        if self.weight_total <= 0:
+            return None
+        return self.weighted_total / self.weight_total
+
+class ItemRollingStats:
+    """Rolling aggregates for a single item over 24h and 48h windows.
+
+    ``last`` and ``previous`` are the item's two most recent prices over
+    its whole history, which may be older than either window.
+    """
+
+    __slots__ = ('item_name', 'day', 'two_day', 'last', 'previous', 'last_at')
+
+    def __init__(self, item_name: Optional[str], ema_alpha: float):
+        self.item_name = item_name
+        self.day = RollingWindow(24 * 3600, ema_alpha)
+        self.two_day = RollingWindow(48 * 3600, ema_alpha)
+        self.last: Optional[float] = None
+        self.previous: Optional[float] = None
+        self.last_at: Optional[float] = None
+
+    def add(self, price: float, timestamp: float, weight: float) -> None:
+        self.day.add(price, timestamp, weight)
+        self.two_day.add(price, timestamp, weight)
+        self.previous, self.last, self.last_at = self.last, price, timestamp
+
+    def market_data(self, anomaly_z: float, now: float) -> MarketData:
+        """Trend snapshot in the same shape as ``MarketAnalytics.analyze``."""
+        self.day.evict(now)
+        self.two_day.evict(now)
+        day = self.day
+        if not day.count:
+            return MarketData()
+
+        stdev = day.stdev
+        z_score = (self.last - day.mean) / stdev if stdev > 0 else 0.0
+        return MarketData(
+            change_24h=_percent_change(day.first, self.last),
+            change_48h=_percent_change(self.two_day.first, self.last),
+            low_24h=int(day.minimum),
+            high_24h=int(day.maximum),
+            volume_24h=day.count,
+            volatility_score=stdev / day.mean if day.mean > 0 else 0.0,
+            ema=day.ema,
+            vwap=day.vwap if day.vwap is not None else day.mean,
+            z_score=z_score,
+            is_anomaly=abs(z_score) >= anomaly_z
+        )
+
+def _percent_change(first: Optional[float], last: Optional[float]) -> float:
+    if not first or last is None:
+        return 0.0
+    return (last - first) / first * 100
+
+class RollingStatsRegistry:
+    """Per-item rolling statistics fed by the price ingest path."""
+
+    def __init__(self, ema_span: int = DEFAULT_EMA_SPAN, anomaly_z: float = 3.0):
+        self._items: Dict[str, ItemRollingStats] = {}
+        self._lock = Lock()
+        self._ema_alpha = 2.0 / (ema_span + 1)
+        self._anomaly_z = anomaly_z
+        self._updated_at: Optional[datetime] = None
+
+    def record(
+        self,
+        item_id: str,
+        price: float,
+        timestamp: Optional[float] = None,
+        weight: float = 1.0,
+        item_name: Optional[str] = None
+    ) -> None:
+        """Fold a newly ingested price into the item's rolling aggregates."""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            stats = self._items.get(item_id)
+            if stats is None:
+                stats = self._items[item_id] = ItemRollingStats(item_name, self._ema_alpha)
+            elif item_name:
+                stats.item_name = item_name
+            stats.add(price, timestamp, weight)
+            self._updated_at = datetime.utcnow()
+
+    def hydrate(
+        self,
+        records: List[Dict[str, Any]],
+        latest: Sequence[Dict[str, Any]] = ()
+    ) -> None:
+        """Rebuild all aggregates from stored history.
+
+        Each record carries ``item_id``, ``item_name`` and parallel
+        ``prices``/``timestamps``/``weights`` lists ordered oldest first,
+        covering at least the last 48 hours. ``latest`` records carry the
+        item's last two ``prices`` over all history, oldest first, and the
+        ``changed_at`` timestamp of the newest; they set the last and
+        previous prices of items whose recent history has fewer.
+        """
+        with self._lock:
+            self._items.clear()
+            for record in records:
+                stats = ItemRollingStats(record.get('item_name'), self._ema_alpha)
+                weights: Sequence[float] = record.get('weights') or [1.0] * len(record['prices'])
+                for price, timestamp, weight in zip(record['prices'], record['timestamps'], weights):
+                    stats.add(price, timestamp, weight)
+                self._items[record['item_id']] = stats
+            for record in latest:
+                stats = self._items.get(record['item_id'])
+                if stats is None:
+                    stats = self._items[record['item_id']] = ItemRollingStats(
+                        record.get('item_name'), self._ema_alpha
+                    )
+                if stats.previous is None and record['prices']:
+                    stats.previous = record['prices'][-2] if len(record['prices']) > 1 else None
+                    stats.last = record['prices'][-1]
+                    stats.last_at = record['changed_at']
+            self._updated_at = datetime.utcnow()
+
+    def is_fresh(self, max_age: timedelta) -> bool:
+        """Whether aggregates were written or hydrated within ``max_age``."""
+        return self._updated_at is not None and datetime.utcnow() - self._updated_at < max_age
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._items
+
+    def trends(self, item_id: str, now: Optional[float] = None) -> MarketData:
+        """Current 24h trend data for an item in O(1) amortised."""
+        now = time.time() if now is None else now
+        with self._lock:
+            stats = self._items.get(item_id)
+            if stats is None:
+                return MarketData()
+            return stats.market_data(self._anomaly_z, now)
+
+    def price_changes(self, threshold_percent: float = 5) -> List[Dict[str, Any]]:
+        """Items whose latest price moved at least ``threshold_percent``."""
+        changes = []
+        with self._lock:
+            for item_id, stats in self._items.items():
+                if not stats.previous:
+                    continue
+                change = (stats.last - stats.previous) / stats.previous * 100
+                if abs(change) < threshold_percent:
+                    continue
+                changes.append({
+                    'item_name': stats.item_name,
+                    'item_id': item_id,
+                    'old_price': stats.previous,
+                    'new_price': stats.last,
+                    'changed_at': datetime.utcfromtimestamp(stats.last_at).isoformat(),
+                    'change_percent': change
+                })
+        changes.sort(key=lambda change: abs(change['change_percent']), reverse=True)
+        return changes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._updated_at = None
+
+# Global rolling statistics registry
+rolling_stats = RollingStatsRegistry()
@@ -0,0 +1,105 @@
+"""Carry price ingests finished in the scheduler process to every other worker."""
+import asyncio
+import logging
+from datetime import datetime
+from threading import Lock, Timer
+from typing import Any, Optional
+
+from src.core.snapshot import SnapshotVersion, price_snapshot
+from src.core.websocket import ConnectionManager, MarketUpdate, manager as websocket_manager
+from src.core.ws_protocol import FeedHistory, feed_history
+
+logger = logging.getLogger(__name__)
+
+class SnapshotRelay:
+    """Poll the persisted snapshot version and replay new prices locally.
+
+    Only the worker holding the scheduler lock ingests prices, so only
+    its caches are dropped and only its WebSocket clients are pushed to
+    when an ingest completes. Every worker runs this relay: once the
+    ``PriceSnapshot`` version in the graph is ahead of the last one it
+    relayed, it advances ``price_snapshot`` (clearing the caches
+    subscribed to it) and publishes the current price of each item its
+    clients follow that differs from what they were last sent. Comparing
+    against its own version rather than the shared stamp means nothing
+    else adopting a version first can hide an ingest from it. In the
+    ingesting worker its clients already have the prices and a poll
+    publishes nothing.
+    """
+
+    def __init__(
+        self,
+        service: Any = None,
+        snapshot: SnapshotVersion = price_snapshot,
+        connections: ConnectionManager = websocket_manager,
+        history: FeedHistory = feed_history
+    ):
+        self._service = service
+        self.snapshot = snapshot
+        self.connections = connections
+        self.history = history
+        self.interval: float = 15
+        self.last_relayed = 0
+        self._timer: Optional[Timer] = None
+        self._lock = Lock()
+
+    @property
+    def service(self) -> Any:
+        if self._service is None:
+            from src.services.market_service import MarketService
+            self._service = MarketService()
+        return self._service
+
+    async def poll(self) -> bool:
+        """Adopt a newer stored snapshot; returns whether there was one."""
+        version = await self.service.get_snapshot_version()
+        if version <= self.last_relayed:
+            return False
+        self.last_relayed = version
+        self.snapshot.advance(version)
+
+        item_ids = set(self.connections.item_subscribers)
+        if not item_ids:
+            return True
+        sent = {update.item_id: update.price for update in self.history.latest(item_ids)}
+        now = datetime.utcnow()
+        updates = [
+            MarketUpdate(item_id=record['item_id'], price=record['price'], timestamp=now)
+            for record in await self.service.get_latest_prices(sorted(item_ids))
+            if sent.get(record['item_id']) != record['price']
+        ]
+        if updates:
+            self.connections.publish_batch(updates)
+        logger.info(f"Relayed price snapshot {version} with {len(updates)} updates")
+        return True
+
+    def start(self, interval: Optional[float] = None) -> None:
+        """Poll every ``interval`` seconds; call after forking."""
+        if interval is not None:
+            self.interval = interval
+        with self._lock:
+            if self._timer is None and self.interval:
+                self._schedule()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self) -> None:
+        self._timer = Timer(self.interval, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _tick(self) -> None:
+        try:
+            asyncio.run(self.poll())
+        except Exception as e:
+            logger.error(f"Snapshot relay failed: {str(e)}")
+        with self._lock:
+            if self._timer is not None:
+                self._schedule()
+
+# Global relay, started in each worker
+snapshot_relay = SnapshotRelay()
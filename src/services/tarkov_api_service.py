@@ -4,6 +4,7 @@ import aiohttp
 import asyncio
 
 from src.graphql.queries import QUERIES
+from src.config.queries import QUERY_PROFILES
 from src.core.cache import cached
 from src.models.item import Item
 
@@ -42,7 +43,7 @@ class TarkovApiService:
             logger.error(f"Failed to execute GraphQL query: {str(e)}")
             raise
 
-    @cached(timeout=300)  # Cache for 5 minutes
+    @cached(timeout_seconds=300)  # Cache for 5 minutes
     async def get_all_items(self) -> List[Item]:
         """Fetch all items from Tarkov.dev API"""
         try:
@@ -53,6 +54,19 @@ class TarkovApiService:
             logger.error(f"Failed to fetch items: {str(e)}")
             raise
 
+    async def fetch_profile(
+        self,
+        profile_name: str,
+        item_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Fetch raw item rows using a named query profile"""
+        profile = QUERY_PROFILES[profile_name]
+        variables = dict(profile.variables)
+        if item_ids:
+            variables['ids'] = item_ids
+        result = await self._execute_query(profile.query, variables)
+        return result.get('data', {}).get('items', [])
+
     async def get_item(self, item_id: str) -> Optional[Item]:
         """Fetch a specific item by ID"""
         try:
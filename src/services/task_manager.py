@@ -1,13 +1,14 @@
 """Task management for background processing."""
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional
+from threading import Lock, Thread, current_thread
+from typing import Any, Awaitable, Dict, Optional
 from pydantic import BaseModel
 import asyncio
-import structlog
-from collections import deque
+import itertools
+import time
 
 from src.core.logging import get_logger
-from src.models.item import Item
 
 logger = get_logger(__name__)
 
@@ -17,76 +18,277 @@ class TaskResult(BaseModel):
     status: str
     result: Optional[dict] = None
     error: Optional[str] = None
+    queued_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
 
+class _QueuedTask:
+    """A coroutine waiting for a worker."""
+    __slots__ = ('task_id', 'coro', 'timeout', 'queued_at', 'enqueued')
+
+    def __init__(self, task_id: str, coro: Awaitable, timeout: Optional[float]):
+        self.task_id = task_id
+        self.coro = coro
+        self.timeout = timeout
+        self.queued_at = datetime.utcnow()
+        self.enqueued = time.monotonic()
+
+class _Timing:
+    """Count, total and maximum of a duration in seconds."""
+    __slots__ = ('count', 'total', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.maximum = max(self.maximum, seconds)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg": self.total / self.count if self.count else 0.0,
+            "max": self.maximum
+        }
+
 class TaskQueue:
-    """Async task queue manager."""
-    
-    def __init__(self, max_concurrent: int = 3):
-        self.queue = deque()
-        self.results = {}
+    """Async priority task queue.
+
+    Workers block on an ``asyncio.PriorityQueue`` instead of polling, so an
+    idle queue costs nothing and new work starts immediately. Lower
+    ``priority`` values run first, ties in submission order. Finished
+    results are kept for ``result_ttl`` seconds, at most ``max_results`` of
+    them, least recently read evicted first.
+
+    The queue and its workers belong to the event loop that starts them.
+    Code running on short-lived loops, such as Flask's async views which
+    get a fresh loop per request, uses ``submit`` and ``cancel`` instead,
+    which hand the work to a dedicated loop thread.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 3,
+        default_timeout: Optional[float] = None,
+        result_ttl: float = 3600,
+        max_results: int = 1000
+    ):
         self.max_concurrent = max_concurrent
-        self.running = set()
+        self.default_timeout = default_timeout
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self.results: 'OrderedDict[str, tuple]' = OrderedDict()
+        self.running: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[str, _QueuedTask] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+        self._thread_lock = Lock()
+        self._sequence = itertools.count()
         self._workers = []
+        self._counts = {"enqueued": 0, "completed": 0, "failed": 0, "cancelled": 0, "timeout": 0}
+        self._wait_time = _Timing()
+        self._run_time = _Timing()
 
     async def start(self):
         """Start task queue workers."""
+        loop = asyncio.get_running_loop()
+        if self._loop is None:
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError("TaskQueue is bound to another event loop; use submit()")
+        if self._workers:
+            return
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
         self._workers = [
             asyncio.create_task(self._worker())
             for _ in range(self.max_concurrent)
         ]
 
     async def stop(self):
-        """Stop all workers."""
+        """Stop all workers, cancelling running tasks."""
         for worker in self._workers:
             worker.cancel()
         await asyncio.gather(*self._workers, return_exceptions=True)
         self._workers.clear()
+        if not self._pending and self._thread is None:
+            # Nothing left on the old loop; the next start may use another
+            self._queue = self._loop = None
+
+    def _dedicated_loop(self) -> asyncio.AbstractEventLoop:
+        """The queue's own loop thread, started on first use."""
+        with self._thread_lock:
+            if self._thread is None:
+                if self._loop is not None:
+                    raise RuntimeError("TaskQueue is already running on another event loop")
+                self._loop = asyncio.new_event_loop()
+                self._thread = Thread(target=self._loop.run_forever, name='task-queue', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(
+        self,
+        task_id: str,
+        coro,
+        priority: int = 0,
+        timeout: Optional[float] = None
+    ) -> None:
+        """Queue a task from any thread or loop; it runs on the queue's own loop."""
+        loop = self._dedicated_loop()
+        asyncio.run_coroutine_threadsafe(self.enqueue(task_id, coro, priority, timeout), loop).result()
+
+    def shutdown(self) -> None:
+        """Stop the workers and the loop thread started by ``submit``."""
+        with self._thread_lock:
+            thread, loop = self._thread, self._loop
+            if thread is None:
+                return
+            asyncio.run_coroutine_threadsafe(self.stop(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            for queued in self._pending.values():
+                queued.coro.close()
+            self._pending.clear()
+            self._thread = self._loop = self._queue = None
 
     async def _worker(self):
         """Worker process to handle queued tasks."""
         while True:
+            _, _, task_id = await self._queue.get()
             try:
-                if not self.queue:
-                    await asyncio.sleep(0.1)
+                queued = self._pending.pop(task_id, None)
+                if queued is None:
+                    # Cancelled while waiting in the queue
                     continue
-
-                task_id, coro = self.queue.popleft()
-                self.running.add(task_id)
-
-                try:
-                    result = await coro
-                    self.results[task_id] = TaskResult(
-                        task_id=task_id,
-                        status="completed",
-                        result=result,
-                        completed_at=datetime.utcnow()
-                    )
-                except Exception as e:
-                    logger.exception("Task failed", task_id=task_id)
-                    self.results[task_id] = TaskResult(
-                        task_id=task_id,
-                        status="failed",
-                        error=str(e),
-                        completed_at=datetime.utcnow()
-                    )
-                finally:
-                    self.running.remove(task_id)
-
+                await self._run(queued)
             except asyncio.CancelledError:
-                break
+                raise
             except Exception:
-                logger.exception("Worker error")
-                await asyncio.sleep(1)
+                logger.exception("Worker error", task_id=task_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, queued: _QueuedTask) -> None:
+        started = time.monotonic()
+        started_at = datetime.utcnow()
+        self._wait_time.add(started - queued.enqueued)
+
+        task = asyncio.ensure_future(queued.coro)
+        self.running[queued.task_id] = task
+        try:
+            done, _ = await asyncio.wait({task}, timeout=queued.timeout)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            self.running.pop(queued.task_id, None)
+
+        if not done:
+            task.cancel()
+            status, result, error = "timeout", None, f"Task exceeded {queued.timeout}s timeout"
+        elif task.cancelled():
+            status, result, error = "cancelled", None, None
+        elif task.exception() is not None:
+            logger.error("Task failed", task_id=queued.task_id, error=str(task.exception()))
+            status, result, error = "failed", None, str(task.exception())
+        else:
+            status, result, error = "completed", task.result(), None
+
+        self._run_time.add(time.monotonic() - started)
+        self._store_result(TaskResult(
+            task_id=queued.task_id,
+            status=status,
+            result=result,
+            error=error,
+            queued_at=queued.queued_at,
+            started_at=started_at,
+            completed_at=datetime.utcnow()
+        ))
+
+    async def enqueue(
+        self,
+        task_id: str,
+        coro,
+        priority: int = 0,
+        timeout: Optional[float] = None
+    ) -> None:
+        """Add a task to the queue, starting workers on first use."""
+        await self.start()
+        self._pending[task_id] = _QueuedTask(
+            task_id,
+            coro,
+            timeout if timeout is not None else self.default_timeout
+        )
+        self._counts["enqueued"] += 1
+        self._queue.put_nowait((priority, next(self._sequence), task_id))
+        logger.info("Task enqueued", task_id=task_id, priority=priority)
 
-    async def enqueue(self, task_id: str, coro) -> None:
-        """Add a task to the queue."""
-        self.queue.append((task_id, coro))
-        logger.info("Task enqueued", task_id=task_id)
+    def cancel(self, task_id: str) -> bool:
+        """Cancel a queued or running task."""
+        if self._thread is not None and current_thread() is not self._thread:
+            return asyncio.run_coroutine_threadsafe(self._cancel_on_loop(task_id), self._loop).result()
+        return self._cancel(task_id)
+
+    async def _cancel_on_loop(self, task_id: str) -> bool:
+        return self._cancel(task_id)
+
+    def _cancel(self, task_id: str) -> bool:
+        queued = self._pending.pop(task_id, None)
+        if queued is not None:
+            queued.coro.close()
+            self._store_result(TaskResult(
+                task_id=task_id,
+                status="cancelled",
+                queued_at=queued.queued_at,
+                completed_at=datetime.utcnow()
+            ))
+            return True
+
+        task = self.running.get(task_id)
+        if task is not None:
+            return task.cancel()
+        return False
+
+    def _store_result(self, result: TaskResult) -> None:
+        self._counts[result.status] += 1
+        self.results[result.task_id] = (time.monotonic(), result)
+        self.results.move_to_end(result.task_id)
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
 
     def get_result(self, task_id: str) -> Optional[TaskResult]:
-        """Get the result of a task."""
-        return self.results.get(task_id)
+        """Get the result or current status of a task."""
+        if task_id in self._pending:
+            queued = self._pending[task_id]
+            return TaskResult(task_id=task_id, status="queued", queued_at=queued.queued_at)
+        if task_id in self.running:
+            return TaskResult(task_id=task_id, status="running")
+
+        entry = self.results.get(task_id)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.result_ttl:
+            del self.results[task_id]
+            return None
+        self.results.move_to_end(task_id)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, outcome counts and wait/run time summaries."""
+        return {
+            "queue_depth": len(self._pending),
+            "running": len(self.running),
+            "stored_results": len(self.results),
+            **self._counts,
+            "wait_time": self._wait_time.as_dict(),
+            "run_time": self._run_time.as_dict()
+        }
 
 # Global task queue instance
-task_queue = TaskQueue()
\ No newline at end of file
+task_queue = TaskQueue()
@@ -0,0 +1,203 @@
+"""Precomputed item availability by trader, loyalty level and quest unlocks."""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.services.combination_search import FLEA_MARKET, PriceArrays
+
+MAX_LOYALTY_LEVEL = 4
+
+@dataclass(frozen=True)
+class PlayerProfile:
+    """What a player can buy: trader loyalty levels and finished quests.
+
+    Traders missing from ``trader_levels`` count as fully unlocked and
+    ``completed_tasks=None`` as every quest done, so an empty profile
+    restricts nothing.
+    """
+    trader_levels: Tuple[Tuple[str, int], ...] = ()
+    completed_tasks: Optional[FrozenSet[str]] = None
+    flea_market: bool = True
+
+    @classmethod
+    def from_request(cls, data: Mapping[str, Any]) -> 'PlayerProfile':
+        """Build a profile from ``trader_levels``/``completed_tasks``/``flea_market`` fields.
+
+        Loyalty levels are clamped to ``0..MAX_LOYALTY_LEVEL``.
+        """
+        tasks = data.get('completed_tasks')
+        levels = {
+            vendor: min(max(int(level), 0), MAX_LOYALTY_LEVEL)
+            for vendor, level in (data.get('trader_levels') or {}).items()
+        }
+        return cls(
+            trader_levels=tuple(sorted(levels.items())),
+            completed_tasks=frozenset(tasks) if tasks is not None else None,
+            flea_market=data.get('flea_market', True)
+        )
+
+    def level(self, vendor: str) -> int:
+        if vendor == FLEA_MARKET:
+            return 1 if self.flea_market else 0
+        return dict(self.trader_levels).get(vendor, MAX_LOYALTY_LEVEL)
+
+    def can_buy(self, vendor: str, min_level: Optional[int] = None, task_id: Optional[str] = None) -> bool:
+        """Whether one offer, with its own loyalty level and quest, is open."""
+        if self.level(vendor) < max(min_level or 1, 1):
+            return False
+        return not task_id or self.completed_tasks is None or task_id in self.completed_tasks
+
+    @property
+    def restricts(self) -> bool:
+        return bool(self.trader_levels) or self.completed_tasks is not None or not self.flea_market
+
+    def key(self) -> Dict[str, Any]:
+        """Stable description for cache keys."""
+        return {
+            'trader_levels': list(self.trader_levels),
+            'completed_tasks': sorted(self.completed_tasks) if self.completed_tasks is not None else None,
+            'flea_market': self.flea_market
+        }
+
+class AvailabilityIndex:
+    """Cheapest buy offer per item and offer tier.
+
+    A tier is a ``(vendor, min_level, task)`` combination, so each offer
+    keeps its own loyalty level and quest: a trader selling an item at
+    two levels, or once with and once without a quest, contributes two
+    tiers rather than one merged offer. ``prices[i, t]`` is the cheapest
+    offer of item ``i`` in tier ``t``, inf where there is none, and
+    ``tier_task`` is the quest that unlocks a tier, or -1. The flea
+    market is a vendor whose only level, 1, stands for access. Filtering
+    for a profile decides each tier once and masks the price matrix.
+    """
+
+    def __init__(
+        self,
+        item_ids: List[str],
+        vendors: List[str],
+        tasks: List[str],
+        prices: np.ndarray,
+        tier_vendor: np.ndarray,
+        tier_level: np.ndarray,
+        tier_task: np.ndarray
+    ):
+        self.item_ids = item_ids
+        self.vendors = vendors
+        self.tasks = tasks
+        self.prices = prices
+        self.tier_vendor = tier_vendor
+        self.tier_level = tier_level
+        self.tier_task = tier_task
+        self._rows = {item_id: row for row, item_id in enumerate(item_ids)}
+        self._columns = {vendor: column for column, vendor in enumerate(vendors)}
+
+    @classmethod
+    def from_offers(cls, records: Sequence[Dict[str, Any]]) -> 'AvailabilityIndex':
+        """Build from ``item_id``/``vendor``/``price_rub``/``min_level``/``task_id`` records."""
+        item_ids, rows = np.unique([r['item_id'] for r in records], return_inverse=True)
+        vendors, vendor_numbers = np.unique([r['vendor'] for r in records], return_inverse=True)
+        tasks = sorted({r['task_id'] for r in records if r.get('task_id')})
+        task_numbers = {task: number for number, task in enumerate(tasks)}
+
+        keys = np.array([
+            (vendor, max(r.get('min_level') or 1, 1), task_numbers.get(r.get('task_id'), -1))
+            for vendor, r in zip(vendor_numbers, records)
+        ], dtype=np.int64).reshape(-1, 3)
+        tiers, columns = np.unique(keys, axis=0, return_inverse=True)
+
+        prices = np.full((len(item_ids), len(tiers)), np.inf)
+        np.minimum.at(prices, (rows, columns.reshape(-1)), [float(r['price_rub']) for r in records])
+        return cls(
+            item_ids.tolist(), vendors.tolist(), tasks, prices,
+            tiers[:, 0], tiers[:, 1], tiers[:, 2]
+        )
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def open_tiers(self, profile: PlayerProfile) -> np.ndarray:
+        """Whether each tier is open to ``profile``."""
+        levels = np.array([profile.level(vendor) for vendor in self.vendors], dtype=np.int64)
+        available = levels[self.tier_vendor] >= self.tier_level
+        if profile.completed_tasks is not None and self.tasks:
+            # Index -1 (no quest needed) picks the trailing True
+            done = np.array([task in profile.completed_tasks for task in self.tasks] + [True])
+            available &= done[self.tier_task]
+        return available
+
+    def vendor_prices(self, profile: PlayerProfile) -> np.ndarray:
+        """Cheapest offer per item and vendor open to ``profile``, inf where there is none."""
+        open_prices = np.where(self.open_tiers(profile), self.prices, np.inf)
+        by_vendor = np.full((len(self.item_ids), len(self.vendors)), np.inf)
+        np.minimum.at(by_vendor.T, self.tier_vendor, open_prices.T)
+        return by_vendor
+
+    def mask(self, profile: PlayerProfile) -> np.ndarray:
+        """Item x vendor offers open to ``profile``."""
+        return np.isfinite(self.vendor_prices(profile))
+
+    def buy_prices(self, profile: PlayerProfile) -> np.ndarray:
+        """Cheapest offer per item open to ``profile``, inf where there is none."""
+        open_prices = np.where(self.open_tiers(profile), self.prices, np.inf)
+        return open_prices.min(axis=1, initial=np.inf)
+
+    def offer_available(self, profile: PlayerProfile, pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+        """Whether each ``(item_id, vendor)`` offer is open to ``profile``."""
+        mask = self.mask(profile)
+        rows = np.array([self._rows.get(item_id, -1) for item_id, _ in pairs], dtype=np.intp)
+        columns = np.array([self._columns.get(vendor, -1) for _, vendor in pairs], dtype=np.intp)
+        known = (rows >= 0) & (columns >= 0)
+        result = np.zeros(len(pairs), dtype=bool)
+        result[known] = mask[rows[known], columns[known]]
+        return result
+
+    def apply(self, prices: PriceArrays, profile: PlayerProfile) -> Tuple[PriceArrays, np.ndarray]:
+        """Reprice ``prices`` for ``profile`` and flag the items it can buy.
+
+        Items with indexed offers buy at their cheapest open one and are
+        unavailable if none is open; items the index knows nothing about
+        keep their price.
+        """
+        rows = np.array([self._rows.get(item_id, -1) for item_id in prices.item_ids], dtype=np.intp)
+        known = rows >= 0
+        best = self.buy_prices(profile)[rows[known]]
+        buy = prices.buy_prices.copy()
+        available = np.ones(len(rows), dtype=bool)
+        available[known] = np.isfinite(best)
+        buy[np.flatnonzero(known)[available[known]]] = best[available[known]]
+        return PriceArrays(prices.item_ids, prices.base_prices, buy, prices.flea_only), available
+
+class TraderAvailability:
+    """Holds the availability index for the latest ingest, rebuilt on demand."""
+
+    def __init__(self, max_age: timedelta = timedelta(minutes=5)):
+        self.max_age = max_age
+        self._index: Optional[AvailabilityIndex] = None
+        self._version = -1
+        self._built_at: Optional[datetime] = None
+        self._lock = Lock()
+
+    @property
+    def index(self) -> Optional[AvailabilityIndex]:
+        return self._index
+
+    def is_stale(self, version: Optional[int] = None) -> bool:
+        """Whether the index is missing, too old or behind ``version``."""
+        if self._index is None:
+            return True
+        if version is not None and self._version < version:
+            return True
+        return datetime.utcnow() - self._built_at > self.max_age
+
+    def build(self, version: int, records: Sequence[Dict[str, Any]]) -> AvailabilityIndex:
+        index = AvailabilityIndex.from_offers(records)
+        with self._lock:
+            self._index, self._version, self._built_at = index, version, datetime.utcnow()
+        return index
+
+# Global availability index
+trader_availability = TraderAvailability()
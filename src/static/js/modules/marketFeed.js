@@ -0,0 +1,115 @@
+// Market price feed over /ws/market.
+// Uses the compact delta protocol when the browser can inflate frames,
+// falls back to JSON batches otherwise, and renders at most once per
+// animation frame however many updates arrive.
+class MarketFeed {
+    constructor(onPrices, url = `${location.protocol === 'https:' ? 'wss' : 'ws'}://${location.host}/ws/market`) {
+        this.url = url;
+        this.onPrices = onPrices;
+        this.items = new Set();
+        this.prices = new Map();
+        this.dictionary = new Map();
+        this.seq = null;
+        this.epoch = null;
+        this.changed = new Map();
+        this.renderScheduled = false;
+        this.pending = Promise.resolve();
+        this.reconnectDelay = 1000;
+        this.supportsDelta = typeof DecompressionStream !== 'undefined';
+    }
+
+    connect() {
+        this.socket = new WebSocket(this.url);
+        this.socket.binaryType = 'arraybuffer';
+        this.socket.onopen = () => {
+            this.reconnectDelay = 1000;
+            this.dictionary.clear();
+            this.socket.send(JSON.stringify({
+                type: 'hello',
+                protocol: this.supportsDelta ? 'delta' : 'json',
+                seq: this.seq,
+                epoch: this.epoch,
+                items: [...this.items]
+            }));
+        };
+        // Inflating is async; chain frames so deltas apply in arrival order
+        this.socket.onmessage = (event) => {
+            this.pending = this.pending
+                .then(() => this.handleMessage(event.data))
+                .catch(error => console.error('Market feed frame failed:', error));
+        };
+        this.socket.onclose = () => {
+            setTimeout(() => this.connect(), this.reconnectDelay);
+            this.reconnectDelay = Math.min(this.reconnectDelay * 2, 30000);
+        };
+    }
+
+    subscribe(itemId) {
+        this.items.add(itemId);
+        if (this.socket?.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify({ type: 'subscribe', item_id: itemId }));
+        }
+    }
+
+    unsubscribe(itemId) {
+        this.items.delete(itemId);
+        if (this.socket?.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify({ type: 'unsubscribe', item_id: itemId }));
+        }
+    }
+
+    async handleMessage(data) {
+        if (typeof data === 'string') {
+            const message = JSON.parse(data);
+            if (message.type === 'hello') {
+                // Sequence numbers only resume on the process that issued them
+                this.epoch = message.epoch;
+            } else if (message.type === 'batch') {
+                message.updates.forEach(update => this.applyPrice(update.item_id, update.price));
+                this.seq = message.seq;
+                this.scheduleRender();
+            }
+            return;
+        }
+        this.applyFrame(await this.inflate(data));
+    }
+
+    async inflate(buffer) {
+        const stream = new Blob([buffer]).stream().pipeThrough(new DecompressionStream('deflate'));
+        return JSON.parse(await new Response(stream).text());
+    }
+
+    applyFrame(frame) {
+        if (frame.k === 's') {
+            this.prices.clear();
+        }
+        Object.entries(frame.n || {}).forEach(([index, itemId]) => {
+            this.dictionary.set(Number(index), itemId);
+        });
+        frame.u.forEach(([index, price]) => this.applyPrice(this.dictionary.get(index), price));
+        this.seq = frame.s;
+        this.scheduleRender();
+    }
+
+    applyPrice(itemId, price) {
+        this.prices.set(itemId, price);
+        this.changed.set(itemId, price);
+    }
+
+    scheduleRender() {
+        if (this.renderScheduled) {
+            return;
+        }
+        this.renderScheduled = true;
+        requestAnimationFrame(() => {
+            this.renderScheduled = false;
+            const changed = this.changed;
+            this.changed = new Map();
+            if (changed.size) {
+                this.onPrices(changed);
+            }
+        });
+    }
+}
+
+export default MarketFeed;
@@ -5,12 +5,11 @@ from datetime import datetime, timedelta
 from flask import render_template, jsonify, request
 from flask.views import MethodView
 
-from src.services.market_service import MarketService
-from src.services.item_service import ItemService
+from src.core.providers import ServiceProvider
 from src.types.responses import MarketStatistics, TradeOpportunity
 
-market_service = MarketService()
-item_service = ItemService()
+market_service = ServiceProvider('src.services.market_service:MarketService')
+item_service = ServiceProvider('src.services.item_service:ItemService')
 
 class MarketOverviewView(MethodView):
     """Market overview and analysis view."""
@@ -74,35 +73,7 @@ class CraftAnalysisView(MethodView):
             min_profit = request.json.get('min_profit', 10000)
             include_barter = request.json.get('include_barter', True)
             
-            query = await item_service._execute_query("""
-                MATCH (i:Item)<-[:PRODUCES]-(c:Trade {type: 'craft'})
-                MATCH (c)-[r:REQUIRES]->(req:Item)
-                WITH i, c, collect({
-                    item: req,
-                    count: toInteger(r.count)
-                }) as requirements
-                MATCH (i)-[:CAN_SELL_TO]->(st:Trade)
-                WHERE st.priceRUB = max(st.priceRUB)
-                WITH i, c, requirements, st.priceRUB as sell_price
-                WHERE sell_price - reduce(
-                    cost = 0,
-                    r IN requirements |
-                    cost + r.item.last_low_price * r.count
-                ) >= $min_profit
-                RETURN i.name as item_name,
-                       i.uid as item_id,
-                       c.station as station,
-                       c.level as level,
-                       requirements,
-                       sell_price,
-                       sell_price - reduce(
-                           cost = 0,
-                           r IN requirements |
-                           cost + r.item.last_low_price * r.count
-                       ) as profit,
-                       c.duration as duration
-                ORDER BY profit DESC
-            """, {"min_profit": min_profit})
+            query = await item_service.find_profitable_crafts(min_profit)
 
             if include_barter:
                 for item in query:
@@ -145,12 +116,14 @@ class MarketTrendsView(MethodView):
             items = request.json.get('items', [])
             item_trends = {}
             if items:
-                for item_id in items:
-                    trends = await market_service.analyze_market_trends(
-                        item_id,
-                        timeframe_hours=timeframe
-                    )
-                    item_trends[item_id] = trends.model_dump()
+                trends = await market_service.analyze_market_trends_bulk(
+                    items,
+                    timeframe_hours=timeframe
+                )
+                item_trends = {
+                    item_id: data.model_dump()
+                    for item_id, data in trends.items()
+                }
 
             return jsonify({
                 'success': True,
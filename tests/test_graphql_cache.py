@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+import strawberry
+
+from src.core.snapshot import SnapshotVersion
+from src.graphql import cache as cache_module
+from src.graphql.cache import (
+    PERSISTED_QUERY_ERROR_EXTENSION,
+    QUERY_HASH_EXTENSION,
+    PersistedQueryMismatch,
+    PersistedQueryNotFound,
+    PersistedQueryRegistry,
+    QueryResultCache,
+    ResultCacheExtension,
+    query_hash,
+)
+
+QUERY = "query Items { items { name } }"
+
+def _persisted(sha):
+    return {'persistedQuery': {'version': 1, 'sha256Hash': sha}}
+
+def test_unknown_hash_requires_registration():
+    registry = PersistedQueryRegistry()
+    sha = query_hash(QUERY)
+    with pytest.raises(PersistedQueryNotFound):
+        registry.resolve(None, _persisted(sha))
+
+    assert registry.resolve(QUERY, _persisted(sha)) == (QUERY, sha)
+    assert registry.resolve(None, _persisted(sha)) == (QUERY, sha)
+
+def test_mismatched_hash_is_rejected():
+    with pytest.raises(PersistedQueryMismatch):
+        PersistedQueryRegistry().resolve(QUERY, _persisted('0' * 64))
+
+def test_registry_is_bounded():
+    registry = PersistedQueryRegistry(max_size=2)
+    for index in range(3):
+        registry.resolve(f"{{ q{index} }}", None)
+    assert len(registry) == 2
+    with pytest.raises(PersistedQueryNotFound):
+        registry.resolve(None, _persisted(query_hash("{ q0 }")))
+
+def test_result_cache_invalidated_by_snapshot(monkeypatch):
+    snapshot = SnapshotVersion()
+    monkeypatch.setattr(cache_module, 'price_snapshot', snapshot)
+    results = QueryResultCache()
+    key = QueryResultCache.key('abc', None, {'b': 1, 'a': 2})
+
+    results.set(key, 'result')
+    assert results.get(QueryResultCache.key('abc', None, {'a': 2, 'b': 1})) == 'result'
+
+    snapshot.advance(1)
+    assert results.get(key) is None
+
+def _counting_schema(calls):
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def count(self) -> int:
+            calls.append('query')
+            return len(calls)
+
+    @strawberry.type
+    class Mutation:
+        @strawberry.mutation
+        def touch(self) -> bool:
+            calls.append('mutation')
+            return True
+
+    return strawberry.Schema(query=Query, mutation=Mutation, extensions=[ResultCacheExtension])
+
+def _execute(schema, query, **extensions):
+    return asyncio.run(schema.execute(query, operation_extensions=extensions))
+
+def test_extension_caches_hashed_queries_until_a_mutation(monkeypatch):
+    monkeypatch.setattr(cache_module, 'result_cache', QueryResultCache())
+    calls = []
+    schema = _counting_schema(calls)
+    query, mutation = "{ count }", "mutation { touch }"
+
+    assert _execute(schema, query, **{QUERY_HASH_EXTENSION: query_hash(query)}).data == {'count': 1}
+    assert _execute(schema, query, **{QUERY_HASH_EXTENSION: query_hash(query)}).data == {'count': 1}
+    # Operations the view did not tag are always executed
+    assert _execute(schema, query).data == {'count': 2}
+
+    _execute(schema, mutation, **{QUERY_HASH_EXTENSION: query_hash(mutation)})
+    assert _execute(schema, query, **{QUERY_HASH_EXTENSION: query_hash(query)}).data == {'count': 4}
+    assert calls == ['query', 'query', 'mutation', 'query']
+
+def test_extension_reports_persisted_query_errors():
+    calls = []
+    result = _execute(
+        _counting_schema(calls), None,
+        **{PERSISTED_QUERY_ERROR_EXTENSION: PersistedQueryNotFound()}
+    )
+    assert result.data is None
+    assert [error.message for error in result.errors] == ['PersistedQueryNotFound']
+    assert calls == []
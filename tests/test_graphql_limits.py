@@ -0,0 +1,90 @@
+import asyncio
+import typing
+
+from graphql import build_schema, parse, validate
+
+from src.graphql.limits import MAX_LIST_SIZE, complexity_limit_rule
+from src.graphql.loaders import GraphQLLoaders
+
+SCHEMA = build_schema("""
+    type Price { price: Float }
+    type Item { name: String, history: [Price] }
+    type Query { items(limit: Int): [Item] }
+""")
+
+def _errors(query: str, max_complexity: int):
+    return validate(SCHEMA, parse(query), [complexity_limit_rule(max_complexity, default_list_size=10)])
+
+def test_complexity_multiplies_list_selections():
+    # items(limit: 5) x (name + history(10 x price)) = 5 * (1 + 1 + 10 * 2) = 110
+    query = "{ items(limit: 5) { name history { price } } }"
+    assert not _errors(query, 110)
+    assert _errors(query, 109)
+
+def test_complexity_counts_fragments():
+    query = """
+        { items { ...ItemFields } }
+        fragment ItemFields on Item { name }
+    """
+    assert not _errors(query, 20)
+    assert _errors(query, 19)
+
+class FakeService:
+    def __init__(self):
+        self.calls = []
+
+    @staticmethod
+    def _map_projection(variable, properties=None):
+        return f"{variable} {{{', '.join('.' + prop for prop in properties)}}}"
+
+    async def _execute_query(self, query, params=None):
+        self.calls.append(query)
+        return [{'item_id': item_id, 'item': {'uid': item_id}} for item_id in params['item_ids']]
+
+def test_item_loader_batches_concurrent_loads():
+    service = FakeService()
+
+    async def run():
+        loaders = GraphQLLoaders(service, service)
+        return await asyncio.gather(*(
+            loaders.item_by_id.load((item_id, ('name', 'uid'))) for item_id in ['a', 'b', 'a']
+        ))
+
+    results = asyncio.run(run())
+    assert [result['uid'] for result in results] == ['a', 'b', 'a']
+    assert len(service.calls) == 1
+    assert 'i {.name, .uid}' in service.calls[0]
+
+def test_variable_limits_are_costed_by_their_value():
+    query = "query Items($n: Int) { items(limit: $n) { name } }"
+    document = parse(query)
+    # 5 * (1 + 1) = 10
+    assert not validate(SCHEMA, document, [complexity_limit_rule(10, variables={'n': 5})])
+    assert validate(SCHEMA, document, [complexity_limit_rule(11, variables={'n': 1000000})])
+    # Unknown variables are charged as the largest page a resolver returns
+    assert validate(SCHEMA, document, [complexity_limit_rule(MAX_LIST_SIZE * 2 - 1)])
+
+def test_limiter_rejects_variable_limits_at_execution():
+    import strawberry
+    from strawberry.extensions import ValidationCache
+
+    from src.graphql.limits import QueryComplexityLimiter
+
+    @strawberry.type
+    class Item:
+        name: str
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def items(self, limit: int = 20) -> typing.List[Item]:
+            return [Item(name='a')] * limit
+
+    schema = strawberry.Schema(Query, extensions=[
+        ValidationCache(maxsize=8), QueryComplexityLimiter(max_complexity=20)
+    ])
+    query = "query Items($n: Int!) { items(limit: $n) { name } }"
+
+    assert not schema.execute_sync(query, variable_values={'n': 5}).errors
+    result = schema.execute_sync(query, variable_values={'n': 50})
+    assert result.errors and 'complexity' in result.errors[0].message
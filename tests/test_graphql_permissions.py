@@ -0,0 +1,40 @@
+import jwt
+import strawberry
+from flask import Flask
+
+from src.graphql.permissions import IsAdmin
+
+@strawberry.type
+class Query:
+    ping: str = 'pong'
+
+@strawberry.type
+class Mutation:
+    @strawberry.mutation(permission_classes=[IsAdmin])
+    def apply_item_adjustments(self) -> bool:
+        return True
+
+SCHEMA = strawberry.Schema(query=Query, mutation=Mutation)
+
+class FakeRequest:
+    def __init__(self, cookies):
+        self.cookies = cookies
+
+def _mutate(app, cookies):
+    with app.app_context():
+        return SCHEMA.execute_sync(
+            "mutation { applyItemAdjustments }",
+            context_value={'request': FakeRequest(cookies)}
+        )
+
+def test_admin_mutations_need_a_valid_admin_token():
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'secret'
+
+    assert _mutate(app, {}).errors
+    forged = jwt.encode({'admin': True}, 'other-secret', algorithm='HS256')
+    assert _mutate(app, {'admin_token': forged}).errors
+
+    token = jwt.encode({'admin': True}, 'secret', algorithm='HS256')
+    result = _mutate(app, {'admin_token': token})
+    assert not result.errors and result.data == {'applyItemAdjustments': True}
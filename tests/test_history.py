@@ -105,5 +105,107 @@ class TestHistory(unittest.TestCase):
         data = json.loads(response.data)
         self.assertIn('aggregatedHistory', data)
 
+class TestCombinationHash(unittest.TestCase):
+    def test_hash_ignores_item_order(self):
+        from src.core.neo4j import Neo4jClient
+
+        self.assertEqual(
+            Neo4jClient.combination_hash(['gpu', 'ledx', 'gpu']),
+            Neo4jClient.combination_hash(['ledx', 'gpu', 'gpu'])
+        )
+        self.assertNotEqual(
+            Neo4jClient.combination_hash(['gpu', 'ledx']),
+            Neo4jClient.combination_hash(['gpu', 'ledx', 'gpu'])
+        )
+
+class _FakeTransaction:
+    def __init__(self, stored):
+        self.stored = stored
+        self.runs = []
+        self.committed = False
+
+    def run(self, query, **parameters):
+        self.runs.append((query, parameters))
+        if 'MERGE (c:Combination' not in query:
+            return []
+        # MERGE sees earlier rows of the same statement, so a repeated
+        # combination matches the node its first occurrence created
+        records = []
+        for row in parameters['rows']:
+            self.stored.setdefault(row['hash'], row['id'])
+            records.append({'hash': row['hash'], 'id': self.stored[row['hash']]})
+        return list(reversed(records))
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+class _FakeDriver:
+    def __init__(self, stored):
+        self.tx = _FakeTransaction(stored)
+
+    def session(self):
+        driver = self
+
+        class _Session:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def begin_transaction(self):
+                return driver.tx
+
+        return _Session()
+
+class TestSaveCombinations(unittest.TestCase):
+    def _client(self, stored):
+        from src.core.neo4j import Neo4jClient
+
+        client = object.__new__(Neo4jClient)
+        client.driver = _FakeDriver(stored)
+        return client
+
+    def test_batch_runs_one_statement_and_maps_rows_to_ids(self):
+        from src.core.neo4j import Neo4jClient
+
+        existing = Neo4jClient.combination_hash(['ledx', 'gpu'])
+        client = self._client({existing: 'saved-before'})
+
+        ids = client.save_combinations([
+            {'items': ['gpu', 'ledx'], 'total_price': 100},
+            {'items': ['tetriz'], 'total_price': 50},
+            {'items': ['ledx', 'gpu'], 'total_price': 100},
+        ])
+
+        tx = client.driver.tx
+        self.assertEqual(len(tx.runs), 1)
+        self.assertTrue(tx.committed)
+        query, parameters = tx.runs[0]
+        self.assertIn('UNWIND $rows AS row', query)
+        self.assertEqual(len(parameters['rows']), 3)
+        self.assertEqual(parameters['rows'][1]['item_ids'], ['tetriz'])
+        self.assertEqual(ids[0], 'saved-before')
+        self.assertEqual(ids[2], 'saved-before')
+        self.assertEqual(ids[1], parameters['rows'][1]['id'])
+
+    def test_resave_refreshes_created(self):
+        client = self._client({})
+        client.save_combinations([{'items': ['gpu'], 'total_price': 10}])
+
+        query, _ = client.driver.tx.runs[0]
+        on_match = query.split('ON MATCH SET', 1)[1]
+        self.assertIn('c.created = datetime()', on_match)
+
+    def test_full_save_links_items(self):
+        client = self._client({})
+        client.save_combinations([{'items': ['gpu'], 'total_price': 10}], compact=False)
+
+        self.assertEqual(len(client.driver.tx.runs), 2)
+        self.assertIn('INCLUDES', client.driver.tx.runs[1][0])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
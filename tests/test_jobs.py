@@ -0,0 +1,34 @@
+import threading
+
+from src.core.jobs import JobRunner
+from src.core.metrics import MetricsCollector
+
+def test_runs_record_duration_stages_and_failures():
+    metrics = MetricsCollector()
+    runner = JobRunner(metrics=metrics)
+
+    result = runner.run('sync_prices', lambda: {'stages': {'fetch': 1.5, 'merge': 0.5}})
+    assert result['stages']['fetch'] == 1.5
+    assert runner.run('sync_prices', lambda: 1 / 0) is None
+
+    stats = metrics.get_job_stats()['sync_prices']
+    assert stats['runs'] == 2 and stats['failures'] == 1
+    assert stats['stages'] == {'fetch': 1.5, 'merge': 0.5}
+    assert stats['last_success'] is not None
+
+def test_watchdog_counts_runs_past_their_deadline():
+    metrics = MetricsCollector()
+    runner = JobRunner(metrics=metrics)
+    release = threading.Event()
+
+    def stuck():
+        # Hold the run open until the watchdog has fired
+        while not metrics.get_job_stats().get('slow', {}).get('overruns'):
+            release.wait(0.01)
+
+    runner.run('slow', stuck, deadline=0.05)
+    runner.run('fast', lambda: None, deadline=5)
+
+    stats = metrics.get_job_stats()
+    assert stats['slow']['overruns'] == 1
+    assert stats['fast']['overruns'] == 0
@@ -0,0 +1,32 @@
+import multiprocessing
+
+from src.core.leader import FileLock
+
+def _try_lock(path, results):
+    results.put(FileLock(path).acquire())
+
+def _acquired_elsewhere(path) -> bool:
+    """Whether a separate process can take the lock; record locks are per process."""
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=_try_lock, args=(path, results))
+    process.start()
+    process.join()
+    return results.get(timeout=5)
+
+def test_one_process_holds_the_lock_until_release(tmp_path):
+    path = str(tmp_path / 'scheduler.lock')
+    leader = FileLock(path)
+    assert leader.acquire() and leader.held
+    # Forked children neither inherit the lock nor can take it
+    assert not _acquired_elsewhere(path)
+
+    leader.release()
+    assert not leader.held
+    assert _acquired_elsewhere(path)
+
+def test_lock_is_freed_when_the_holder_exits(tmp_path):
+    path = str(tmp_path / 'scheduler.lock')
+    # The child takes the lock and exits without releasing it
+    assert _acquired_elsewhere(path)
+    assert FileLock(path).acquire()
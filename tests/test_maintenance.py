@@ -0,0 +1,53 @@
+from src.database.maintenance import DatabaseMaintenance
+from src.database.query_log import QueryLog
+
+class FakeDB:
+    def __init__(self, indexes=()):
+        self.indexes = list(indexes)
+        self.statements = []
+
+    def query(self, query, parameters=None):
+        self.statements.append((query.strip(), parameters))
+        if query.startswith('SHOW INDEXES'):
+            return self.indexes
+        if 'IN TRANSACTIONS' in query:
+            return [{'deleted': 3}]
+        if 'broken' in query:
+            raise RuntimeError('syntax error')
+        return []
+
+    def execute(self, query, parameters=None):
+        self.statements.append((query.strip(), parameters))
+
+def test_query_log_ranks_statements_and_shrinks_parameters():
+    log = QueryLog()
+    for _ in range(3):
+        log.record("MATCH (i:Item {uid: $id})\n  RETURN i", {'id': 'a'})
+    log.record("UNWIND $rows AS row RETURN row", {'rows': [{'id': 'a'}, {'id': 'b'}]})
+    log.record("UNWIND   $rows AS row RETURN row", {'rows': []})
+
+    top = log.top(2)
+    assert top[0][0].startswith('MATCH (i:Item')
+    assert top[1][1] == {'rows': [{'id': 'a'}]}
+
+def test_run_prunes_in_batches_and_warms_plans_without_clearing_caches():
+    log = QueryLog()
+    log.record("MATCH (i:Item {uid: $id}) RETURN i", {'id': 'a'})
+    log.record("broken", None)
+    db = FakeDB(indexes=[
+        {'name': 'item_name', 'state': 'ONLINE', 'populationPercent': 100.0, 'readCount': 12},
+        {'name': 'item_type', 'state': 'POPULATING', 'populationPercent': 40.0},
+    ])
+
+    report = DatabaseMaintenance(database=db, log=log, batch_size=500).run()
+
+    assert [index['reads'] for index in report['indexes']] == [12, None]
+    assert report['prune'] == {'price_history': 3, 'combinations': 3}
+    assert report['warmup'] == 1
+    assert set(report['stages']) == {'indexes', 'resample', 'prune', 'warmup'}
+
+    statements = [query for query, _ in db.statements]
+    assert all('IN TRANSACTIONS OF 500 ROWS' in query for query in statements if 'DELETE' in query)
+    assert 'CALL db.resampleOutdatedIndexes()' in statements
+    assert 'EXPLAIN MATCH (i:Item {uid: $id}) RETURN i' in statements
+    assert not any('clearQueryCaches' in query for query in statements)
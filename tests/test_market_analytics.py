@@ -0,0 +1,61 @@
+"""Tests for vectorised market analytics."""
+import unittest
+
+from src.services.market_analytics import MarketAnalytics
+
+NOW = 1_700_000_000.0
+HOUR = 3600.0
+
+class TestMarketAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.analytics = MarketAnalytics(ema_span=3, anomaly_z=1.5)
+
+    def test_bulk_statistics(self):
+        series = {
+            'item1': (
+                [100.0, 110.0, 120.0, 130.0],
+                [NOW - 40 * HOUR, NOW - 20 * HOUR, NOW - 10 * HOUR, NOW - HOUR],
+                [1, 1, 1, 1]
+            ),
+            'item2': ([50.0], [NOW - HOUR], [2]),
+            'item3': ([], [], [])
+        }
+        results = self.analytics.analyze(series, timeframe_hours=24, now=NOW)
+
+        item1 = results['item1']
+        self.assertAlmostEqual(item1.change_24h, (130 - 110) / 110 * 100)
+        self.assertAlmostEqual(item1.change_48h, 30.0)
+        self.assertEqual(item1.low_24h, 110)
+        self.assertEqual(item1.high_24h, 130)
+        self.assertEqual(item1.volume_24h, 3)
+        self.assertAlmostEqual(item1.vwap, 120.0)
+        # EMA with alpha=0.5 seeded from 110: 115, then 122.5
+        self.assertAlmostEqual(item1.ema, 122.5)
+        self.assertGreater(item1.volatility_score, 0)
+
+        item2 = results['item2']
+        self.assertEqual(item2.change_24h, 0.0)
+        self.assertEqual(item2.volatility_score, 0.0)
+        self.assertEqual(item2.ema, 50.0)
+
+        self.assertIsNone(results['item3'].change_24h)
+
+    def test_vwap_uses_weights(self):
+        series = {'item': ([100.0, 200.0], [NOW - 2 * HOUR, NOW - HOUR], [3, 1])}
+        result = self.analytics.analyze(series, now=NOW)['item']
+        self.assertAlmostEqual(result.vwap, 125.0)
+
+    def test_anomaly_flag(self):
+        prices = [100.0] * 10 + [100.5] * 10 + [180.0]
+        timestamps = [NOW - (len(prices) - i) * 60 for i in range(len(prices))]
+        result = self.analytics.analyze(
+            {'item': (prices, timestamps, [1] * len(prices))}, now=NOW
+        )['item']
+        self.assertTrue(result.is_anomaly)
+        self.assertGreater(result.z_score, 1.5)
+
+    def test_empty_input(self):
+        self.assertEqual(self.analytics.analyze({}), {})
+
+if __name__ == '__main__':
+    unittest.main()
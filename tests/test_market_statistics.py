@@ -0,0 +1,51 @@
+"""Tests for the materialised market statistics."""
+import unittest
+from datetime import timedelta
+
+from src.core.snapshot import SnapshotVersion
+from src.services.market_statistics import MarketStatisticsMaterializer
+
+class TestMarketStatisticsMaterializer(unittest.TestCase):
+    def setUp(self):
+        self.materializer = MarketStatisticsMaterializer(max_age=timedelta(minutes=5))
+
+    def test_materialize(self):
+        snapshot = self.materializer.materialize(
+            version=3,
+            last_prices=[100.0, 200.0, 300.0, 400.0],
+            base_prices=[150.0, 150.0, 350.0, 350.0],
+            categories=['Ammo', 'Ammo', 'Barter', 'Barter']
+        )
+        stats = snapshot.statistics
+
+        self.assertEqual(stats['version'], 3)
+        self.assertEqual(stats['total_items'], 4)
+        self.assertAlmostEqual(stats['avg_price'], 250.0)
+        self.assertEqual(stats['items_above_base'], 2)
+        self.assertAlmostEqual(stats['percent_above_base'], 50.0)
+        self.assertAlmostEqual(stats['price_percentiles']['p50'], 250.0)
+        self.assertEqual(stats['categories']['Ammo']['total_items'], 2)
+        self.assertEqual(stats['categories']['Barter']['items_above_base'], 1)
+        self.assertAlmostEqual(stats['categories']['Barter']['avg_price'], 350.0)
+
+    def test_staleness(self):
+        self.assertTrue(self.materializer.is_stale())
+        self.materializer.materialize(1, [], [], [])
+        self.assertFalse(self.materializer.is_stale(1))
+        self.assertTrue(self.materializer.is_stale(2))
+        self.assertEqual(self.materializer.snapshot.statistics['total_items'], 0)
+
+class TestSnapshotVersion(unittest.TestCase):
+    def test_advance_notifies_once(self):
+        version = SnapshotVersion()
+        seen = []
+        version.subscribe(seen.append)
+
+        self.assertTrue(version.advance(2))
+        self.assertFalse(version.advance(2))
+        self.assertFalse(version.advance(1))
+        self.assertEqual(version.value, 2)
+        self.assertEqual(seen, [2])
+
+if __name__ == '__main__':
+    unittest.main()
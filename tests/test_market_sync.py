@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from src.config.queries import QUERY_PROFILES
+from src.services.market_sync import MarketSyncService
+
+class FakeApi:
+    def __init__(self, rows):
+        self.rows = rows
+        self.profiles = []
+
+    async def fetch_profile(self, profile_name, item_ids=None):
+        self.profiles.append(profile_name)
+        return self.rows
+
+class FakeMergeService:
+    def __init__(self):
+        self.merged = {}
+
+    def _merge(self, name):
+        async def merge(rows):
+            self.merged[name] = rows
+            return len(rows)
+        return merge
+
+    def __getattr__(self, name):
+        if name.startswith('merge_'):
+            return self._merge(name)
+        raise AttributeError(name)
+
+def test_profiles_route_to_their_merge_step():
+    rows = [{'id': 'a', 'lastLowPrice': 100}]
+    api, service = FakeApi(rows), FakeMergeService()
+    sync = MarketSyncService(api=api, market_service=service, item_service=service)
+
+    result = asyncio.run(sync.sync('prices'))
+
+    assert result['fetched'] == result['merged'] == 1
+    assert api.profiles == ['prices']
+    assert service.merged == {'merge_item_prices': rows}
+
+def test_unknown_profile_is_rejected():
+    sync = MarketSyncService(api=FakeApi([]), market_service=FakeMergeService(), item_service=FakeMergeService())
+    with pytest.raises(ValueError):
+        asyncio.run(sync.sync('everything'))
+
+def test_price_profile_skips_static_fields():
+    prices = QUERY_PROFILES['prices'].query
+    assert 'lastLowPrice' in prices
+    assert 'properties' not in prices and 'sellFor' not in prices
+    assert QUERY_PROFILES['full-static'].variables['includeSlots'] is False
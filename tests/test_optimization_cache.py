@@ -0,0 +1,73 @@
+import pytest
+
+from src.core.snapshot import SnapshotVersion
+from src.services import optimization_cache as cache_module
+from src.services.optimization_cache import OptimizationCache
+
+@pytest.fixture
+def snapshot(monkeypatch):
+    snapshot = SnapshotVersion()
+    monkeypatch.setattr(cache_module, 'price_snapshot', snapshot)
+    return snapshot
+
+def _key(**params):
+    selection = OptimizationCache.selection_hash(['b', 'a'], ['a'])
+    return OptimizationCache.key('items', selection, max_items=5, min_total_value=400000, **params)
+
+def test_smaller_requests_are_served_from_a_larger_result(snapshot):
+    cache = OptimizationCache()
+    cache.set(_key(), list(range(10)), max_results=10)
+
+    assert cache.get(_key(), max_results=3) == [0, 1, 2]
+    assert cache.get(_key(), max_results=20) is None
+
+    # A result shorter than its limit was exhaustive
+    cache.set(_key(), [0, 1], max_results=10)
+    assert cache.get(_key(), max_results=50) == [0, 1]
+
+def test_larger_entry_is_kept_over_a_smaller_one(snapshot):
+    cache = OptimizationCache()
+    cache.set(_key(), list(range(10)), max_results=10)
+    cache.set(_key(), list(range(5)), max_results=5)
+    assert cache.get(_key(), max_results=8) == list(range(8))
+
+def test_selection_hash_ignores_order_but_not_grouping():
+    assert OptimizationCache.selection_hash(['a', 'b'], []) == OptimizationCache.selection_hash(['b', 'a'], [])
+    assert OptimizationCache.selection_hash(['a'], ['b']) != OptimizationCache.selection_hash(['a', 'b'], [])
+
+def test_snapshot_advance_invalidates_and_stale_results_are_dropped(snapshot):
+    cache = OptimizationCache()
+    cache.set(_key(), [1], max_results=1)
+
+    snapshot.advance(1)
+    assert cache.get(_key(), max_results=1) is None
+
+    # Started against version 1, finished after version 2 arrived
+    snapshot.advance(2)
+    cache.set(_key(), [1], max_results=1, version=1)
+    assert len(cache) == 0
+
+def test_profile_is_keyed_only_once_it_was_applied(monkeypatch):
+    from datetime import datetime
+
+    from src.models.item import Item
+    from src.services import optimizer as optimizer_module
+    from src.services.trader_availability import PlayerProfile, TraderAvailability
+
+    availability = TraderAvailability()
+    monkeypatch.setattr(optimizer_module, 'trader_availability', availability)
+    now = datetime(2024, 1, 1)
+    items = [Item(uid=uid, name=uid, base_price=100000, created_at=now, updated_at=now) for uid in ('a', 'b')]
+    profile = PlayerProfile.from_request({'trader_levels': {'Prapor': 1}})
+    optimizer = optimizer_module.ItemOptimizer()
+
+    def key(profile):
+        return optimizer._cache_key('items', optimizer._search_input(items, profile=profile), max_items=5)
+
+    # Before the index exists the answer is unrestricted and filed as such
+    assert key(profile) == key(None)
+
+    availability.build(1, [
+        {'item_id': 'a', 'vendor': 'Prapor', 'price_rub': 50000, 'min_level': 2, 'task_id': None},
+    ])
+    assert key(profile) != key(None)
@@ -0,0 +1,184 @@
+import itertools
+import time
+
+import numpy as np
+
+from src.core.tasks import TaskManager
+from src.services.combination_search import (
+    CANCEL,
+    TOTAL,
+    PriceArrays,
+    SearchCancelled,
+    merge_results,
+    new_control,
+    pareto_front,
+    search_combinations,
+    search_progress,
+    update_combinations,
+)
+from src.services.optimization_runner import OptimizationRunner
+
+def _prices(count=12):
+    rng = np.random.default_rng(7)
+    base = rng.integers(20000, 200000, count).astype(float)
+    return PriceArrays(
+        item_ids=[f"item-{i}" for i in range(count)],
+        base_prices=base,
+        buy_prices=base * rng.uniform(0.5, 1.2, count)
+    )
+
+def test_search_respects_locked_items_and_threshold():
+    prices = _prices()
+    results = search_combinations(
+        prices.base_prices, prices.buy_prices,
+        eligible=range(1, 12), locked=[0],
+        max_items=3, min_total_value=300000, max_results=5
+    )
+    assert results
+    for result in results:
+        assert result['indices'][0] == 0
+        assert result['total_base_price'] >= 300000
+    margins = [result['profit_margin'] for result in results]
+    assert margins == sorted(margins, reverse=True)
+
+def test_search_observes_cancel_flag():
+    prices = _prices(40)
+    control = new_control()
+    control[CANCEL] = 1
+    try:
+        search_combinations(
+            prices.base_prices, prices.buy_prices, eligible=range(40),
+            max_items=4, min_total_value=100000, max_results=10 ** 6, control=control
+        )
+    except SearchCancelled:
+        assert control[TOTAL] > 0
+    else:
+        raise AssertionError("search ignored the cancel flag")
+
+def test_search_finds_the_exact_top_k():
+    prices = _prices(14)
+    expected = []
+    for size in range(1, 5):
+        for combo in itertools.combinations(range(14), size):
+            base = prices.base_prices[list(combo)].sum()
+            buy = prices.buy_prices[list(combo)].sum()
+            if base >= 250000:
+                expected.append(((buy - base) / buy, list(combo)))
+    expected.sort()
+
+    results = search_combinations(
+        prices.base_prices, prices.buy_prices, eligible=range(14),
+        max_items=4, min_total_value=250000, max_results=8
+    )
+    assert [r['indices'] for r in results] == [indices for _, indices in expected[:8]]
+
+def test_partitioned_search_merges_to_the_unpartitioned_result():
+    prices = _prices(30)
+    params = dict(eligible=range(1, 30), locked=[0], max_items=4, min_total_value=400000, max_results=10)
+    expected = search_combinations(prices.base_prices, prices.buy_prices, **params)
+
+    for partitions in (2, 3, 5):
+        control = new_control(partitions)
+        # Later partitions start from the bound earlier ones published
+        parts = [
+            search_combinations(
+                prices.base_prices, prices.buy_prices, control=control,
+                partition=partition, partitions=partitions, **params
+            )
+            for partition in reversed(range(partitions))
+        ]
+        assert merge_results(parts, 10) == expected
+        assert search_progress(control) == 1.0
+
+def test_update_after_price_changes_matches_a_fresh_search():
+    prices = _prices(30)
+    params = dict(eligible=range(1, 30), locked=[0], max_items=4, min_total_value=400000, max_results=10)
+    previous = search_combinations(prices.base_prices, prices.buy_prices, **params)
+
+    rng = np.random.default_rng(11)
+    # A few scattered changes, a change inside the previous answer, and a
+    # locked item changing, which touches every combination
+    for changed in ([5, 17], previous[0]['indices'][1:], [0]):
+        buy = prices.buy_prices.copy()
+        buy[changed] *= rng.uniform(0.8, 1.2, len(changed))
+        expected = search_combinations(prices.base_prices, buy, **params)
+        assert update_combinations(previous, changed, prices.base_prices, buy, **params) == expected
+
+def test_update_searches_only_the_changed_items():
+    prices = _prices(30)
+    params = dict(eligible=range(1, 30), locked=[0], max_items=4, min_total_value=400000, max_results=10)
+    previous = search_combinations(prices.base_prices, prices.buy_prices, **params)
+    used = {index for result in previous for index in result['indices']}
+    changed = [index for index in range(1, 30) if index not in used][:2]
+
+    # Every previous answer survives, so the changed items are searched
+    # against the bound and their new combinations merged in
+    buy = prices.buy_prices.copy()
+    buy[changed] *= 0.1
+    expected = search_combinations(prices.base_prices, buy, **params)
+    assert any(set(changed) & set(result['indices']) for result in expected)
+    assert update_combinations(previous, changed, prices.base_prices, buy, **params) == expected
+
+def test_seeded_search_gives_the_same_answer():
+    prices = _prices(25)
+    params = dict(eligible=range(25), max_items=4, min_total_value=300000, max_results=6)
+    expected = search_combinations(prices.base_prices, prices.buy_prices, **params)
+    seed = [result['indices'] for result in expected] + [[0], [1, 2, 3, 4, 5]]
+    assert search_combinations(prices.base_prices, prices.buy_prices, seed=seed, **params) == expected
+
+def test_pareto_front_keeps_only_undominated_trade_offs():
+    rng = np.random.default_rng(5)
+    base = rng.integers(1, 20, 12).astype(float) * 10000
+    buy = rng.integers(1, 20, 12).astype(float) * 10000
+    flea_only = np.arange(12) % 3 == 0
+    points = []
+    for size in range(1, 4):
+        for combo in itertools.combinations(range(1, 12), size):
+            indices = [0, *combo]
+            if base[indices].sum() >= 200000:
+                points.append((buy[indices].sum(), base[indices].sum(), len(indices)))
+    expected = {
+        point for point in points
+        if not any(
+            other != point and other[0] <= point[0] and other[1] >= point[1] and other[2] <= point[2]
+            for other in points
+        )
+    }
+
+    front = pareto_front(
+        base, buy, eligible=range(1, 12), locked=[0],
+        max_items=4, min_total_value=200000, flea_only=flea_only
+    )
+    assert len(front) == len(expected)
+    assert {(p['total_buy_price'], p['total_base_price'], p['item_count']) for p in front} == expected
+    assert [p['total_buy_price'] for p in front] == sorted(p['total_buy_price'] for p in front)
+    for point in front:
+        assert point['indices'][0] == 0
+        assert point['flea_only_items'] == int(flea_only[point['indices']].sum())
+
+def test_runner_matches_in_process_search_and_reports_through_task_manager():
+    prices = _prices()
+    runner = OptimizationRunner(max_workers=2)
+    manager = TaskManager(max_workers=1)
+    try:
+        job = runner.submit(prices, max_items=3, min_total_value=300000, max_results=5, locked_ids=['item-0'])
+        task_id = manager.submit_job('combination_search', job)
+        job.future.result(timeout=30)
+        for _ in range(100):
+            info = manager.get_task_info(task_id)
+            if info.status != 'running':
+                break
+            time.sleep(0.01)
+    finally:
+        runner.shutdown()
+
+    expected = search_combinations(
+        prices.base_prices, prices.buy_prices,
+        eligible=range(1, 12), locked=[0],
+        max_items=3, min_total_value=300000, max_results=5
+    )
+    assert info.status == 'completed'
+    assert info.progress == 1.0
+    assert [r['item_ids'] for r in info.result] == [
+        [f"item-{i}" for i in r['indices']] for r in expected
+    ]
@@ -0,0 +1,160 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from src.services.combination_search import PriceArrays
+from src.services.price_adjustments import BLACKLIST, LOCK, OVERRIDE, PriceAdjustments
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+def _prices():
+    return PriceArrays(
+        item_ids=['ammo', 'armor', 'gpu'],
+        base_prices=np.array([1000.0, 60000.0, 200000.0]),
+        buy_prices=np.array([650.0, 45000.0, 250000.0])
+    )
+
+def test_changes_patch_the_rebased_view_in_place():
+    adjustments = PriceAdjustments(clock=Clock(), proactive=False)
+    adjustments.set_override('gpu', 180000)
+    view = adjustments.rebase(1, _prices())
+    assert view.prices.buy_prices.tolist() == [650.0, 45000.0, 180000.0]
+
+    adjustments.set_blacklist('ammo', True)
+    adjustments.set_lock('armor', True)
+    adjustments.set_override('gpu', None)
+    assert adjustments.view() is view
+    assert view.prices.buy_prices.tolist() == [650.0, 45000.0, 250000.0]
+    assert view.blacklisted.tolist() == [True, False, False]
+    assert view.locked.tolist() == [False, True, False]
+
+def test_expiry_heap_reverts_due_adjustments_only():
+    clock = Clock()
+    adjustments = PriceAdjustments(clock=clock, proactive=False)
+    view = adjustments.rebase(1, _prices())
+    changes = []
+    adjustments.subscribe(changes.extend)
+
+    adjustments.set_override('armor', 30000, duration=5)
+    adjustments.set_blacklist('ammo', True, duration=10)
+    # Re-setting without an expiry leaves a stale heap entry behind
+    adjustments.set_blacklist('ammo', True)
+    changes.clear()
+
+    clock.now += 6 * 60
+    assert adjustments.expire() == [(OVERRIDE, 'armor')]
+    assert view.prices.buy_prices[1] == 45000.0
+    clock.now += 10 * 60
+    assert adjustments.expire() == []
+    assert adjustments.blacklisted_ids() == {'ammo'}
+    assert changes == [(OVERRIDE, 'armor')]
+
+def test_load_skips_expired_records_and_apply_covers_other_item_sets():
+    clock = Clock()
+    adjustments = PriceAdjustments(clock=clock, proactive=False)
+    past = datetime.fromtimestamp(clock.now - 60, tz=timezone.utc)
+    adjustments.load([
+        {'item_id': 'gpu', 'price_override': 150000.0, 'override_expires': None},
+        {'item_id': 'armor', 'blacklisted': True, 'blacklist_expires': past},
+        {'item_id': 'ammo', 'locked': True, 'lock_expires': clock.now + 60},
+    ])
+    assert adjustments.loaded
+    assert adjustments.overrides() == {'gpu': 150000.0}
+    assert adjustments.blacklisted_ids() == set()
+
+    effective = adjustments.apply(_prices())
+    assert effective.prices.buy_prices.tolist() == [650.0, 45000.0, 150000.0]
+    assert effective.locked.tolist() == [True, False, False]
+
+    clock.now += 120
+    assert adjustments.expire() == [(LOCK, 'ammo')]
+    assert BLACKLIST not in {kind for kind, _ in adjustments.expire()}
+
+def test_batch_changes_notify_once():
+    adjustments = PriceAdjustments(clock=Clock(), proactive=False)
+    view = adjustments.rebase(1, _prices())
+    batches = []
+    adjustments.subscribe(batches.append)
+    adjustments.apply_changes([
+        (OVERRIDE, 'ammo', 500.0, 30),
+        (BLACKLIST, 'armor', True, None),
+        (LOCK, 'gpu', True, None),
+        (LOCK, 'gpu', None, None),
+    ])
+    assert len(batches) == 1 and len(batches[0]) == 4
+    assert view.prices.buy_prices[0] == 500.0
+    assert view.blacklisted.tolist() == [False, True, False]
+    assert not view.locked.any()
+
+def test_item_adjustment_tells_a_cleared_price_from_an_untouched_one():
+    from src.models.item import ItemAdjustment
+
+    assert ItemAdjustment(item_id='gpu', price=None).sets_price
+    assert not ItemAdjustment(item_id='gpu', blacklisted=True).sets_price
+
+class SharedStore:
+    """The graph side of two workers: adjustment records and their version stamp."""
+
+    def __init__(self):
+        self.records = {}
+        self.version = 0
+
+    def apply(self, layer, item_id, price):
+        if price is None:
+            self.records.pop(item_id, None)
+        else:
+            self.records[item_id] = {'item_id': item_id, 'price_override': price}
+        self.version += 1
+        layer.apply_changes([(OVERRIDE, item_id, price, None)], self.version)
+
+    def sync(self, layer):
+        stamp = self.version
+        if layer.needs_reload(stamp):
+            layer.load(list(self.records.values()), stamp)
+
+def test_workers_reload_adjustments_another_worker_changed():
+    clock = Clock()
+    store = SharedStore()
+    first = PriceAdjustments(clock=clock, proactive=False)
+    second = PriceAdjustments(clock=clock, proactive=False)
+    store.sync(first)
+    store.sync(second)
+    view = second.rebase(1, _prices())
+
+    store.apply(first, 'gpu', 180000.0)
+    assert not first.needs_reload(store.version)
+    assert second.needs_reload(store.version)
+    store.sync(second)
+    assert view.prices.buy_prices[2] == 180000.0
+
+    # A change made in between is not hidden by this worker's own stamp
+    store.apply(first, 'armor', 30000.0)
+    store.apply(second, 'gpu', None)
+    assert second.needs_reload(store.version)
+    store.sync(second)
+    assert second.overrides() == {'armor': 30000.0}
+    store.sync(first)
+    assert first.overrides() == {'armor': 30000.0}
+
+def test_adjustments_reload_once_older_than_max_age():
+    clock = Clock()
+    adjustments = PriceAdjustments(max_age=60, clock=clock, proactive=False)
+    assert adjustments.needs_reload()
+    adjustments.load([], 0)
+    assert not adjustments.needs_reload(0)
+    clock.now += 61
+    assert adjustments.needs_reload(0)
+
+def test_single_setters_adopt_the_version_they_were_persisted_as():
+    adjustments = PriceAdjustments(clock=Clock(), proactive=False)
+    adjustments.load([], 3)
+    adjustments.set_blacklist('ammo', True, stamp=4)
+    assert not adjustments.needs_reload(4)
+    # Version 5 was written elsewhere, so 6 cannot be adopted
+    adjustments.set_lock('armor', True, stamp=6)
+    assert adjustments.needs_reload(6)
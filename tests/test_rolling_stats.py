@@ -0,0 +1,99 @@
+"""Tests for incremental rolling price statistics."""
+import statistics
+import unittest
+from datetime import timedelta
+
+from src.services.market_analytics import MarketAnalytics
+from src.services.rolling_stats import RollingStatsRegistry, RollingWindow
+
+HOUR = 3600.0
+
+class TestRollingWindow(unittest.TestCase):
+    def test_matches_full_recomputation(self):
+        window = RollingWindow(10 * HOUR)
+        prices = [120.0, 80.0, 150.0, 90.0, 200.0, 60.0, 110.0, 130.0]
+        for i, price in enumerate(prices):
+            window.add(price, i * 3 * HOUR)
+
+        # Only observations within 10h of the last one (t=21h) remain
+        kept = prices[4:]
+        self.assertEqual(window.count, len(kept))
+        self.assertAlmostEqual(window.mean, statistics.mean(kept))
+        self.assertAlmostEqual(window.variance, statistics.variance(kept))
+        self.assertAlmostEqual(window.total, sum(kept))
+        self.assertAlmostEqual(window.sum_squares, sum(p * p for p in kept))
+        self.assertEqual(window.minimum, min(kept))
+        self.assertEqual(window.maximum, max(kept))
+        self.assertEqual(window.first, kept[0])
+
+    def test_evicts_to_empty(self):
+        window = RollingWindow(HOUR)
+        window.add(100.0, 0)
+        window.evict(2 * HOUR)
+        self.assertEqual(window.count, 0)
+        self.assertIsNone(window.minimum)
+        self.assertIsNone(window.vwap)
+
+class TestRollingStatsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = RollingStatsRegistry()
+
+    def test_trends_and_changes(self):
+        self.registry.record('item1', 100.0, 0, item_name='Item 1')
+        self.registry.record('item1', 110.0, HOUR)
+        self.registry.record('item2', 100.0, 0, item_name='Item 2')
+        self.registry.record('item2', 101.0, HOUR)
+
+        trends = self.registry.trends('item1', now=HOUR)
+        self.assertAlmostEqual(trends.change_24h, 10.0)
+        self.assertEqual(trends.low_24h, 100)
+        self.assertEqual(trends.high_24h, 110)
+        self.assertEqual(trends.volume_24h, 2)
+
+        changes = self.registry.price_changes(threshold_percent=5)
+        self.assertEqual([c['item_id'] for c in changes], ['item1'])
+        self.assertEqual(changes[0]['item_name'], 'Item 1')
+        self.assertEqual(changes[0]['old_price'], 100.0)
+
+    def test_hydrate_and_freshness(self):
+        self.assertFalse(self.registry.is_fresh(timedelta(minutes=5)))
+        self.registry.hydrate([{
+            'item_id': 'item1',
+            'item_name': 'Item 1',
+            'prices': [100.0, 90.0],
+            'timestamps': [0, HOUR],
+            'weights': [1, 1]
+        }])
+        self.assertTrue(self.registry.is_fresh(timedelta(minutes=5)))
+        self.assertIn('item1', self.registry)
+        self.assertAlmostEqual(self.registry.trends('item1', now=HOUR).change_24h, -10.0)
+
+    def test_matches_batch_analytics(self):
+        prices = [100.0, 104.0, 98.0, 120.0, 111.0, 95.0, 102.0, 130.0, 99.0, 101.0]
+        timestamps = [i * 7 * HOUR for i in range(len(prices))]
+        weights = [1.0, 3.0, 2.0, 1.0, 5.0, 1.0, 2.0, 4.0, 1.0, 2.0]
+        for price, timestamp, weight in zip(prices, timestamps, weights):
+            self.registry.record('item1', price, timestamp, weight)
+        now = timestamps[-1] + HOUR
+
+        expected = MarketAnalytics().analyze({'item1': (prices, timestamps, weights)}, now=now)['item1']
+        actual = self.registry.trends('item1', now=now)
+        for field in ('change_24h', 'change_48h', 'volatility_score', 'ema', 'vwap', 'z_score'):
+            self.assertAlmostEqual(getattr(actual, field), getattr(expected, field), places=6, msg=field)
+        for field in ('low_24h', 'high_24h', 'volume_24h', 'is_anomaly'):
+            self.assertEqual(getattr(actual, field), getattr(expected, field), msg=field)
+
+    def test_price_changes_cover_history_older_than_the_windows(self):
+        self.registry.hydrate(
+            [{'item_id': 'item1', 'prices': [120.0], 'timestamps': [100 * HOUR]}],
+            [
+                {'item_id': 'item1', 'item_name': 'Item 1', 'prices': [100.0, 120.0], 'changed_at': 100 * HOUR},
+                {'item_id': 'item2', 'item_name': 'Item 2', 'prices': [50.0, 40.0], 'changed_at': 0}
+            ]
+        )
+        changes = {c['item_id']: c for c in self.registry.price_changes(threshold_percent=5)}
+        self.assertEqual(changes['item1']['old_price'], 100.0)
+        self.assertAlmostEqual(changes['item2']['change_percent'], -20.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime
+
+from src.core.snapshot import SnapshotVersion
+from src.core.websocket import ConnectionManager, MarketUpdate
+from src.core.ws_protocol import FeedHistory
+from src.services.snapshot_relay import SnapshotRelay
+
+class FakeMarketService:
+    """The graph as the ingesting worker left it."""
+
+    def __init__(self, version, prices):
+        self.version = version
+        self.prices = prices
+        self.requested = []
+
+    async def get_snapshot_version(self):
+        return self.version
+
+    async def get_latest_prices(self, item_ids):
+        self.requested.append(item_ids)
+        return [
+            {'item_id': item_id, 'price': self.prices[item_id]}
+            for item_id in item_ids if item_id in self.prices
+        ]
+
+class RecordingManager(ConnectionManager):
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def publish_batch(self, updates):
+        self.published.append([(update.item_id, update.price) for update in updates])
+
+def _relay(service, snapshot=None, history=None):
+    manager = RecordingManager()
+    manager.item_subscribers = {'gpu': {'c1'}, 'ledx': {'c2'}}
+    relay = SnapshotRelay(
+        service=service,
+        snapshot=snapshot or SnapshotVersion(),
+        connections=manager,
+        history=history or FeedHistory()
+    )
+    return relay, manager
+
+def test_follower_adopts_newer_snapshot_and_publishes_changed_prices():
+    history = FeedHistory()
+    history.record([MarketUpdate(item_id='ledx', price=900000, timestamp=datetime(2024, 1, 1))])
+    snapshot = SnapshotVersion()
+    advanced = []
+    snapshot.subscribe(advanced.append)
+    service = FakeMarketService(3, {'gpu': 250000, 'ledx': 900000, 'tetriz': 80000})
+    relay, manager = _relay(service, snapshot, history)
+
+    assert asyncio.run(relay.poll())
+    assert snapshot.value == 3 and advanced == [3]
+    assert service.requested == [['gpu', 'ledx']]
+    # ledx was already sent at this price
+    assert manager.published == [[('gpu', 250000)]]
+
+def test_relayed_snapshot_is_left_alone():
+    service = FakeMarketService(3, {'gpu': 250000})
+    relay, manager = _relay(service)
+    asyncio.run(relay.poll())
+    service.requested.clear()
+    manager.published.clear()
+
+    assert not asyncio.run(relay.poll())
+    assert service.requested == [] and manager.published == []
+
+def test_ingest_adopted_elsewhere_is_still_published():
+    # A request in this worker advanced the shared stamp before the poll
+    snapshot = SnapshotVersion()
+    snapshot.advance(3)
+    service = FakeMarketService(3, {'gpu': 250000})
+    relay, manager = _relay(service, snapshot)
+
+    assert asyncio.run(relay.poll())
+    assert manager.published == [[('gpu', 250000)]]
@@ -0,0 +1,87 @@
+import re
+import subprocess
+import sys
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+
+from flask import Flask
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Cumulative time to import the modules below, in microseconds
+IMPORT_BUDGET_US = 1_000_000
+# Modules that stand in for their services through providers
+LAZY_MODULES = ('src.core.providers', 'src.views.market')
+# Loaded on first use, never while a worker boots
+DEFERRED_MODULES = ('numpy', 'strawberry', 'neomodel', 'github')
+# Built by the providers on first use
+DEFERRED_SERVICES = ('src.services.market_service', 'src.services.item_service')
+
+# Import the modules on their own: the package __init__ files pull in the
+# whole application, which is not what is measured here
+_IMPORT_SCRIPT = """
+import sys, types
+for package in ('src', 'src.core', 'src.views', 'src.services', 'src.types'):
+    module = types.ModuleType(package)
+    module.__path__ = [package.replace('.', '/')]
+    sys.modules[package] = module
+for name in {modules!r}:
+    __import__(name)
+"""
+
+def _load_providers():
+    """Load ``src/core/providers.py`` without running the package __init__."""
+    spec = spec_from_file_location('_startup_providers', ROOT / 'src' / 'core' / 'providers.py')
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _import_times(modules) -> dict:
+    """Cumulative import time per module from ``python -X importtime``."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _IMPORT_SCRIPT.format(modules=tuple(modules))],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    # A broken import is the worst startup regression; it must fail, not skip
+    assert result.returncode == 0, f"{modules} failed to import:\n{result.stderr}"
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)', line)
+        if match:
+            times[match.group(2)] = int(match.group(1))
+    return times
+
+def test_lazy_modules_defer_heavy_imports_and_services():
+    times = _import_times(LAZY_MODULES)
+    loaded = sorted({name.split('.')[0] for name in times} & set(DEFERRED_MODULES))
+    assert not loaded, f"imported at boot: {loaded}"
+    built = sorted(set(times) & set(DEFERRED_SERVICES))
+    assert not built, f"services imported at boot: {built}"
+
+def test_lazy_modules_import_within_budget():
+    times = _import_times(LAZY_MODULES)
+    assert sum(times[module] for module in LAZY_MODULES) < IMPORT_BUDGET_US
+
+def test_provider_builds_on_first_use_and_once_per_app():
+    ServiceProvider = _load_providers().ServiceProvider
+    built = []
+    provider = ServiceProvider(lambda: built.append(object()) or built[-1], name='probe')
+    assert built == []
+
+    first, second = Flask('first'), Flask('second')
+    with first.app_context():
+        service = provider.get()
+        assert provider.get() is service
+    with second.app_context():
+        assert provider.get() is not service
+    with first.app_context():
+        assert provider.get() is service
+    assert len(built) == 2
+
+def test_provider_imports_dotted_paths_lazily_and_forwards_attributes():
+    ServiceProvider = _load_providers().ServiceProvider
+    provider = ServiceProvider('collections:OrderedDict')
+    provider.update(a=1)
+    assert provider.get() == {'a': 1}
+    provider.reset()
+    assert provider.get() == {}
@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from src.services.task_manager import TaskQueue
+
+async def _value(value, delay=0.0):
+    await asyncio.sleep(delay)
+    return {"value": value}
+
+def test_higher_priority_runs_first():
+    async def run():
+        queue = TaskQueue(max_concurrent=1)
+        order = []
+
+        async def record(name):
+            order.append(name)
+            return {}
+
+        await queue.enqueue("blocker", _value(0, 0.01))
+        await queue.enqueue("low", record("low"), priority=5)
+        await queue.enqueue("high", record("high"), priority=1)
+        await queue._queue.join()
+        await queue.stop()
+        return order
+
+    assert asyncio.run(run()) == ["high", "low"]
+
+def test_timeout_and_cancellation():
+    async def run():
+        queue = TaskQueue(max_concurrent=1)
+        await queue.enqueue("slow", _value(1, 1), timeout=0.01)
+        await queue.enqueue("queued", _value(2))
+        assert queue.cancel("queued")
+        await queue._queue.join()
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(run())
+    assert queue.get_result("slow").status == "timeout"
+    assert queue.get_result("queued").status == "cancelled"
+    stats = queue.get_stats()
+    assert stats["timeout"] == 1 and stats["cancelled"] == 1
+    assert stats["queue_depth"] == 0
+
+def test_results_are_bounded_and_expire():
+    async def run():
+        queue = TaskQueue(max_results=2, result_ttl=60)
+        for index in range(3):
+            await queue.enqueue(f"task-{index}", _value(index))
+        await queue._queue.join()
+        await queue.stop()
+        return queue
+
+    queue = asyncio.run(run())
+    assert queue.get_result("task-0") is None
+    assert queue.get_result("task-2").result == {"value": 2}
+    assert queue.get_stats()["run_time"]["count"] == 3
+
+    queue.result_ttl = 0
+    assert queue.get_result("task-2") is None
+
+def test_submit_from_short_lived_loops():
+    queue = TaskQueue(max_concurrent=1)
+
+    async def view(task_id, value):
+        # Each Flask async view runs on a loop of its own
+        queue.submit(task_id, _value(value, 0.01))
+
+    asyncio.run(view("first", 1))
+    asyncio.run(view("second", 2))
+    deadline = time.monotonic() + 5
+    while queue.get_stats()["completed"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert queue.get_result("first").result == {"value": 1}
+    assert queue.get_result("second").result == {"value": 2}
+
+    asyncio.run(view("slow", 3))
+    assert queue.cancel("slow") or queue.get_result("slow").status == "completed"
+    queue.shutdown()
+
+    # The queue can start its loop thread again after a shutdown
+    asyncio.run(view("again", 4))
+    queue.shutdown()
+
+def test_queue_stays_on_the_loop_that_started_it():
+    queue = TaskQueue()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(queue.start())
+    try:
+        with pytest.raises(RuntimeError):
+            asyncio.run(queue.start())
+    finally:
+        loop.run_until_complete(queue.stop())
+        loop.close()
+
+    async def restart():
+        # A stopped, empty queue may move to a new loop
+        await queue.start()
+        await queue.stop()
+
+    asyncio.run(restart())
@@ -0,0 +1,79 @@
+import numpy as np
+
+from src.services.combination_search import PriceArrays
+from src.services.trader_availability import MAX_LOYALTY_LEVEL, AvailabilityIndex, PlayerProfile
+
+OFFERS = [
+    {'item_id': 'ammo', 'vendor': 'Prapor', 'price_rub': 900, 'min_level': 1, 'task_id': None},
+    {'item_id': 'ammo', 'vendor': 'Flea Market', 'price_rub': 700, 'min_level': None, 'task_id': None},
+    {'item_id': 'armor', 'vendor': 'Ragman', 'price_rub': 50000, 'min_level': 3, 'task_id': None},
+    {'item_id': 'scope', 'vendor': 'Mechanic', 'price_rub': 30000, 'min_level': 2, 'task_id': 'gunsmith-1'},
+]
+
+def _profile(**data):
+    return PlayerProfile.from_request(data)
+
+def test_empty_profile_restricts_nothing():
+    index = AvailabilityIndex.from_offers(OFFERS)
+    assert not _profile().restricts
+    assert index.mask(_profile()).sum() == len(OFFERS)
+    assert index.buy_prices(_profile()).tolist() == [700, 50000, 30000]
+
+def test_loyalty_levels_quests_and_flea_access():
+    index = AvailabilityIndex.from_offers(OFFERS)
+    profile = _profile(
+        trader_levels={'Ragman': 2, 'Mechanic': 2},
+        completed_tasks=[],
+        flea_market=False
+    )
+    assert np.isinf(index.buy_prices(profile)[1:]).all()
+    assert index.buy_prices(profile)[0] == 900
+
+    profile = _profile(trader_levels={'Ragman': 3}, completed_tasks=['gunsmith-1'])
+    assert index.buy_prices(profile).tolist() == [700, 50000, 30000]
+    assert index.offer_available(profile, [('armor', 'Ragman'), ('armor', 'Prapor'), ('gpu', 'Therapist')]).tolist() == [
+        True, False, False
+    ]
+
+def test_apply_reprices_known_items_and_keeps_unknown_ones():
+    index = AvailabilityIndex.from_offers(OFFERS)
+    prices = PriceArrays(
+        item_ids=['ammo', 'armor', 'gpu'],
+        base_prices=np.array([1000.0, 60000.0, 200000.0]),
+        buy_prices=np.array([650.0, 45000.0, 250000.0])
+    )
+    repriced, available = index.apply(prices, _profile(trader_levels={'Ragman': 1}, flea_market=False))
+    assert available.tolist() == [True, False, True]
+    assert repriced.buy_prices.tolist() == [900.0, 45000.0, 250000.0]
+    assert prices.buy_prices.tolist() == [650.0, 45000.0, 250000.0]
+
+def test_offers_of_one_vendor_keep_their_own_level_and_quest():
+    index = AvailabilityIndex.from_offers([
+        {'item_id': 'ammo', 'vendor': 'Prapor', 'price_rub': 900, 'min_level': 1, 'task_id': None},
+        {'item_id': 'ammo', 'vendor': 'Prapor', 'price_rub': 500, 'min_level': 3, 'task_id': None},
+        {'item_id': 'scope', 'vendor': 'Mechanic', 'price_rub': 40000, 'min_level': 1, 'task_id': None},
+        {'item_id': 'scope', 'vendor': 'Mechanic', 'price_rub': 30000, 'min_level': 1, 'task_id': 'gunsmith-1'},
+    ])
+    low = _profile(trader_levels={'Prapor': 1}, completed_tasks=[])
+    assert index.buy_prices(low).tolist() == [900, 40000]
+    assert index.offer_available(low, [('ammo', 'Prapor'), ('scope', 'Mechanic')]).tolist() == [True, True]
+
+    high = _profile(trader_levels={'Prapor': 3}, completed_tasks=['gunsmith-1'])
+    assert index.buy_prices(high).tolist() == [500, 30000]
+
+def test_profile_levels_are_clamped():
+    profile = _profile(trader_levels={'Prapor': 5, 'Ragman': -1})
+    assert profile.level('Prapor') == MAX_LOYALTY_LEVEL
+    assert profile.level('Ragman') == 0
+
+    index = AvailabilityIndex.from_offers(OFFERS)
+    assert index.buy_prices(_profile(trader_levels={'Ragman': 5}))[1] == 50000
+    assert np.isinf(index.buy_prices(_profile(trader_levels={'Ragman': -1}))[1])
+
+def test_each_offer_is_checked_against_its_own_level_and_quest():
+    profile = _profile(trader_levels={'Prapor': 2}, completed_tasks=['gunsmith-1'])
+    assert profile.can_buy('Prapor', 1)
+    assert not profile.can_buy('Prapor', 3)
+    assert profile.can_buy('Mechanic', 4, 'gunsmith-1')
+    assert not profile.can_buy('Mechanic', 1, 'gunsmith-2')
+    assert not _profile(flea_market=False).can_buy('Flea Market', None)
@@ -0,0 +1,41 @@
+from src.database.warmup import SAMPLE_ITEMS_QUERY, WarmupRegistry
+
+class FakeDB:
+    def __init__(self):
+        self.statements = []
+
+    def query(self, query, parameters=None):
+        self.statements.append((query, parameters))
+        if query == SAMPLE_ITEMS_QUERY:
+            return [{'item_id': 'gpu'}, {'item_id': 'ammo'}]
+        if 'broken' in query:
+            raise RuntimeError('syntax error')
+        return []
+
+def test_run_replays_each_statement_cold_and_warm_then_marks_ready():
+    registry = WarmupRegistry()
+    registry.register('trends', 'MATCH (i:Item) WHERE i.uid IN $item_ids RETURN i',
+                      lambda item_ids: {'item_ids': item_ids})
+    registry.register('optimal', 'MATCH (i:Item) RETURN i', execute=False)
+    db = FakeDB()
+    assert not registry.ready
+
+    results = registry.run(database=db, modules=())
+
+    assert registry.ready
+    assert set(results['trends']) == {'cold', 'warm'}
+    assert db.statements[1:] == [
+        ('MATCH (i:Item) WHERE i.uid IN $item_ids RETURN i', {'item_ids': ['gpu', 'ammo']}),
+        ('MATCH (i:Item) WHERE i.uid IN $item_ids RETURN i', {'item_ids': ['gpu', 'ammo']}),
+        ('EXPLAIN MATCH (i:Item) RETURN i', {}),
+        ('EXPLAIN MATCH (i:Item) RETURN i', {}),
+    ]
+
+def test_failures_are_recorded_without_holding_back_readiness():
+    registry = WarmupRegistry()
+    registry.register('broken', 'broken statement')
+
+    results = registry.run(database=FakeDB(), modules=('src.missing_module',))
+
+    assert registry.ready
+    assert results['broken']['cold'] is None and 'error' in results['broken']
@@ -0,0 +1,158 @@
+"""Tests for the WebSocket market feed fan-out."""
+import json
+import unittest
+from datetime import datetime
+
+import gevent
+
+from src.core.websocket import ClientChannel, ConnectionManager, MarketUpdate
+from src.core.ws_protocol import DeltaEncoder, FeedHistory, decode_frame, feed_history
+
+class FakeWebSocket:
+    def __init__(self):
+        self.closed = False
+        self.sent = []
+
+    def send(self, message, binary=None):
+        self.sent.append(decode_frame(message) if binary else json.loads(message))
+
+def update(item_id, price):
+    return MarketUpdate(item_id=item_id, price=price, timestamp=datetime(2024, 1, 1))
+
+class TestConnectionManager(unittest.TestCase):
+    def setUp(self):
+        self.manager = ConnectionManager()
+        self.ws1, self.ws2 = FakeWebSocket(), FakeWebSocket()
+        self.manager.connect('c1', self.ws1)
+        self.manager.connect('c2', self.ws2)
+
+    def tearDown(self):
+        for client_id in list(self.manager.channels):
+            self.manager.disconnect(client_id)
+
+    def test_batch_is_one_frame_per_client(self):
+        self.manager.subscribe('c1', 'a')
+        self.manager.subscribe('c1', 'b')
+        self.manager.subscribe('c2', 'b')
+
+        self.manager.publish_batch([update('a', 1), update('b', 2), update('c', 3)])
+        gevent.sleep(0)
+
+        self.assertEqual(len(self.ws1.sent), 1)
+        self.assertEqual([u['item_id'] for u in self.ws1.sent[0]['updates']], ['a', 'b'])
+        self.assertEqual([u['item_id'] for u in self.ws2.sent[0]['updates']], ['b'])
+
+    def test_disconnect_cleans_reverse_index(self):
+        self.manager.subscribe('c1', 'a')
+        self.manager.unsubscribe('c1', 'a')
+        self.manager.subscribe('c2', 'a')
+        self.manager.disconnect('c2')
+        self.assertNotIn('a', self.manager.item_subscribers)
+
+class TestClientChannel(unittest.TestCase):
+    def test_coalesce_keeps_latest_per_item(self):
+        channel = ClientChannel('c', FakeWebSocket(), max_pending=2, policy='coalesce')
+        channel.enqueue([update('a', 1), update('b', 2), update('a', 3), update('c', 4)])
+        batch = channel.drain()
+        self.assertEqual([(u.item_id, u.price) for u in batch], [('a', 3), ('c', 4)])
+        self.assertEqual(channel.dropped, 1)
+
+    def test_drop_discards_oldest(self):
+        channel = ClientChannel('c', FakeWebSocket(), max_pending=2, policy='drop')
+        channel.enqueue([update('a', 1), update('a', 2), update('a', 3)])
+        self.assertEqual([u.price for u in channel.drain()], [2, 3])
+        self.assertEqual(channel.dropped, 1)
+
+class TestDeltaProtocol(unittest.TestCase):
+    def test_only_changed_prices_are_sent(self):
+        encoder = DeltaEncoder()
+        first = decode_frame(encoder.encode([update('a', 100), update('b', 200)], seq=1))
+        self.assertEqual(first['k'], 's')
+        self.assertEqual(first['n'], {'0': 'a', '1': 'b'})
+        self.assertEqual(first['u'], [[0, 100], [1, 200]])
+
+        second = decode_frame(encoder.encode([update('a', 100), update('b', 250)], seq=2))
+        self.assertEqual(second['k'], 'd')
+        self.assertNotIn('n', second)
+        self.assertEqual(second['u'], [[1, 250]])
+
+        self.assertIsNone(encoder.encode([update('a', 100)], seq=3))
+
+    def test_history_replay_and_expiry(self):
+        history = FeedHistory(max_batches=2)
+        history.record([update('a', 1)])
+        history.record([update('b', 2)])
+        history.record([update('a', 3)])
+
+        self.assertEqual([u.price for u in history.since(2, {'a', 'b'})], [3])
+        self.assertEqual(history.since(3, {'a'}), [])
+        self.assertIsNone(history.since(0, {'a'}))
+        self.assertEqual(sorted(u.price for u in history.latest({'a', 'b'})), [2, 3])
+
+    def test_negotiate_delta_sends_snapshot(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        manager.connect('c', ws)
+        manager.publish_batch([update('x', 10)])
+
+        manager.negotiate('c', {'type': 'hello', 'protocol': 'delta', 'items': ['x']})
+        gevent.sleep(0)
+        manager.disconnect('c')
+
+        self.assertEqual(ws.sent[0]['protocol'], 'delta')
+        self.assertEqual(ws.sent[1]['k'], 's')
+        self.assertEqual(ws.sent[1]['u'], [[0, 10]])
+
+    def test_reconnect_replays_missed_updates_as_delta(self):
+        manager = ConnectionManager()
+        manager.publish_batch([update('x', 10), update('y', 20)])
+        last_seq = feed_history.seq
+        manager.publish_batch([update('y', 25)])
+
+        ws = FakeWebSocket()
+        manager.connect('c', ws)
+        manager.negotiate('c', {
+            'type': 'hello', 'protocol': 'delta', 'items': ['x', 'y'],
+            'seq': last_seq, 'epoch': feed_history.epoch
+        })
+        gevent.sleep(0)
+        manager.disconnect('c')
+
+        self.assertEqual(ws.sent[0]['seq'], last_seq + 1)
+        self.assertEqual(ws.sent[1]['k'], 'd')
+        self.assertEqual(ws.sent[1]['n'], {'0': 'y'})
+        self.assertEqual(ws.sent[1]['u'], [[0, 25]])
+
+    def test_reconnect_past_history_gets_snapshot(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        manager.connect('c', ws)
+        manager.publish_batch([update('x', 10)])
+
+        manager.negotiate('c', {
+            'type': 'hello', 'protocol': 'delta', 'items': ['x'], 'seq': -100, 'epoch': feed_history.epoch
+        })
+        gevent.sleep(0)
+        manager.disconnect('c')
+
+        self.assertEqual(ws.sent[1]['k'], 's')
+    def test_reconnect_to_another_process_gets_snapshot(self):
+        manager = ConnectionManager()
+        manager.publish_batch([update('x', 10)])
+        # The old worker had numbered further than this one
+        last_seq = feed_history.seq - 1
+
+        ws = FakeWebSocket()
+        manager.connect('c', ws)
+        manager.negotiate('c', {
+            'type': 'hello', 'protocol': 'delta', 'items': ['x'], 'seq': last_seq, 'epoch': 'other-worker'
+        })
+        gevent.sleep(0)
+        manager.disconnect('c')
+
+        self.assertEqual(ws.sent[0]['epoch'], feed_history.epoch)
+        self.assertEqual(ws.sent[1]['k'], 's')
+        self.assertEqual(ws.sent[1]['u'], [[0, 10]])
+
+if __name__ == '__main__':
+    unittest.main()